@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TODO_backend.settings')
+# The settings turn the persistent database connections off under ASGI
+os.environ['SERVER_GATEWAY'] = 'asgi'
 
 application = get_asgi_application()
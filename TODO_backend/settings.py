@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
+import importlib.util
 import os
+import tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # django rest framework
     'rest_framework',
@@ -57,7 +60,9 @@ INSTALLED_APPS = [
     'core',
     'user',
     'workspace',
-    'todo'
+    'todo',
+    'sync',
+    'job',
 ]
 
 REST_FRAMEWORK = {
@@ -68,9 +73,65 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CreatedCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': (
+        # FastJSONRenderer writes the same bytes as JSONRenderer with orjson, API_FAST_JSON=false turns it off
+        'core.renderers.FastJSONRenderer' if os.environ.get('API_FAST_JSON', 'true') == 'true'
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        # Accept: application/msgpack, when msgpack is installed
+        *(('core.renderers.MessagePackRenderer',) if importlib.util.find_spec('msgpack') else ()),
+    ),
+    'DEFAULT_THROTTLE_CLASSES': ('core.throttling.UserRateThrottle',),
+    # Requests allowed per scope, API_THROTTLE=false turns the limits off (for the benchmarks)
+    'DEFAULT_THROTTLE_RATES': {
+        scope: rate if os.environ.get('API_THROTTLE', 'true') == 'true' else None for scope, rate in {
+            # Requests per user (or per IP when anonymous) to the views without a rate of their own
+            'user': os.environ.get('USER_RATE', '1200/min'),
+            # Reads and writes per user of api/todo/
+            'todo_read': os.environ.get('TODO_READ_RATE', '600/min'),
+            'todo_write': os.environ.get('TODO_WRITE_RATE', '120/min'),
+            # Signups per client IP
+            'signup': os.environ.get('SIGNUP_RATE', '10/hour'),
+            # Attempts to get a token per client IP and per email
+            'login': os.environ.get('LOGIN_RATE', '20/min'),
+            'login_email': os.environ.get('LOGIN_EMAIL_RATE', '5/min'),
+        }.items()
+    },
 }
 
+# Upper bound for the ?page_size= query param on the list endpoints
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# Maximum number of creates, updates and deletes sent together to /api/todo/bulk/
+API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', 1000))
+
+# Rows fetched per server side cursor round trip (and rendered per chunk) by the streaming responses
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+
+# Rows validated and created per `bulk_create` by the imports of /api/todo/import/ and /api/workspace/<id>/import/
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+# Workspaces (and users) with this many TODOs or more are marked as deleted and purged in the background
+# (core.deletion), `PURGE_BATCH_SIZE` TODOs per DELETE
+PURGE_THRESHOLD = int(os.environ.get('PURGE_THRESHOLD', 10000))
+PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', 5000))
+
+# Background jobs (core.jobs), run by `manage.py run_jobs`. A job is retried up to `JOB_MAX_ATTEMPTS` times,
+# `JOB_RETRY_DELAY` seconds after its first failure and twice as long after each next one. A running job
+# is claimed again by another worker when it isn't finished after `JOB_VISIBILITY_TIMEOUT` seconds. Idle
+# workers look for due jobs every `JOB_POLL_INTERVAL` seconds
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+JOB_VISIBILITY_TIMEOUT = int(os.environ.get('JOB_VISIBILITY_TIMEOUT', 600))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+
 MIDDLEWARE = [
+    # first, so it measures the whole request
+    'core.middleware.MetricsMiddleware',
+    # before the middlewares that change the body, and inside the metrics, which count its time
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -104,21 +165,131 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'TODO_backend.wsgi.application'
 
+# Serve the hot read endpoints (todo list, workspace detail and user me) with async views.
+# Enable it only when running the ASGI application (TODO_backend.asgi) with uvicorn workers.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == 'true'
+
 
 # Database
-# https://docs.djangoproject.com/en/4.0/ref/settings/#databases
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# DATABASE_URL (set by Render) takes precedence over the DB_* variables.
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after every request) and checked
+# before being reused by a new request.
+# Not under ASGI (TODO_backend.asgi sets SERVER_GATEWAY) nor with the async views: the connections opened
+# in the sync_to_async threads aren't closed with their request and leak, Django asks for 0 there (use
+# a pooler like PgBouncer to reuse connections).
+
+SERVER_GATEWAY = os.environ.get('SERVER_GATEWAY', 'wsgi')
+DB_CONN_MAX_AGE = 0 if SERVER_GATEWAY == 'asgi' or ASYNC_VIEWS else int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+if os.environ.get('DATABASE_URL'):
+    DATABASES = {
+        'default': dj_database_url.config(
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=True,
+        )
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['DB_NAME'],
+            'USER': os.environ['DB_USER'],
+            'PASSWORD': os.environ['DB_PASSWORD'],
+            'HOST': os.environ['DB_HOST'],
+            'PORT': os.environ['DB_PORT'],
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+# DB_POOL_MODE=transaction when the database is reached through a pooler in transaction mode (PgBouncer).
+# A server side cursor can't outlive its transaction there, so they are disabled and the streaming
+# responses read their rows through client side cursors instead.
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'session')
+
+if DB_POOL_MODE == 'transaction':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Local memory by default, shared between processes when REDIS_URL is set
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ['DB_NAME'],
-        'USER': os.environ['DB_USER'],
-        'PASSWORD': os.environ['DB_PASSWORD'],
-        'HOST': os.environ['DB_HOST'],
-        'PORT': os.environ['DB_PORT'],
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
     }
+    CACHES['responses'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'KEY_PREFIX': 'responses',
+    }
+
+# Cache alias of the request counters of the throttles (core.throttling). With the local memory cache every
+# process counts on its own, so a client gets up to the rate times the number of workers
+THROTTLE_CACHE = 'default'
+
+# Cache alias and lifetime (seconds) of the token -> user entries of CachedTokenAuthentication
+AUTH_TOKEN_CACHE = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+# Cache alias and lifetime (seconds) of the cached responses of the read endpoints (core.caching). The
+# entries are keyed by the versions of the workspaces they were built from, a write never serves a stale
+# response, the lifetime only bounds the memory. 0 disables the response cache
+RESPONSE_CACHE = 'responses'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Broker of the realtime workspace events (core.events). The in process broker only reaches the clients
+# connected to the same process, use Redis when running more than one worker.
+EVENT_BROKER = {
+    'BACKEND': 'core.events.InProcessBroker',
 }
 
+if os.environ.get('REDIS_URL'):
+    EVENT_BROKER = {
+        'BACKEND': 'core.events.RedisBroker',
+        'OPTIONS': {'url': os.environ['REDIS_URL']},
+    }
+
+# Seconds between the keep-alive comments of an idle event stream, seconds before a stream is closed
+# and milliseconds the client waits before reconnecting
+EVENT_STREAM_HEARTBEAT = int(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+EVENT_STREAM_MAX_AGE = int(os.environ.get('EVENT_STREAM_MAX_AGE', 300))
+EVENT_STREAM_RETRY = 1000
+
+# Max changes returned by one /api/sync/ response
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 1000))
+
+# Request metrics (core.middleware.MetricsMiddleware). /metrics answers only to the requests with an
+# "Authorization: Bearer <METRICS_TOKEN>" header, and not at all when METRICS_TOKEN is empty
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true') == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Response compression (core.middleware.CompressionMiddleware): brotli when the client accepts it and brotli
+# is installed, else gzip. Responses smaller than COMPRESSION_MIN_SIZE bytes are sent as they are, the
+# brotli quality goes from 0 to 11 (the higher ones are too slow for responses built on every request).
+# COMPRESSION=false leaves it to the reverse proxy
+COMPRESSION = os.environ.get('COMPRESSION', 'true') == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+# Fraction of the requests run under cProfile besides the ones staff users ask for, and where the profiles go
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'todo-profiles'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -163,5 +334,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.user'
 
+AUTHENTICATION_BACKENDS = ['core.backends.ModelBackend']
+
+# Hasher of the new passwords: argon2 (needs argon2-cffi), bcrypt (needs bcrypt) or pbkdf2. The hashes made
+# with the others, or with other costs, are still accepted and made again when their user logs in.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2' if importlib.util.find_spec('argon2') else 'pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Costs of the argon2 (time, memory in KiB and lanes) and bcrypt hashes
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+# Threads that hash the passwords (core.hashers). At most this many hashes run at once per process, the
+# other signups and logins wait for a free thread
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORWS_ALLOW_CREDENTIALS = True
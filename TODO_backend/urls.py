@@ -16,9 +16,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/workspace/', include('workspace.urls')),
-    path('api/todo/', include('todo.urls'))
+    path('api/todo/', include('todo.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/job/', include('job.urls')),
+    path('metrics', metrics, name='metrics')
 ]
@@ -0,0 +1,48 @@
+"""
+Benchmarks for the TODO machine API.
+
+Every benchmark is a script run with `python -m benchmarks.<name>` against the database configured
+in the settings. They seed a lot of rows and some of them migrate back and forth, so point them to a
+throwaway database. `benchmarks.api` also runs against SQLite (DATABASE_URL=sqlite:///bench.sqlite3).
+"""
+import os
+
+import django
+
+
+def setup():
+    """
+    It configures Django so the benchmark scripts can use the models outside of manage.py. The rate limits
+    are turned off unless API_THROTTLE is set, the benchmarks send many requests from one client.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TODO_backend.settings')
+    os.environ.setdefault('API_THROTTLE', 'false')
+    django.setup()
+
+
+def prepare_database():
+    """
+    It brings the schema of the configured database up to date. PostgreSQL is migrated; SQLite, which
+    can't run the PostgreSQL specific migrations, gets the tables of the current models created directly,
+    without the indexes it doesn't support.
+    """
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection, models
+
+    if connection.vendor == 'postgresql':
+        call_command('migrate', verbosity=0)
+        return
+
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_models():
+            if model._meta.db_table in existing or not model._meta.managed or model._meta.proxy:
+                continue
+
+            indexes = model._meta.indexes
+            model._meta.indexes = [index for index in indexes if type(index) is models.Index]
+            try:
+                editor.create_model(model)
+            finally:
+                model._meta.indexes = indexes
@@ -0,0 +1,243 @@
+"""
+Latency, throughput and queries per request of the main API scenarios.
+
+It seeds `--users` users x `--workspaces` workspaces x `--todos` TODOs, then sends `--requests` requests
+per scenario from `--concurrency` threads and reports p50/p95/p99 latency, requests per second and
+queries per request (read from the Server-Timing header). The requests go through the Django test client
+in this process, or to a running server with `--base-url` (which must use the same database).
+
+The response cache is turned off, so the read scenarios measure their queries and not cache hits and
+the reports compare with the ones of the commits before the cache; `--cache` turns it on. A server
+given with `--base-url` must be started with RESPONSE_CACHE_TIMEOUT=0 to measure the same.
+
+The report can be saved with `--output` and compared with the report of another commit with `--compare`.
+
+    python -m benchmarks.api [--users 10] [--workspaces 5] [--todos 100] [--requests 200] [--concurrency 1]
+                             [--scenarios list,retrieve,...] [--base-url http://localhost:8000] [--cache]
+                             [--output report.json] [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import math
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import prepare_database, setup
+
+setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+
+from rest_framework.authtoken.models import Token
+
+from benchmarks.seed import PASSWORD, seed
+
+WARMUP = 5
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class InProcessClient:
+    """
+    It sends the requests through the Django test client, with one client and connection per thread
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, data=None, token=None):
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(HTTP_HOST='localhost')
+
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        response = getattr(self.local.client, method.lower())(
+            path, json.dumps(data) if data is not None else None, content_type='application/json', **headers)
+        return response.status_code, response.get('Server-Timing', '')
+
+    def close(self):
+        connection.close()
+
+
+class HttpClient:
+    """
+    It sends the requests to a running server
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+
+        request = urllib.request.Request(
+            self.base_url + path, json.dumps(data).encode() if data is not None else None, headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers.get('Server-Timing', '')
+
+    def close(self):
+        pass
+
+
+def scenarios(users):
+    """
+    It returns the scenarios keyed by name. Each one builds the (method, path, data, token) of its
+    request number `index`.
+    """
+    def user(index):
+        return users[index % len(users)]
+
+    return {
+        'list': lambda index: ('GET', '/api/todo/', None, user(index).token),
+        'list_workspace': lambda index: (
+            'GET', f'/api/todo/?workspace={user(index).workspace}', None, user(index).token),
+        'retrieve': lambda index: ('GET', f'/api/workspace/{user(index).workspace}/', None, user(index).token),
+        'me': lambda index: ('GET', '/api/user/me/', None, user(index).token),
+        'create': lambda index: ('POST', '/api/todo/', {
+            'title': f'bench todo {index}', 'workspace': str(user(index).workspace)}, user(index).token),
+        'token': lambda index: ('POST', '/api/user/token/', {'email': user(index).email, 'password': PASSWORD}, None),
+        'signup': lambda index: ('POST', '/api/user/create/', {
+            'email': f'bench-signup-{uuid.uuid4().hex}@bench.local', 'password': PASSWORD, 'name': 'bench'}, None),
+    }
+
+
+def percentile(values, percent):
+    """
+    Nearest rank percentile of a sorted list
+    """
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def run(client, build, requests, concurrency):
+    """
+    It sends `requests` requests of a scenario and returns its report
+    """
+    def send(index):
+        method, path, data, token = build(index)
+        start = time.perf_counter()
+        status, timing = client.request(method, path, data, token)
+        duration = (time.perf_counter() - start) * 1000
+        match = QUERIES.search(timing)
+        return duration, status < 400, int(match.group(1)) if match else None
+
+    def worker(indexes):
+        try:
+            return [send(index) for index in indexes]
+        finally:
+            client.close()
+
+    for index in range(WARMUP):
+        send(index)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        chunks = executor.map(worker, [range(offset, requests, concurrency) for offset in range(concurrency)])
+        results = [result for chunk in chunks for result in chunk]
+    elapsed = time.perf_counter() - start
+
+    timings = sorted(duration for duration, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok, _ in results if not ok),
+        'p50': round(percentile(timings, 50), 2),
+        'p95': round(percentile(timings, 95), 2),
+        'p99': round(percentile(timings, 99), 2),
+        'throughput': round(requests / elapsed, 1),
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f'commit {report["commit"]}, {report["database"]}, {report["parameters"]}')
+    print(f'{"scenario":<16}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>10}{"queries":>9}{"errors":>8}')
+
+    for name, result in report['scenarios'].items():
+        print(f'{name:<16}{result["p50"]:>10}{result["p95"]:>10}{result["p99"]:>10}'
+              f'{result["throughput"]:>10}{str(result["queries"]):>9}{result["errors"]:>8}')
+
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous:
+            deltas = ''.join(
+                f'{change(result[key], previous[key]):>10}' for key in ('p50', 'p95', 'p99', 'throughput'))
+            print(f'{"  vs " + str(baseline["commit"]):<16}{deltas}')
+
+
+def change(value, previous):
+    if not previous:
+        return '-'
+    return f'{(value - previous) / previous * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--workspaces', type=int, default=5)
+    parser.add_argument('--todos', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--scenarios', default=','.join(scenarios([])))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-url')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache on')
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    args = parser.parse_args()
+
+    if not args.cache:
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+
+    prepare_database()
+    users = seed(args.users, args.workspaces, args.todos, prefix='bench-api', seed=args.seed)
+    for user in users:
+        user.token = Token.objects.get_or_create(user=user)[0].key
+        user.workspace = user.workspace_set.order_by('created', 'id').values_list('id', flat=True).first()
+
+    client = HttpClient(args.base_url) if args.base_url else InProcessClient()
+    available = scenarios(users)
+
+    report = {
+        'commit': commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'database': connection.vendor,
+        'parameters': {
+            key: getattr(args, key) for key in ('users', 'workspaces', 'todos', 'requests', 'concurrency', 'cache')},
+        'scenarios': {
+            name: run(client, available[name], args.requests, args.concurrency) for name in args.scenarios.split(',')
+        },
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
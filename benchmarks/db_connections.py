@@ -0,0 +1,60 @@
+"""
+Latency of a request's database work with and without persistent connections.
+
+Every simulated request runs the connection housekeeping Django does on request_started and
+request_finished around one small query, with CONN_MAX_AGE = 0 (a new connection per request),
+persistent connections, and persistent connections with health checks.
+
+    python -m benchmarks.db_connections [--requests 500]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup
+
+setup()
+
+from django.db import close_old_connections, connection
+
+from core.models import Todo
+
+MODES = (
+    ('new connection per request', 0, False),
+    ('persistent', None, False),
+    ('persistent + health checks', None, True),
+)
+
+
+def run(requests):
+    """
+    It runs `requests` simulated requests and returns the median and p95 latency in milliseconds
+    """
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        close_old_connections()
+        Todo.objects.filter(completed=False).exists()
+        close_old_connections()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    for name, conn_max_age, health_checks in MODES:
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+        median, p95 = run(args.requests)
+        print(f'{name:<28} p50 {median:6.2f} ms  p95 {p95:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Bytes on the wire and server CPU of a page of TODOs per response format and content coding.
+
+It seeds one user with `--todos` TODOs (1000 by default) in one workspace, then asks for all of them in
+one page of api/todo/ as JSON and as MessagePack, each sent as it is, gzipped and brotli compressed,
+through the Django test client. It reports the body size and the median CPU and wall milliseconds per
+request. The client runs in this process, so the CPU time is the one of the whole request; the response
+cache is turned off so every request serializes the page again.
+
+    python -m benchmarks.formats [--todos 1000] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks import prepare_database, setup
+
+os.environ.setdefault('RESPONSE_CACHE_TIMEOUT', '0')
+setup()
+
+from django.test import Client
+
+from rest_framework.authtoken.models import Token
+
+from benchmarks.seed import seed
+from core.compression import brotli
+from core.renderers import msgpack
+
+FORMATS = {'json': 'application/json', 'msgpack': 'application/msgpack'}
+ENCODINGS = {'identity': 'identity', 'gzip': 'gzip', 'br': 'br'}
+
+
+def measure(client, path, headers, runs):
+    """
+    It sends the request `runs` times
+
+    :return: The body size, and the median CPU and wall milliseconds per request.
+    """
+    cpu, wall = [], []
+    for _ in range(runs):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        response = client.get(path, **headers)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        wall.append((time.perf_counter() - wall_start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return len(response.content), statistics.median(cpu), statistics.median(wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--todos', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    prepare_database()
+    user, = seed(1, 1, args.todos, prefix=f'bench-formats-{args.todos}')
+    token = Token.objects.get_or_create(user=user)[0].key
+    client = Client(HTTP_HOST='localhost')
+    path = f'/api/todo/?page_size={args.todos}'
+
+    formats = {name: media_type for name, media_type in FORMATS.items() if name != 'msgpack' or msgpack}
+    encodings = {name: coding for name, coding in ENCODINGS.items() if name != 'br' or brotli}
+    if len(formats) < len(FORMATS) or len(encodings) < len(ENCODINGS):
+        print('msgpack or brotli is not installed, its rows are left out')
+
+    results = {}
+    for format_name, media_type in formats.items():
+        for encoding_name, coding in encodings.items():
+            headers = {'HTTP_AUTHORIZATION': f'Token {token}', 'HTTP_ACCEPT': media_type,
+                       'HTTP_ACCEPT_ENCODING': coding}
+            measure(client, path, headers, 2)
+            results[format_name, encoding_name] = measure(client, path, headers, args.runs)
+
+    baseline = results['json', 'identity'][0]
+    print(f'{args.todos} TODOs per page')
+    print(f'{"format":<10}{"encoding":<10}{"KiB":>9}{"ratio":>8}{"cpu ms":>9}{"wall ms":>9}')
+    for (format_name, encoding_name), (size, cpu, wall) in results.items():
+        print(f'{format_name:<10}{encoding_name:<10}{size / 1024:>9.1f}{size / baseline:>8.2f}{cpu:>9.1f}{wall:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
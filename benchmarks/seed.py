@@ -0,0 +1,77 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from core.models import User, Workspace, Todo, set_changes
+
+PASSWORD = 'benchpass123'
+BATCH_SIZE = 10000
+
+PRIORITIES = ('low', 'medium', 'high')
+STATUSES = ('pending', 'in progress', 'done')
+
+
+def email(prefix, index):
+    return f'{prefix}-{index}@bench.local'
+
+
+def seed(users, workspaces, todos, prefix='bench', seed=0):
+    """
+    It creates `users` users with `workspaces` workspaces each and `todos` TODOs per workspace.
+
+    Users that already exist are kept as they are, so running the same seed twice is cheap. All the
+    users share the password in `PASSWORD`.
+
+    :param users: The number of users
+    :param workspaces: The number of workspaces per user
+    :param todos: The number of TODOs per workspace
+    :param prefix: The prefix of the users emails
+    :param seed: The seed of the random values of the TODOs
+    :return: The list of seeded users.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    seeded = []
+
+    for index in range(users):
+        user = User.objects.filter(email=email(prefix, index)).first()
+        if user is None:
+            with transaction.atomic():
+                user = User.objects.create(
+                    email=email(prefix, index), name=f'{prefix} {index}', password=password)
+                seed_user(user, workspaces, todos, rng)
+        seeded.append(user)
+
+    return seeded
+
+
+def seed_user(user, workspaces, todos, rng):
+    """
+    It creates the workspaces and TODOs of one user in batches of `BATCH_SIZE` rows
+    """
+    user_workspaces = [Workspace(user=user, title=f'Workspace {index}') for index in range(workspaces)]
+    set_changes(user_workspaces)
+    Workspace.objects.bulk_create(user_workspaces)
+
+    batch = []
+    for workspace in user_workspaces:
+        for index in range(todos):
+            completed = rng.random() < 0.3
+            batch.append(Todo(
+                user=user,
+                workspace=workspace,
+                title=f'Todo {index}',
+                description='Lorem ipsum dolor sit amet ' * rng.randint(0, 8),
+                priority=rng.choice(PRIORITIES),
+                status='done' if completed else rng.choice(STATUSES[:2]),
+                completed=completed,
+            ))
+            if len(batch) == BATCH_SIZE:
+                set_changes(batch)
+                Todo.objects.bulk_create(batch)
+                batch = []
+
+    set_changes(batch)
+    Todo.objects.bulk_create(batch)
+    Workspace.objects.filter(user=user).reconcile_todo_counters()
@@ -0,0 +1,89 @@
+"""
+Time to read, serialize and render a list of TODOs with the model serializer and with the `.values()`
+serializer plus the orjson renderer.
+
+It seeds one user with `--todos` TODOs (10000 by default) in one workspace, then reads them all the way
+the list endpoint did before (model instances, TodoSerializer, JSONRenderer) and the way it does now
+(`.values()` rows, TODO_VALUES, FastJSONRenderer). It checks that both bodies are the same bytes and
+reports the median milliseconds of every step.
+
+    python -m benchmarks.serializers [--todos 10000] [--runs 10]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import prepare_database, setup
+
+setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.seed import seed
+from core.models import Todo
+from core.renderers import FastJSONRenderer, orjson
+from todo.serializers import TodoSerializer, TODO_VALUES
+
+ORDERING = ('created', 'id')
+
+PATHS = {
+    'model serializer': (
+        list,
+        lambda todos: TodoSerializer(todos, many=True).data,
+        JSONRenderer().render,
+    ),
+    'values serializer': (
+        lambda queryset: list(TODO_VALUES.values(queryset, *ORDERING)),
+        TODO_VALUES.serialize,
+        FastJSONRenderer().render,
+    ),
+}
+
+
+def measure(steps, queryset, runs):
+    """
+    It runs the query, serialize and render steps of a path `runs` times
+
+    :return: The median milliseconds of every step and of the whole path, and the rendered body.
+    """
+    timings = {'query': [], 'serialize': [], 'render': [], 'total': []}
+
+    for _ in range(runs):
+        value = queryset.all()
+        for name, step in zip(('query', 'serialize', 'render'), steps):
+            start = time.perf_counter()
+            value = step(value)
+            timings[name].append((time.perf_counter() - start) * 1000)
+        timings['total'].append(sum(timings[name][-1] for name in ('query', 'serialize', 'render')))
+
+    return {name: statistics.median(values) for name, values in timings.items()}, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--todos', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    prepare_database()
+    user, = seed(1, 1, args.todos, prefix=f'bench-serializers-{args.todos}')
+    queryset = Todo.objects.filter(user=user).order_by(*ORDERING)
+
+    if orjson is None:
+        print('orjson is not installed, FastJSONRenderer renders with the json module')
+
+    results = {name: measure(steps, queryset, args.runs) for name, steps in PATHS.items()}
+    bodies = {body for _, body in results.values()}
+    print(f'{args.todos} TODOs, {len(next(iter(bodies))) / 1024:.0f} KiB, same bytes: {len(bodies) == 1}')
+
+    print(f'{"path":<20}{"query ms":>10}{"serialize ms":>14}{"render ms":>11}{"total ms":>10}')
+    for name, (timings, _) in results.items():
+        print(f'{name:<20}{timings["query"]:>10.1f}{timings["serialize"]:>14.1f}'
+              f'{timings["render"]:>11.1f}{timings["total"]:>10.1f}')
+
+    baseline, optimized = (results[name][0]['total'] for name in PATHS)
+    print(f'speedup: {baseline / optimized:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
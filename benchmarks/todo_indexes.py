@@ -0,0 +1,107 @@
+"""
+Query plans and latencies of the TODO access patterns with and without the composite indexes.
+
+It seeds 100 users x 10 workspaces x 1000 TODOs (one million rows) by default, then runs the
+queries built by TodoViewSet and WorkspaceViewSet without the composite indexes of core 0008 (with the
+foreign key indexes they replaced instead) and with them again. The schema stays at the latest
+migration, only these indexes are dropped and created.
+
+    python -m benchmarks.todo_indexes [--users 100] [--workspaces 10] [--todos 1000] [--runs 20]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import prepare_database, setup
+
+setup()
+
+from django.db import connection, models
+
+from benchmarks.seed import seed
+from core.models import Todo
+
+# The indexes of core 0008, and the foreign key indexes Django had on the table before them
+TESTED = ('todo_user_ws_created_idx', 'todo_user_created_idx', 'todo_ws_created_idx', 'todo_user_pending_idx')
+REPLACED = (
+    models.Index(fields=['user'], name='bench_todo_user_idx'),
+    models.Index(fields=['workspace'], name='bench_todo_workspace_idx'),
+)
+PAGE_SIZE = 100
+
+
+def queries(user, workspace):
+    """
+    It returns the first page queries of the list and retrieve endpoints, keyed by a short name
+    """
+    ordering = ('created', 'id')
+    return {
+        'todo list': Todo.objects.filter(user=user).order_by(*ordering),
+        'todo list ?workspace=': Todo.objects.filter(user=user, workspace=workspace).order_by(*ordering),
+        'workspace retrieve': Todo.objects.filter(workspace=workspace).order_by(*ordering),
+        'pending todos': Todo.objects.filter(user=user, completed=False).order_by(*ordering),
+    }
+
+
+def swap_indexes(remove, add):
+    with connection.schema_editor() as editor:
+        for index in remove:
+            editor.remove_index(Todo, index)
+        for index in add:
+            editor.add_index(Todo, index)
+
+
+def measure(querysets, runs):
+    """
+    It runs every query `runs` times and returns its plan and its median latency in milliseconds
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE core_todo')
+
+    results = {}
+    for name, queryset in querysets.items():
+        page = queryset[:PAGE_SIZE]
+        plan = page.explain(analyze=True)
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(page.all())
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--workspaces', type=int, default=10)
+    parser.add_argument('--todos', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    prepare_database()
+    users = seed(args.users, args.workspaces, args.todos, prefix='bench-indexes')
+    user = users[len(users) // 2]
+    workspace = user.workspace_set.first()
+    print(f'{Todo.objects.count()} TODOs in the table')
+
+    tested = [index for index in Todo._meta.indexes if index.name in TESTED]
+    swap_indexes(tested, REPLACED)
+    try:
+        before = measure(queries(user, workspace), args.runs)
+    finally:
+        swap_indexes(REPLACED, tested)
+    after = measure(queries(user, workspace), args.runs)
+
+    for name in before:
+        print(f'\n=== {name}: {before[name][1]:.2f} ms -> {after[name][1]:.2f} ms')
+        print('--- before')
+        print(before[name][0])
+        print('--- after')
+        print(after[name][0])
+
+
+if __name__ == '__main__':
+    main()
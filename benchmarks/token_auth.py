@@ -0,0 +1,74 @@
+"""
+Queries and latency per request with the plain TokenAuthentication and with CachedTokenAuthentication.
+
+It sends the same token authenticated GET requests to the todo list, the workspace list and the `me`
+endpoint with both authentication classes and prints the mean queries and the median latency.
+
+    python -m benchmarks.token_auth [--requests 200]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup
+
+setup()
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from benchmarks.seed import seed
+from core.authentication import CachedTokenAuthentication
+from todo.views import TodoViewSet
+from user.views import ManageUserView
+from workspace.views import WorkspaceViewSet
+
+VIEWS = (TodoViewSet, WorkspaceViewSet, ManageUserView)
+URLS = ('todo:todo-list', 'workspace:workspace-list', 'user:me')
+
+
+def run(client, url, requests):
+    """
+    It sends `requests` GET requests to the url and returns the mean queries and median milliseconds
+    """
+    queries = []
+    timings = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+        queries.append(len(context.captured_queries))
+
+    return statistics.mean(queries), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    user, = seed(1, 3, 20, prefix='bench-auth')
+    token, _ = Token.objects.get_or_create(user=user)
+    client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    for authentication in (TokenAuthentication, CachedTokenAuthentication):
+        cache.clear()
+        for view in VIEWS:
+            view.authentication_classes = (authentication,)
+
+        print(f'=== {authentication.__name__}')
+        for name in URLS:
+            queries, latency = run(client, reverse(name), args.requests)
+            print(f'{name:<26} {queries:5.2f} queries/request {latency:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+
+def token_cache_key(key):
+    return f'auth-token:{key}'
+
+
+def get_token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that keeps the token and its user in the cache.
+
+    Only the first request of a token in `AUTH_TOKEN_CACHE_TIMEOUT` seconds queries the
+    authtoken_token and core_user tables. The cached entry is dropped when the token is deleted or
+    its user is saved (see core.signals), but with a local memory cache that only happens in the
+    process that made the change, so keep the timeout short unless the cache is shared.
+
+    `aauthenticate` does the same without blocking the event loop, for the async views.
+    """
+
+    def get_key(self, request):
+        """
+        It reads the token key from the "Authorization: Token <key>" header
+
+        :param request: The request object
+        :return: The token key, or None if the request doesn't use token authentication.
+        """
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _('Invalid token header. No credentials provided.')
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _('Invalid token header. Token string should not contain spaces.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _('Invalid token header. Token string should not contain invalid characters.')
+            raise exceptions.AuthenticationFailed(msg)
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        if key is None:
+            return None
+
+        return self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request):
+        key = self.get_key(request)
+        if key is None:
+            return None
+
+        return await self.aauthenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        """
+        It returns the user and the token of the key, from the cache when possible
+
+        :param key: The token key sent in the Authorization header
+        :return: A (user, token) tuple.
+        """
+        cache = get_token_cache()
+        cache_key = token_cache_key(key)
+
+        token = cache.get(cache_key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        return self.check_token(token)
+
+    async def aauthenticate_credentials(self, key):
+        """
+        Async version of `authenticate_credentials`, reading the token with the async ORM
+        """
+        cache = get_token_cache()
+        cache_key = token_cache_key(key)
+
+        token = await cache.aget(cache_key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related('user').aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            self.check_token(token)
+            await cache.aset(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        return self.check_token(token)
+
+    def check_token(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+class QueryTokenAuthentication(CachedTokenAuthentication):
+    """
+    CachedTokenAuthentication that also takes the token from the `token` query param, for the endpoints
+    opened by the browser EventSource, which can't send an Authorization header
+    """
+
+    def get_key(self, request):
+        key = super().get_key(request)
+        if key is None:
+            key = request.query_params.get('token') or None
+        return key
+
+
+def invalidate_token(key):
+    """
+    It removes a token from the cache, so the next request with it reads the database again
+    """
+    get_token_cache().delete(token_cache_key(key))
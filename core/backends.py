@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import backends, get_backends, get_user_model, user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.views.decorators.debug import sensitive_variables
+
+from core import hashers
+
+UserModel = get_user_model()
+
+
+class ModelBackend(backends.ModelBackend):
+    """
+    ModelBackend with an `aauthenticate` method, which Django 4.2 does not have yet. The password is
+    checked in the password hashing pool (core.hashers), so a slow hash blocks neither the event loop nor
+    the thread the async ORM runs its queries in.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = await UserModel._default_manager.aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Hash the password anyway, so a missing user takes as long as a wrong password (#20760)
+            await hashers.amake_password(password)
+            return None
+
+        if await user.acheck_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+@sensitive_variables('credentials')
+async def aauthenticate(request=None, **credentials):
+    """
+    Async version of django.contrib.auth.authenticate. The backends without `aauthenticate` run in a
+    worker thread.
+
+    :param request: The request object
+    :param credentials: The credentials, like `username` and `password`
+    :return: The user, or None if no backend accepted the credentials.
+    """
+    for backend in get_backends():
+        try:
+            if hasattr(backend, 'aauthenticate'):
+                user = await backend.aauthenticate(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            break
+
+        if user is not None:
+            user.backend = f'{backend.__module__}.{backend.__class__.__qualname__}'
+            return user
+
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__, credentials={key: value for key, value in credentials.items() if key != 'password'},
+        request=request)
+    return None
@@ -0,0 +1,91 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import metrics
+from core.models import Workspace
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE]
+
+
+def is_enabled():
+    return bool(settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def user_versions(user):
+    """
+    It returns the (id, version) of every workspace of the user. A workspace version is bumped by every
+    write to the workspace or its TODOs, and a created or deleted workspace adds or removes a pair, so
+    the list changes with any write to the data of the user.
+    """
+    return list(Workspace.objects.filter(user=user).order_by('id').values_list('id', 'version'))
+
+
+async def auser_versions(user):
+    return [row async for row in Workspace.objects.filter(user=user).order_by('id').values_list('id', 'version')]
+
+
+def response_key(request, scope, versions):
+    """
+    It builds the cache key of a response. The key has the user, so an entry is never shared between
+    users, and the versions of the data it was built from, so a write makes the entries of the
+    workspaces it touched unreachable and leaves the rest alone. The URL (query string and host of the
+    pagination links) and the negotiated format are part of it too.
+
+    :param request: The DRF request
+    :param scope: The name of the endpoint
+    :param versions: The versions of the workspaces the response is built from
+    :return: The cache key.
+    """
+    digest = hashlib.md5(':'.join((
+        repr(versions),
+        request.accepted_media_type or '',
+        request.build_absolute_uri(),
+    )).encode()).hexdigest()
+    return f'response:{scope}:{request.user.pk}:{digest}'
+
+
+def cached_data(request, scope, versions, build):
+    """
+    It returns the data of a response from the `RESPONSE_CACHE` cache, or builds it and caches it.
+
+    The versions must be read before the data is built, so a cached response is never older than the
+    versions in its key.
+
+    :param request: The DRF request
+    :param scope: The name of the endpoint, the hits and misses are counted by scope
+    :param versions: The versions of the workspaces the response is built from
+    :param build: It builds the data of the response
+    :return: The data of the response.
+    """
+    if not is_enabled():
+        return build()
+
+    key = response_key(request, scope, versions)
+    data = get_cache().get(key)
+    metrics.record_cache(scope, data is not None)
+
+    if data is None:
+        data = build()
+        get_cache().set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+async def acached_data(request, scope, versions, build):
+    """
+    Async version of `cached_data`, `build` is a coroutine function
+    """
+    if not is_enabled():
+        return await build()
+
+    key = response_key(request, scope, versions)
+    data = await get_cache().aget(key)
+    metrics.record_cache(scope, data is not None)
+
+    if data is None:
+        data = await build()
+        await get_cache().aset(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,117 @@
+import zlib
+
+from django.conf import settings
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Bytes of random gzip header Django adds to mitigate BREACH, like django.middleware.gzip.GZipMiddleware
+MAX_RANDOM_BYTES = 100
+
+
+def accepted_encodings(header):
+    """
+    It returns the content codings of an Accept-Encoding header, without the ones refused with `q=0`
+
+    :param header: The Accept-Encoding header
+    :return: The set of the lower cased coding names.
+    """
+    encodings = set()
+    for coding in header.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def get_encoding(header):
+    """
+    It picks the coding of a response: brotli, which is smaller for the same CPU, when the client accepts
+    it and the brotli package is installed, otherwise gzip
+
+    :param header: The Accept-Encoding header of the request
+    :return: 'br', 'gzip' or None when the client accepts neither.
+    """
+    encodings = accepted_encodings(header)
+    if brotli is not None and 'br' in encodings:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+
+def compress(encoding, content):
+    """
+    It compresses a whole body
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+class GzipCompressor:
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def get_compressor(encoding):
+    return BrotliCompressor() if encoding == 'br' else GzipCompressor()
+
+
+def compress_stream(encoding, chunks):
+    """
+    It compresses a streamed body. Every chunk is flushed, so the client gets it as soon as it is written
+    instead of when the compressor buffer is full.
+
+    :param encoding: 'br' or 'gzip'
+    :param chunks: The chunks of the body
+    :return: An iterator of the compressed chunks.
+    """
+    compressor = get_compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(encoding, chunks):
+    """
+    Async version of `compress_stream`, for the responses streamed by the async views
+    """
+    compressor = get_compressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def workspace_etag(request, workspace):
+    """
+    It builds the ETag of a response made from a workspace and its TODOs. It changes with the version
+    of the workspace and with anything of the request that changes the payload: the user, the query
+    string and the negotiated format
+
+    :param request: The DRF request
+    :param workspace: The workspace of the response
+    :return: A quoted strong ETag.
+    """
+    key = ':'.join((
+        str(workspace.pk),
+        str(workspace.version),
+        str(request.user.pk),
+        request.accepted_media_type or '',
+        request.GET.urlencode(),
+    ))
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def not_modified(request, workspace):
+    """
+    It compares the If-None-Match header with the ETag of the workspace, before any TODO is read.
+
+    If-Modified-Since is not used: Last-Modified has whole seconds, so a write in the same second as
+    the previous read would get a stale 304. The version in the ETag changes with every write.
+
+    :param request: The DRF request
+    :param workspace: The workspace of the response
+    :return: A 304 (or 412) response if the client copy is still valid, otherwise None.
+    """
+    response = get_conditional_response(request, etag=workspace_etag(request, workspace))
+    if response is not None:
+        set_validators(response, request, workspace)
+    return response
+
+
+def set_validators(response, request, workspace):
+    """
+    It adds the ETag and Last-Modified headers of the workspace to the response
+    """
+    response['ETag'] = workspace_etag(request, workspace)
+    response['Last-Modified'] = http_date(workspace.modified.timestamp())
+    return response
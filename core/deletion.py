@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core import jobs
+from core.models import Todo, Tombstone, User, Workspace
+
+
+def delete_in_batches(queryset):
+    """
+    It deletes the rows of the queryset `PURGE_BATCH_SIZE` rows per DELETE, each committed on its own,
+    so no statement runs for long or holds the locks of every row at once
+
+    :param queryset: The rows to delete
+    :return: The number of rows deleted.
+    """
+    batch = queryset.model._base_manager.filter(
+        pk__in=queryset.order_by().values('pk')[:settings.PURGE_BATCH_SIZE])
+
+    deleted = 0
+    while True:
+        count, _ = batch.delete()
+        if not count:
+            return deleted
+        deleted += count
+
+
+@jobs.task
+def purge_workspace(pk):
+    """
+    It deletes the TODOs of a workspace marked as deleted in batches, then the workspace
+    """
+    delete_in_batches(Todo.objects.filter(workspace=pk))
+    Workspace.all_objects.filter(pk=pk).delete()
+
+
+@jobs.task
+def purge_user(pk):
+    """
+    It deletes the workspaces, TODOs and tombstones of a user marked as deleted in batches, then the user
+    """
+    for workspace_pk in Workspace.all_objects.filter(user=pk).values_list('pk', flat=True):
+        purge_workspace(workspace_pk)
+    delete_in_batches(Tombstone.objects.filter(user=pk))
+    User.objects.filter(pk=pk).delete()
+
+
+def purge_deleted():
+    """
+    It purges every workspace and user marked as deleted, the ones whose background purge was
+    interrupted, like a job that failed every attempt
+
+    :return: The number of workspaces and of users purged.
+    """
+    users = list(User.objects.filter(deleted__isnull=False).values_list('pk', flat=True))
+    for pk in users:
+        purge_user(pk)
+
+    workspaces = list(Workspace.all_objects.filter(deleted__isnull=False).values_list('pk', flat=True))
+    for pk in workspaces:
+        purge_workspace(pk)
+
+    return len(workspaces), len(users)
+
+
+def delete_workspace(workspace):
+    """
+    It deletes a workspace and its TODOs and records its tombstone.
+
+    The TODOs are deleted with one DELETE (they have no delete signals, so Django doesn't load them),
+    in the request. A workspace with `PURGE_THRESHOLD` TODOs or more, by its counter, is only marked as
+    deleted, which hides it and its TODOs at once, and purged in batches by a background job.
+
+    :param workspace: The workspace to delete
+    :return: The purge job, or None when the workspace was deleted at once.
+    """
+    with transaction.atomic():
+        Tombstone.objects.record(workspace.user_id, [workspace])
+
+        if workspace.todos_total < settings.PURGE_THRESHOLD:
+            workspace.delete()
+            return None
+
+        Workspace.objects.filter(pk=workspace.pk).mark_deleted()
+        return jobs.enqueue(purge_workspace, workspace.pk, user_id=workspace.user_id)
+
+
+def delete_user(user):
+    """
+    It deletes a user and everything they own. A user with `PURGE_THRESHOLD` TODOs or more is
+    deactivated, so their token and password stop working, their workspaces are marked as deleted and
+    they are purged by a background job.
+
+    :param user: The user to delete
+    :return: The purge job, or None when the user was deleted at once.
+    """
+    todos = Workspace.all_objects.filter(user=user).aggregate(total=Sum('todos_total'))['total'] or 0
+    if todos < settings.PURGE_THRESHOLD:
+        user.delete()
+        return None
+
+    with transaction.atomic():
+        user.is_active = False
+        user.deleted = timezone.now()
+        user.save(update_fields=['is_active', 'deleted'])
+        Workspace.objects.filter(user=user).mark_deleted()
+        return jobs.enqueue(purge_user, user.pk, user_id=user.pk)
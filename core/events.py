@@ -0,0 +1,159 @@
+import asyncio
+import importlib.util
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from core.streaming import dumps
+
+
+class InProcessBroker:
+    """
+    Publish/subscribe broker that only reaches the subscribers of the current process.
+
+    `publish` can be called from any thread (the sync views run in worker threads under ASGI), the
+    events are handed to the event loop of every subscriber. A subscriber that doesn't keep up loses
+    the events that don't fit in its queue.
+    """
+
+    def __init__(self, queue_size=1000, **options):
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers[channel])
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self.offer, queue, event)
+
+    @staticmethod
+    def offer(queue, event):
+        if not queue.full():
+            queue.put_nowait(event)
+
+    async def subscribe(self, channel, timeout):
+        """
+        It yields None once subscribed, then the events published to the channel, and None again every
+        `timeout` seconds without events
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self.lock:
+            self.subscribers[channel].add(subscriber)
+
+        try:
+            yield None
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self.lock:
+                self.subscribers[channel].discard(subscriber)
+
+
+class RedisBroker:
+    """
+    Publish/subscribe broker on Redis (or a Redis compatible server), shared by every process.
+    It needs the `redis` package.
+    """
+
+    def __init__(self, url, **options):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, event):
+        self.client.publish(channel, dumps(event))
+
+    async def subscribe(self, channel, timeout):
+        """
+        It yields None once subscribed, then the events published to the channel, and None again every
+        `timeout` seconds without events
+        """
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+
+        try:
+            yield None
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                yield json.loads(message['data']) if message else None
+        finally:
+            await pubsub.unsubscribe(channel)
+            await client.close()
+
+
+_broker = None
+
+
+def get_broker():
+    """
+    It returns the broker configured in `EVENT_BROKER`, created on first use
+    """
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENT_BROKER['BACKEND'])(**settings.EVENT_BROKER.get('OPTIONS', {}))
+    return _broker
+
+
+def check_broker():
+    """
+    It fails at startup when `EVENT_BROKER` is Redis (`REDIS_URL` is set) and the redis package is not
+    installed, instead of on every publish and subscription
+    """
+    if settings.EVENT_BROKER['BACKEND'] == 'core.events.RedisBroker' and importlib.util.find_spec('redis') is None:
+        raise ImproperlyConfigured(
+            'The Redis event broker needs the redis package, install the requirements or unset REDIS_URL')
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'EVENT_BROKER':
+        _broker = None
+
+
+def workspace_channel(workspace_id):
+    return f'workspace:{workspace_id}'
+
+
+def format_event(event):
+    """
+    It returns the event as a Server-Sent Events message, named after its `event` key
+    """
+    return f'event: {event["event"]}\ndata: {dumps(event)}\n\n'
+
+
+async def event_stream(channel):
+    """
+    It yields the Server-Sent Events of a channel: a comment when subscribed and when idle, so proxies
+    keep the connection open, and a message per event.
+
+    The stream ends after `EVENT_STREAM_MAX_AGE` seconds and the client reconnects on its own, because
+    the server doesn't notice a client that went away until it writes to it.
+    """
+    deadline = time.monotonic() + settings.EVENT_STREAM_MAX_AGE
+    yield f'retry: {settings.EVENT_STREAM_RETRY}\n\n'
+
+    events = get_broker().subscribe(channel, settings.EVENT_STREAM_HEARTBEAT)
+    try:
+        async for event in events:
+            yield ': ping\n\n' if event is None else format_event(event)
+            if time.monotonic() >= deadline:
+                return
+    finally:
+        await events.aclose()
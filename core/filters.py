@@ -0,0 +1,44 @@
+from rest_framework.filters import OrderingFilter
+
+
+def annotation_name(field):
+    """
+    It returns the name of the annotation a field of `ordering_annotations` is sorted by
+    """
+    return f'{field}_order'
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that always ends the ordering with the view's default ordering.
+
+    The cursor pagination needs a total order to move between pages, so `?ordering=priority` is
+    applied as `priority, created, id`.
+
+    The fields of the view's `ordering_annotations` are sorted by their expression instead of their
+    column, e.g. the priorities by their rank rather than alphabetically. The expression is annotated
+    as `<field>_order`, which is what the pagination reads its position from.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        annotations = self.get_annotations(view)
+        if annotations:
+            queryset = queryset.annotate(**{
+                annotation_name(field): expression for field, expression in annotations.items()})
+        return super().filter_queryset(request, queryset, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        fields = {field.lstrip('-') for field in ordering}
+        ordering += tuple(
+            field for field in self.get_default_ordering(view) if field.lstrip('-') not in fields
+        )
+
+        annotations = self.get_annotations(view)
+        return tuple(
+            field.replace(name, annotation_name(name)) if name in annotations else field
+            for field in ordering for name in (field.lstrip('-'),)
+        )
+
+    def get_annotations(self, view):
+        return getattr(view, 'ordering_annotations', None) or {}
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2 with the costs of the `ARGON2_*` settings. The Django defaults take 100 MiB and 8 lanes per
+    hash, too much for a login burst on a small server.
+    """
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    bcrypt with the `BCRYPT_ROUNDS` setting as its cost
+    """
+    rounds = settings.BCRYPT_ROUNDS
+
+
+def get_executor():
+    """
+    It returns the pool of `PASSWORD_HASHING_WORKERS` threads the passwords are hashed in. The hashers
+    release the GIL while they hash, so the threads hash in parallel and the request threads and the
+    event loop keep running meanwhile.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.PASSWORD_HASHING_WORKERS, thread_name_prefix='password-hashing')
+        return _executor
+
+
+def run(func, *args):
+    """
+    It runs a hashing function in the pool and waits for its result. However many requests hash at once,
+    at most `PASSWORD_HASHING_WORKERS` hashes use the CPU, the rest wait for a free thread.
+    """
+    return get_executor().submit(func, *args).result()
+
+
+async def arun(func, *args):
+    """
+    Async version of `run`, the event loop keeps serving other requests while the hash runs
+    """
+    return await asyncio.wrap_future(get_executor().submit(func, *args))
+
+
+def must_update(encoded):
+    """
+    It tells whether a password hash was made with another hasher than the preferred one, or with other
+    costs, and should be made again when its password is known. It does not hash anything.
+    """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    preferred = hashers.get_hasher()
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def make_password(password):
+    """
+    django.contrib.auth.hashers.make_password run in the pool
+    """
+    return run(hashers.make_password, password)
+
+
+async def amake_password(password):
+    return await arun(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    django.contrib.auth.hashers.check_password run in the pool. The setter, which saves the upgraded
+    hash, runs in the calling thread.
+
+    :param password: The raw password
+    :param encoded: The stored hash
+    :param setter: It is called with the raw password when it is correct and its hash must be updated
+    :return: Whether the password is correct.
+    """
+    is_correct = run(hashers.check_password, password, encoded)
+    if setter and is_correct and must_update(encoded):
+        setter(password)
+    return is_correct
+
+
+async def acheck_password(password, encoded):
+    """
+    Async version of `check_password`, without the setter
+    """
+    return await arun(hashers.check_password, password, encoded)
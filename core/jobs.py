@@ -0,0 +1,133 @@
+import datetime
+import logging
+import time
+import traceback
+from importlib import import_module
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+# The registered tasks, by name
+TASKS = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """
+    It registers a function as a task the workers can run, `@task` or `@task(max_attempts=...)`.
+
+    A job can run more than once: it is retried when it raises, and run again when its worker doesn't
+    finish it within `JOB_VISIBILITY_TIMEOUT`, so a task must be safe to repeat. Its arguments and its
+    result are stored as JSON.
+
+    :param func: The task function, a module level function
+    :param max_attempts: The runs of a job before it fails, `JOB_MAX_ATTEMPTS` by default
+    :return: The function.
+    """
+    def register(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(func, *args, user_id=None):
+    """
+    It queues a run of a task. The job is saved in the current transaction, so it only runs when the
+    transaction commits, and it sees everything the transaction wrote.
+
+    :param func: The task
+    :param args: The arguments of the task, JSON serializable (UUIDs and dates are stored as strings)
+    :param user_id: The user who can follow the job at /api/job/<id>/
+    :return: The job.
+    """
+    name = getattr(func, 'task_name', None)
+    if TASKS.get(name) is not func:
+        raise ImproperlyConfigured(f'{func.__qualname__} is not a task, decorate it with core.jobs.task')
+
+    return Job.objects.create(
+        name=name, args=list(args), user_id=user_id, max_attempts=func.max_attempts or settings.JOB_MAX_ATTEMPTS)
+
+
+def get_task(name):
+    """
+    It returns the task of a job, importing its module when the worker didn't import it yet
+    """
+    if name not in TASKS:
+        try:
+            import_module(name.rpartition('.')[0])
+        except ImportError:
+            pass
+    return TASKS.get(name)
+
+
+def finish(job, **fields):
+    # A job whose visibility timeout expired may have been claimed again, only the last claim finishes it
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts).update(
+        locked_until=None, updated=timezone.now(), **fields)
+
+
+def execute(job):
+    """
+    It runs a claimed job and records its result. A job that raises is queued again after
+    `JOB_RETRY_DELAY` seconds, doubled on every attempt, and fails with the traceback as its error once it
+    ran `max_attempts` times.
+
+    :param job: The job, as returned by `Job.objects.claim`
+    :return: Whether the job succeeded.
+    """
+    func = get_task(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.name}')
+        result = func(*job.args)
+    except Exception:
+        logger.exception('Job %s %s failed (attempt %s of %s)', job.pk, job.name, job.attempts, job.max_attempts)
+        error = traceback.format_exc()
+
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            finish(job, status=Job.QUEUED, error=error, run_at=timezone.now() + datetime.timedelta(seconds=delay))
+        else:
+            finish(job, status=Job.FAILED, error=error)
+        return False
+
+    finish(job, status=Job.DONE, result=result, error='')
+    return True
+
+
+def work(once=False, stop=None):
+    """
+    It runs the due jobs one after the other, and waits `JOB_POLL_INTERVAL` seconds when there are none.
+
+    :param once: Return when no job is due instead of waiting for more
+    :param stop: A threading.Event that stops the loop once the current job finishes
+    :return: The number of jobs run.
+    """
+    count = 0
+    while stop is None or not stop.is_set():
+        # Like at the end of a request, drop the connection when it broke or is too old. Not inside a
+        # transaction, which is where the tests run the jobs
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+        job = Job.objects.claim(settings.JOB_VISIBILITY_TIMEOUT)
+        if job is None:
+            if once:
+                break
+            if stop is not None:
+                stop.wait(settings.JOB_POLL_INTERVAL)
+            else:
+                time.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+
+        execute(job)
+        count += 1
+    return count
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import deletion
+
+
+class Command(BaseCommand):
+    help = 'It purges the workspaces and users marked as deleted whose background purge did not finish'
+
+    def handle(self, *args, **options):
+        workspaces, users = deletion.purge_deleted()
+        self.stdout.write(self.style.SUCCESS(f'{workspaces} workspaces and {users} users purged'))
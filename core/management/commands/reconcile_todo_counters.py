@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs, tasks
+from core.models import Workspace, TODO_COUNTERS
+
+
+class Command(BaseCommand):
+    help = 'It recounts the TODOs of every workspace and fixes the TODO counters that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the drifted workspaces')
+        parser.add_argument('--background', action='store_true', help='Queue a job that reconciles them')
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = jobs.enqueue(tasks.reconcile_todo_counters)
+            self.stdout.write(self.style.SUCCESS(f'Job {job.pk} queued'))
+            return
+
+        drifted = list(Workspace.objects.drifted())
+
+        for workspace in drifted:
+            differences = ', '.join(
+                f'{field} {getattr(workspace, field)} -> {getattr(workspace, f"counted_{field}")}'
+                for field in TODO_COUNTERS
+                if getattr(workspace, field) != getattr(workspace, f'counted_{field}')
+            )
+            self.stdout.write(f'{workspace.pk}: {differences}')
+
+        if not options['dry_run'] and drifted:
+            Workspace.objects.filter(pk__in=[workspace.pk for workspace in drifted]).reconcile_todo_counters()
+
+        action = 'drifted' if options['dry_run'] else 'reconciled'
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} workspaces {action}'))
@@ -0,0 +1,51 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def run_worker():
+    """
+    It runs jobs until the process gets SIGTERM or SIGINT, then it finishes the current job and exits
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    jobs.work(stop=stop)
+
+
+class Command(BaseCommand):
+    help = 'It runs the background jobs in worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--once', action='store_true', help='Run the due jobs and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = jobs.work(once=True)
+            self.stdout.write(self.style.SUCCESS(f'{count} jobs run'))
+            return
+
+        # The workers open their own connections, a forked one would be shared
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=run_worker, name=f'jobs-{index}') for index in range(options['processes'])]
+
+        def stop(*args):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'{len(workers)} workers running')
+
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,200 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RequestMetrics:
+    """
+    What a request spent in the database and serializing, filled in while the request runs
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        # hit or miss when the response cache was looked up (core.caching)
+        self.cache = None
+
+
+current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that adds the query to the metrics of the current request, if any.
+    It is installed on every connection when it is opened (see core.signals).
+    """
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def serializing():
+    """
+    It adds the time spent in the block to the serialize time of the current request, except the time of
+    the queries run meanwhile (a lazy queryset or a related field), which is database time. Nested blocks
+    are only counted once.
+    """
+    metrics = current.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+
+    metrics.serializing = True
+    start = time.perf_counter()
+    db_start = metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - start - (metrics.db_time - db_start)
+        metrics.serializing = False
+
+
+class Histogram:
+    """
+    Prometheus histogram kept in the memory of the process
+    """
+
+    def __init__(self, name, documentation, buckets, labels):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.setdefault(
+                label_values, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                labels = ','.join(
+                    f'{label}="{escape(value)}"' for label, value in zip(self.labels, label_values))
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{labels}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{labels}}} {series["count"]}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+class Counter:
+    """
+    Prometheus counter kept in the memory of the process
+    """
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self.lock:
+            self.series[label_values] = self.series.get(label_values, 0) + 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for label_values, value in sorted(self.series.items()):
+                labels = ','.join(
+                    f'{label}="{escape(value)}"' for label, value in zip(self.labels, label_values))
+                lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to build the response.', SECONDS, ('route', 'method', 'status'))
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request.', QUERIES, ('route', 'method'))
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request.', SECONDS,
+    ('route', 'method'))
+REQUEST_SERIALIZE_DURATION = Histogram(
+    'http_request_serialize_duration_seconds', 'Time spent in serializers per request.', SECONDS,
+    ('route', 'method'))
+
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION, REQUEST_SERIALIZE_DURATION)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    'response_cache_requests_total', 'Lookups of the response cache.', ('scope', 'result'))
+
+COUNTERS = (RESPONSE_CACHE_REQUESTS,)
+
+
+def record_cache(scope, hit):
+    """
+    It counts a lookup of the response cache, and keeps its result for the Server-Timing header
+    """
+    result = 'hit' if hit else 'miss'
+    RESPONSE_CACHE_REQUESTS.inc(scope, result)
+
+    metrics = current.get()
+    if metrics is not None:
+        metrics.cache = result
+
+
+def observe(route, method, status, duration, metrics):
+    """
+    It records a finished request in the histograms
+    """
+    REQUEST_DURATION.observe(duration, route, method, str(status))
+    REQUEST_QUERIES.observe(metrics.queries, route, method)
+    REQUEST_DB_DURATION.observe(metrics.db_time, route, method)
+    REQUEST_SERIALIZE_DURATION.observe(metrics.serialize_time, route, method)
+
+
+def render():
+    """
+    It returns every histogram and counter in the Prometheus text format
+    """
+    return '\n'.join(line for metric in (*HISTOGRAMS, *COUNTERS) for line in metric.render()) + '\n'
+
+
+def server_timing(duration, metrics):
+    """
+    It returns the Server-Timing header value of a request
+    """
+    entries = [
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+        f'total;dur={duration * 1000:.1f}',
+    ]
+    if metrics.cache is not None:
+        entries.append(f'cache;desc="{metrics.cache}"')
+    return ', '.join(entries)
@@ -0,0 +1,176 @@
+import cProfile
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from rest_framework import exceptions
+
+from core import compression, metrics
+from core.authentication import CachedTokenAuthentication
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+# Sent as they are: the events must reach the client one by one, as soon as they are written
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+class MetricsMiddleware:
+    """
+    It records the database queries, database time, serializer time and latency of every request in the
+    /metrics histograms, by route name, and returns them in a `Server-Timing` header.
+
+    A request is also run under cProfile when it sends an `X-Profile: 1` header with the token of a staff
+    user, or at random with a `PROFILE_SAMPLE_RATE` probability. The profile is written to `PROFILE_DIR`
+    and its file name returned in the `X-Profile` response header. Under ASGI a profile also sees the
+    other requests served by the event loop meanwhile.
+
+    A streamed response is measured until its headers are ready, not until its last byte is sent.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = self.is_sampled() or (self.asks_profile(request) and self.is_staff(self.authenticate(request)))
+        request_metrics, token, profiler, start = self.start(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+            if profiler is not None:
+                profiler.disable()
+
+        return self.finish(request, response, request_metrics, profiler, start)
+
+    async def __acall__(self, request):
+        profile = self.is_sampled() or (
+            self.asks_profile(request) and self.is_staff(await self.aauthenticate(request)))
+        request_metrics, token, profiler, start = self.start(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+            if profiler is not None:
+                profiler.disable()
+
+        return self.finish(request, response, request_metrics, profiler, start)
+
+    def start(self, profile):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+
+        profiler = None
+        if profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another request of the same thread is being profiled
+                profiler = None
+
+        return request_metrics, token, profiler, time.perf_counter()
+
+    def finish(self, request, response, request_metrics, profiler, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+
+        metrics.observe(route, request.method, response.status_code, duration, request_metrics)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(duration, request_metrics)
+
+        if profiler is not None:
+            response['X-Profile'] = self.save_profile(profiler, route)
+        return response
+
+    def is_sampled(self):
+        return bool(settings.PROFILE_SAMPLE_RATE) and random.random() < settings.PROFILE_SAMPLE_RATE
+
+    def asks_profile(self, request):
+        return request.META.get(PROFILE_HEADER) == '1'
+
+    def authenticate(self, request):
+        """
+        It returns the (user, token) of the request token, this middleware runs before the views
+        authenticate the request
+        """
+        try:
+            return CachedTokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+
+    async def aauthenticate(self, request):
+        try:
+            return await CachedTokenAuthentication().aauthenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+
+    def is_staff(self, user_auth_tuple):
+        return user_auth_tuple is not None and user_auth_tuple[0].is_staff
+
+    def save_profile(self, profiler, route):
+        """
+        It writes the profile to `PROFILE_DIR` and returns its file name
+        """
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        name = f'{route.replace(":", "-")}-{time.time_ns()}.prof'
+        profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name))
+        return name
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    It compresses the responses with brotli or gzip, depending on the Accept-Encoding of the request (see
+    core.compression.get_encoding). A page of TODOs repeats the same keys and values, it gets several
+    times smaller.
+
+    Responses smaller than `COMPRESSION_MIN_SIZE` bytes aren't worth the CPU and are sent as they are,
+    as are the event streams. Streamed responses (the exports, `?stream=true`) are compressed a chunk at
+    a time. Like django.middleware.gzip.GZipMiddleware, a strong ETag is made weak, since the
+    compressed body isn't the same bytes, which If-None-Match still matches.
+    """
+
+    def process_response(self, request, response):
+        if not settings.COMPRESSION or response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').split(';')[0].strip() in UNCOMPRESSED_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.get_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(encoding, response.streaming_content)
+            else:
+                response.streaming_content = compression.compress_stream(encoding, response.streaming_content)
+            # The compressed size is only known once it is sent
+            del response.headers['Content-Length']
+        else:
+            content = compression.compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f'W/{etag}'
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,20 @@
+# Generated by Django 4.0.6 on 2026-10-18 08:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_user_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.6 on 2026-10-18 08:07
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently so the todo table is not locked while they are created
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_workspace_created'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['user', 'workspace', 'created'], name='todo_user_ws_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['user', 'created'], name='todo_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['workspace', 'created'], name='todo_ws_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', 'created'], name='todo_user_pending_idx'),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='workspace',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.workspace'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.0.6 on 2026-10-18 08:08
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_todo_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['user', 'status'], name='todo_user_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['user', 'priority'], name='todo_user_priority_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='todo',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'description', config='english'), name='todo_search_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_todo_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
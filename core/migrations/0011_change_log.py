@@ -0,0 +1,67 @@
+# Generated by Django 4.2.16 on 2026-10-18 08:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The existing rows get their positions in the change log of their user, workspaces first and then
+# TODOs, each by creation date, so the first sync of a client returns a workspace before its TODOs
+NUMBER_CHANGES = """
+WITH numbered AS (
+    SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY created, id) AS change
+    FROM core_workspace
+)
+UPDATE core_workspace SET change = numbered.change FROM numbered WHERE core_workspace.id = numbered.id;
+
+WITH numbered AS (
+    SELECT todo.id, row_number() OVER (PARTITION BY todo.user_id ORDER BY todo.created, todo.id)
+        + (SELECT count(*) FROM core_workspace WHERE core_workspace.user_id = todo.user_id) AS change
+    FROM core_todo todo
+)
+UPDATE core_todo SET change = numbered.change FROM numbered WHERE core_todo.id = numbered.id;
+
+UPDATE core_user SET last_change =
+    (SELECT count(*) FROM core_workspace WHERE core_workspace.user_id = core_user.id)
+    + (SELECT count(*) FROM core_todo WHERE core_todo.user_id = core_user.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_todo_dates_workspace_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change', models.PositiveBigIntegerField()),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('deleted', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'change'], name='tombstone_user_change_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='change',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_change',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='change',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunSQL(NUMBER_CHANGES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 08:25
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_change_log'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='todo',
+            index=models.Index(fields=['user', 'change'], name='todo_user_change_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='workspace',
+            index=models.Index(fields=['user', 'change'], name='workspace_user_change_idx'),
+        ),
+    ]
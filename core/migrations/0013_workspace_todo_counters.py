@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+COUNT_TODOS = """
+UPDATE core_workspace SET
+    todos_total = counts.total,
+    todos_completed = counts.completed,
+    todos_pending = counts.pending,
+    todos_in_progress = counts.in_progress,
+    todos_done = counts.done
+FROM (
+    SELECT
+        workspace_id,
+        count(*) AS total,
+        count(*) FILTER (WHERE completed) AS completed,
+        count(*) FILTER (WHERE status = 'pending') AS pending,
+        count(*) FILTER (WHERE status = 'in progress') AS in_progress,
+        count(*) FILTER (WHERE status = 'done') AS done
+    FROM core_todo
+    GROUP BY workspace_id
+) counts
+WHERE core_workspace.id = counts.workspace_id;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_change_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='todos_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='todos_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='todos_in_progress',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='todos_pending',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='todos_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunSQL(COUNT_TODOS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_workspace_todo_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workspace',
+            name='deleted',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='workspace',
+            index=models.Index(condition=models.Q(('deleted__isnull', False)), fields=['deleted'], name='workspace_deleted_idx'),
+        ),
+    ]
@@ -1,10 +1,17 @@
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils.translation import gettext as _
 from django.utils import timezone
 
+import datetime
 import uuid
+
+from core import hashers
 # Create your models here.
 
 
@@ -42,6 +49,28 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def allocate_changes(self, user_id, count=1):
+        """
+        It reserves the next `count` positions of the change log of a user.
+
+        The row of the user stays locked until the transaction ends, so the changes of a user are
+        committed in the order of their positions and a sync cursor never skips a change that was still
+        being written. Call it inside a transaction.
+
+        :param user_id: The id of the user whose data changes
+        :param count: The number of changes
+        :return: A range with the positions.
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.model._meta.db_table} SET last_change = last_change + %s WHERE id = %s '
+                f'RETURNING last_change',
+                [count, user_id]
+            )
+            last, = cursor.fetchone()
+
+        return range(last - count + 1, last + 1)
+
 
 class User(AbstractBaseUser, PermissionsMixin):
 
@@ -51,12 +80,178 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
 
+    # Position of the last change of the user's workspaces and TODOs, see UserManager.allocate_changes
+    last_change = models.PositiveBigIntegerField(default=0)
+    # When the user was deleted, while their rows are purged in the background (core.deletion)
+    deleted = models.DateTimeField(null=True, blank=True)
+
     objects = UserManager()
 
     USERNAME_FIELD = "email"
 
+    def set_password(self, raw_password):
+        # The hash is made in the password hashing pool, see core.hashers
+        self.password = hashers.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        It checks the password in the password hashing pool. A correct password whose hash was made with
+        another hasher or other costs than the current ones is hashed again and saved.
+        """
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return hashers.check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        """
+        Async version of `check_password`
+        """
+        is_correct = await hashers.acheck_password(raw_password, self.password)
+        if is_correct and hashers.must_update(self.password):
+            self.password = await hashers.amake_password(raw_password)
+            await self.asave(update_fields=['password'])
+        return is_correct
+
+    def save(self, *args, **kwargs):
+        # `last_change` is only written by allocate_changes, a stale copy of the user must not overwrite it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'last_change'
+            ]
+        super().save(*args, **kwargs)
+
+
+class ChangeTrackedModel(models.Model):
+    """
+    A model whose rows belong to a user and record the position of their last change in the change log
+    of the user, so /api/sync/ can return the rows changed after a cursor
+    """
+    change = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or 'default'
+        with transaction.atomic(using=using, savepoint=False):
+            self.change, = User.objects.db_manager(using).allocate_changes(self.user_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change'}
+            super().save(*args, **kwargs)
+
+
+# Counter column of Workspace for each TODO status the clients use. TODOs with another status are only
+# counted in the total
+TODO_STATUS_COUNTERS = {
+    'pending': 'todos_pending',
+    'in progress': 'todos_in_progress',
+    'done': 'todos_done',
+}
+TODO_COUNTERS = ('todos_total', 'todos_completed', *TODO_STATUS_COUNTERS.values())
+
+
+class WorkspaceQuerySet(models.QuerySet):
+
+    def mark_deleted(self):
+        """
+        It marks the workspaces as deleted, which hides them and their TODOs at once, until
+        core.deletion purges them
+
+        :return: The number of workspaces marked.
+        """
+        return self.update(deleted=timezone.now(), version=models.F('version') + 1, modified=timezone.now())
+
+    def bump_version(self):
+        """
+        It increments the version of the workspaces, so the ETags of their responses change
+
+        :return: The number of workspaces bumped.
+        """
+        return self.update(version=models.F('version') + 1, modified=timezone.now())
+
+    def count_todos(self, changes):
+        """
+        It applies changes of TODOs to the counters of their workspaces and bumps the version of every
+        workspace involved, with a single UPDATE
 
-class Workspace(models.Model):
+        :param changes: (sign, count) pairs, where count is the `Todo.get_count()` of a TODO and sign is
+            1 to add it to the counters of its workspace or -1 to remove it
+        :return: The number of workspaces updated.
+        """
+        deltas = {}
+        for sign, (workspace_id, completed, status) in changes:
+            delta = deltas.setdefault(workspace_id, dict.fromkeys(TODO_COUNTERS, 0))
+            delta['todos_total'] += sign
+            delta['todos_completed'] += sign if completed else 0
+            if status in TODO_STATUS_COUNTERS:
+                delta[TODO_STATUS_COUNTERS[status]] += sign
+
+        if not deltas:
+            return 0
+
+        counters = {}
+        for field in TODO_COUNTERS:
+            whens = [
+                models.When(pk=workspace_id, then=models.Value(delta[field]))
+                for workspace_id, delta in deltas.items() if delta[field]
+            ]
+            if whens:
+                counters[field] = models.F(field) + models.Case(*whens, default=models.Value(0))
+
+        return self.filter(pk__in=deltas).update(
+            version=models.F('version') + 1, modified=timezone.now(), **counters)
+
+    def drifted(self):
+        """
+        It returns the workspaces whose TODO counters don't match their TODOs
+        """
+        counts = todo_count_expressions()
+        return self.annotate(**{f'counted_{field}': count for field, count in counts.items()}).exclude(
+            **{field: models.F(f'counted_{field}') for field in counts})
+
+    def reconcile_todo_counters(self):
+        """
+        It recounts the TODOs of the workspaces in the UPDATE itself, so a TODO change made meanwhile is
+        not lost, and bumps their versions
+
+        :return: The number of workspaces updated.
+        """
+        return self.update(version=models.F('version') + 1, modified=timezone.now(), **todo_count_expressions())
+
+
+class WorkspaceManager(models.Manager.from_queryset(WorkspaceQuerySet)):
+    """
+    The workspaces that are not marked as deleted. The marked ones are only reached through
+    `Workspace.all_objects` and the base manager, which the cascades and the related objects use.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted__isnull=True)
+
+
+def todo_count_expressions():
+    """
+    It returns the expressions that count the TODOs of a workspace, keyed by their counter field
+    """
+    todos = Todo.objects.filter(workspace=models.OuterRef('pk')).order_by().values('workspace')
+    filters = {
+        'todos_total': {},
+        'todos_completed': {'completed': True},
+        **{field: {'status': status} for status, field in TODO_STATUS_COUNTERS.items()},
+    }
+    return {
+        field: Coalesce(models.Subquery(
+            todos.filter(**lookups).annotate(count=models.Count('pk')).values('count')), 0)
+        for field, lookups in filters.items()
+    }
+
+
+class Workspace(ChangeTrackedModel):
     title = models.CharField(max_length=255, default='Workspace')
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE,
@@ -69,18 +264,89 @@ class Workspace(models.Model):
         primary_key=True,
         editable=False
     )
+    created = models.DateTimeField(auto_now_add=True)
+
+    # Bumped on every change of the workspace or its TODOs, it is the validator of conditional GETs
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    # Maintained by WorkspaceQuerySet.count_todos on every TODO change, `reconcile_todo_counters` fixes drift
+    todos_total = models.IntegerField(default=0)
+    todos_completed = models.IntegerField(default=0)
+    todos_pending = models.IntegerField(default=0)
+    todos_in_progress = models.IntegerField(default=0)
+    todos_done = models.IntegerField(default=0)
+
+    # When the workspace was deleted, while its TODOs are purged in the background (core.deletion)
+    deleted = models.DateTimeField(null=True, blank=True)
+
+    objects = WorkspaceManager()
+    all_objects = WorkspaceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # /api/sync/
+            models.Index(fields=['user', 'change'], name='workspace_user_change_idx'),
+            # TodoQuerySet.visible and the purge, only the workspaces waiting to be purged are in it
+            models.Index(fields=['deleted'], name='workspace_deleted_idx', condition=models.Q(deleted__isnull=False)),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # The version and the counters are updated with F expressions and `deleted` by mark_deleted, a
+        # stale copy of the workspace must not overwrite them
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('version', 'deleted', *TODO_COUNTERS)
+            ]
+        super().save(*args, **kwargs)
+
+
+def set_changes(instances):
+    """
+    It sets the change of rows that are saved in bulk, which skips `save()`. Call it inside the
+    transaction that saves them.
+
+    :param instances: The workspaces or TODOs about to be saved
+    """
+    by_user = {}
+    for instance in instances:
+        by_user.setdefault(instance.user_id, []).append(instance)
+
+    # Always lock the users in the same order, so two bulk saves can't deadlock
+    for user_id in sorted(by_user):
+        changes = User.objects.allocate_changes(user_id, len(by_user[user_id]))
+        for change, instance in zip(changes, by_user[user_id]):
+            instance.change = change
+
+
+# Full text document of a TODO. Searches must use this same expression to hit `todo_search_idx`
+TODO_SEARCH_CONFIG = 'english'
+TODO_SEARCH_VECTOR = SearchVector('title', 'description', config=TODO_SEARCH_CONFIG)
+
+
+class TodoQuerySet(models.QuerySet):
+
+    def visible(self):
+        """
+        It leaves out the TODOs of the workspaces marked as deleted, which are still being purged. The
+        marked workspaces are few and the subquery is run once, the TODOs are not joined to their workspace.
+        """
+        return self.exclude(workspace__in=Workspace.all_objects.filter(deleted__isnull=False).values('pk'))
 
-class Todo(models.Model):
+
+class Todo(ChangeTrackedModel):
 
     title = models.CharField(max_length=255, default='Title')
+    # The FK indexes are left out because the composite indexes below start with the same columns
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE,
                              null=False,
-                             blank=False)
+                             blank=False,
+                             db_index=False)
     id = models.UUIDField(
         default=uuid.uuid4,
         unique=True,
@@ -90,7 +356,8 @@ class Todo(models.Model):
     workspace = models.ForeignKey(Workspace,
                                   on_delete=models.CASCADE,
                                   null=False,
-                                  blank=False)
+                                  blank=False,
+                                  db_index=False)
 
     description = models.TextField(null=True, blank=True)
 
@@ -98,5 +365,169 @@ class Todo(models.Model):
     completed = models.BooleanField(default=False)
     status = models.CharField(max_length=100, default='pending')
 
-    created = models.DateTimeField(auto_now=True)
-    updated = models.DateField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = TodoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # TodoViewSet lists, with and without ?workspace=, ordered like the cursor pagination
+            models.Index(fields=['user', 'workspace', 'created'], name='todo_user_ws_created_idx'),
+            models.Index(fields=['user', 'created'], name='todo_user_created_idx'),
+            # WorkspaceViewSet.retrieve and the workspace cascade delete
+            models.Index(fields=['workspace', 'created'], name='todo_ws_created_idx'),
+            # Pending TODOs are the ones the clients ask for the most, and a small part of the table
+            models.Index(fields=['user', 'created'], name='todo_user_pending_idx',
+                         condition=models.Q(completed=False)),
+            # ?status= and ?priority= filters of TodoViewSet
+            models.Index(fields=['user', 'status'], name='todo_user_status_idx'),
+            models.Index(fields=['user', 'priority'], name='todo_user_priority_idx'),
+            # /api/sync/
+            models.Index(fields=['user', 'change'], name='todo_user_change_idx'),
+            # ?search= on the title and description
+            GinIndex(TODO_SEARCH_VECTOR, name='todo_search_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # How the TODO was counted when loaded, so saving it moves it between the workspace counters
+        instance._loaded_count = instance.get_count()
+        return instance
+
+    def get_count(self):
+        """
+        It returns the workspace, completed and status of the TODO, what its workspace counters depend on.
+        None when one of them wasn't loaded.
+        """
+        count = tuple(self.__dict__.get(field) for field in ('workspace_id', 'completed', 'status'))
+        return None if None in count else count
+
+    def get_count_changes(self, sign):
+        """
+        It returns the changes of the workspace counters of saving (sign 1) or deleting (sign -1) the TODO,
+        for WorkspaceQuerySet.count_todos
+        """
+        loaded = getattr(self, '_loaded_count', None)
+        if sign < 0:
+            return [(-1, loaded or self.get_count())]
+
+        return [(1, self.get_count())] + ([(-1, loaded)] if loaded else [])
+
+
+class TombstoneQuerySet(models.QuerySet):
+
+    def record(self, user_id, instances):
+        """
+        It records the deletion of the user's rows in the change log, so the clients that sync after it
+        delete them too. Call it in the transaction that deletes them.
+
+        :param user_id: The id of the user the rows belong to
+        :param instances: The deleted workspaces or TODOs
+        :return: The created tombstones.
+        """
+        instances = list(instances)
+        if not instances:
+            return []
+
+        changes = User.objects.db_manager(self.db).allocate_changes(user_id, len(instances))
+        return self.bulk_create(
+            Tombstone(user_id=user_id, change=change, model=instance._meta.model_name, object_id=instance.pk)
+            for change, instance in zip(changes, instances)
+        )
+
+
+class Tombstone(models.Model):
+    """
+    A deleted workspace or TODO. Deleting a workspace deletes its TODOs, which get no tombstone of their own
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+    change = models.PositiveBigIntegerField()
+    model = models.CharField(max_length=20)
+    object_id = models.UUIDField()
+    deleted = models.DateTimeField(auto_now_add=True)
+
+    objects = TombstoneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'change'], name='tombstone_user_change_idx'),
+        ]
+
+
+# Error of the jobs whose last attempt didn't finish within the visibility timeout
+TIMEOUT_ERROR = 'The worker did not finish the job within its visibility timeout (it crashed or hung)'
+
+
+class JobQuerySet(models.QuerySet):
+
+    def claim(self, timeout):
+        """
+        It takes the oldest due job: a queued one whose `run_at` has passed, or a running one whose worker
+        didn't finish it within its visibility timeout (it crashed or is stuck). The row is locked with
+        SKIP LOCKED, so concurrent workers never wait for each other nor take the same job.
+
+        A running job that timed out on its last attempt is failed instead, so a job that crashes or hangs
+        its worker isn't retried forever.
+
+        :param timeout: Seconds the job is invisible to the other workers
+        :return: The job, marked as running, or None when no job is due.
+        """
+        now = timezone.now()
+        expired = models.Q(status=Job.RUNNING, locked_until__lte=now)
+        self.filter(expired, attempts__gte=models.F('max_attempts')).update(
+            status=Job.FAILED, locked_until=None, updated=now, error=TIMEOUT_ERROR)
+
+        with transaction.atomic(using=self.db):
+            job = self.select_for_update(skip_locked=True).filter(
+                models.Q(status=Job.QUEUED, run_at__lte=now)
+                | (expired & models.Q(attempts__lt=models.F('max_attempts')))
+            ).order_by('run_at').first()
+            if job is None:
+                return None
+
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_until = now + datetime.timedelta(seconds=timeout)
+            job.save(update_fields=['status', 'attempts', 'locked_until', 'updated'])
+        return job
+
+
+class Job(models.Model):
+    """
+    A run of a background task (core.jobs), kept in the database so it survives restarts and needs no
+    other service
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    # The user who can follow the job at /api/job/<id>/
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             db_index=False)
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    # Until when a running job is invisible to the other workers
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # JobQuerySet.claim, only the jobs that are not finished are in it
+            models.Index(fields=['run_at'], name='job_due_idx', condition=models.Q(status__in=['queued', 'running'])),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
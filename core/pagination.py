@@ -0,0 +1,126 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def position_filter(ordering, position):
+    """
+    It returns the filter of the rows that come after `position` in `ordering`, the row comparison
+    `(a, b, c) > (x, y, z)` spelled out as `a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)`,
+    with `<` for the descending fields. `a >= x` is added so the database can bound its index scan with
+    the first field.
+
+    :param ordering: The ordering of the query, e.g. ('priority_order', 'created', 'id')
+    :param position: The values of the ordering fields of the last row already returned
+    :return: The Q object.
+    """
+    after, equal = Q(), Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        after |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+
+    first = ordering[0]
+    return Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': position[0]}) & after
+
+
+class CreatedCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by (created, id), or by the `?ordering=` of the view followed by them.
+
+    Unlike the DRF CursorPagination, whose cursor only holds the value of the first ordering field plus
+    an offset over the rows that share it, the cursor holds the values of every ordering field of the
+    last row returned. The ordering always ends with `id`, so this position is unique and the next page
+    is fetched with a keyset `WHERE (priority_order, created, id) > <position>` instead of an offset: any
+    number of TODOs may share a priority, where the DRF offsets stop at `offset_cutoff` and the `next`
+    links would loop. The cost of a page does not grow with the size of the table either.
+
+    `created` must never change once the row exists (`auto_now_add`), otherwise the rows updated
+    while a client pages would be skipped or repeated.
+    """
+    ordering = ('created', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        It returns the page after, or before for a reversed cursor, the position of the cursor. The
+        following position is read from the extra row fetched to know whether there is a next page.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = None if self.cursor is None else self.cursor.position
+
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(position_filter(ordering, self.decode_position(current_position)))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = has_following_position, following_position
+        else:
+            self.has_next, self.next_position = has_following_position, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_position(self, position):
+        """
+        It returns the values of the ordering fields held by the position of a cursor
+
+        :raise NotFound: The position is not one of the current ordering.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(values, list) or len(values) != len(self.ordering)
+                or not all(isinstance(value, str) for value in values)):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = (
+            instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        )
+        return json.dumps([str(value) for value in values], separators=(',', ':'))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of `paginate_queryset`. Like the async ORM does, the page is read in the thread
+        Django keeps for database access, so the event loop is free meanwhile
+        """
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
@@ -0,0 +1,127 @@
+import csv
+import dataclasses
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+if orjson is not None:
+    # Dates, times and dataclasses are handed to the DRF encoder, which writes them differently than orjson
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson, several times faster than the standard json module.
+
+    The output is byte for byte the one of the compact DRF JSONRenderer: orjson writes non ASCII text as
+    UTF-8 and the same separators, the types orjson does not know or writes differently (dates, Decimals,
+    lazy translations...) go through the DRF encoder, and U+2028/U+2029 are escaped afterwards like DRF
+    does. The differences left are on floats, which the API has none of: the exponent of floats like 1e16
+    (`1e16` instead of `1e+16`), and NaN and Infinity, which orjson writes as `null` where JSONRenderer
+    raises a ValueError (`STRICT_JSON`, the default) or writes `NaN`.
+
+    It falls back to JSONRenderer when orjson is not installed, when an indented response is asked
+    (`Accept: application/json; indent=4`) and when orjson can not encode the data (integers wider than
+    64 bits, keys that are not strings).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=default, option=OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in LINE_SEPARATORS:
+            ret = ret.replace(separator, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack, asked with `Accept: application/msgpack` or `?format=msgpack`. It has the same values
+    as the JSON responses (dates, UUIDs and Decimals are strings too, through the DRF encoder), with the
+    keys and numbers in a more compact binary form.
+
+    It is only in the renderers of the API when the msgpack package is installed.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=default)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, for the export endpoints. The exports are streamed by the view
+    (core.streaming.stream_ndjson), only the other responses, like the errors, are rendered here, as a
+    single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return FastJSONRenderer().render(data) + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV, for the export endpoints. The exports are streamed by the view (core.streaming.stream_csv),
+    only the other responses, like the errors, are rendered here, as a header line with the keys and a
+    line with the values.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data)
+        writer.writerow(data.values())
+        return buffer.getvalue().encode()
+
+
+# The formats of the export endpoints, NDJSON unless `?format=csv` or `Accept: text/csv` is asked
+EXPORT_RENDERERS = (NDJSONRenderer, CSVRenderer)
+
+encoder = JSONEncoder()
+
+
+def default(obj):
+    if dataclasses.is_dataclass(obj):
+        # The DRF encoder does not know dataclasses, like with the json module they can not be encoded
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return encoder.default(obj)
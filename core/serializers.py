@@ -0,0 +1,172 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import fields, relations
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+from core import metrics
+
+# Fields whose representation of a value read from the database is the value itself
+IDENTITY_REPRESENTATIONS = (
+    fields.CharField.to_representation,
+    fields.IntegerField.to_representation,
+    fields.BooleanField.to_representation,
+)
+
+
+class TimedSerializerMixin:
+    """
+    It adds the time spent building `data` to the serialize time of the request metrics
+    """
+
+    @property
+    def data(self):
+        with metrics.serializing():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    """
+    ListSerializer of the timed serializers, `many=True` serializes through it and not through the child
+    """
+
+
+class SparseFieldsMixin:
+    """
+    It takes a `fields` argument with the names of the fields to keep, the ones asked with `?fields=`
+    and `?omit=` (see `get_field_selection`). None keeps every field.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def get_field_selection(request, names):
+    """
+    It returns the fields of a representation asked with `?fields=` (the ones to return) and `?omit=`
+    (the ones to leave out), comma separated
+
+    :param request: The DRF request
+    :param names: The fields of the representation, in order
+    :return: The selected fields in the order of `names`, or None when neither param is sent.
+    """
+    params = request.query_params
+    if not params.get('fields') and not params.get('omit'):
+        return None
+
+    def split(value):
+        return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+    asked = split(params.get('fields')) or set(names)
+    omitted = split(params.get('omit'))
+
+    unknown = (asked | omitted) - set(names)
+    if unknown:
+        raise ValidationError({'fields': [
+            _('Unknown fields: %(fields)s') % {'fields': ', '.join(sorted(unknown))}]}, code='invalid')
+
+    selected = tuple(name for name in names if name in asked and name not in omitted)
+    if not selected:
+        raise ValidationError({'fields': [_('At least one field must be selected')]}, code='invalid')
+    return selected
+
+
+class ValuesSerializer:
+    """
+    Read only version of a ModelSerializer for the rows of `.values()`.
+
+    The rows are plain dicts, so no model instance is built, and every field is mapped once, when the
+    serializer is first used, to its column and to the conversion its `to_representation` does (none
+    for text, numbers and booleans, `str` for UUIDs). The representation is the same as the one of
+    `serializer_class`, key order included.
+
+    Only the fields whose source is a column of the model are supported. `only` returns the serializer
+    of a subset of the fields, which reads only their columns.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        self.fields = fields
+        self.subsets = {}
+
+    @cached_property
+    def mappers(self):
+        """
+        The (name, column, conversion) of every readable field, conversion is None when the value is
+        returned as it is
+        """
+        return tuple(
+            (name, field.source, self.get_conversion(field))
+            for name, field in self.serializer_class().fields.items()
+            if not field.write_only and (self.fields is None or name in self.fields)
+        )
+
+    @cached_property
+    def names(self):
+        return tuple(name for name, _, _ in self.mappers)
+
+    @cached_property
+    def columns(self):
+        columns = tuple(column for _, column, _ in self.mappers)
+        model = self.serializer_class.Meta.model
+
+        for column in columns:
+            try:
+                model._meta.get_field(column)
+            except Exception:
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__} field source {column!r} is not a column of {model.__name__}')
+        return columns
+
+    def only(self, *names):
+        """
+        It returns the ValuesSerializer of some of the fields, built once per subset
+
+        :param names: The fields to keep
+        :return: A ValuesSerializer whose representation and columns are the ones of these fields.
+        """
+        key = frozenset(names)
+        if key not in self.subsets:
+            self.subsets[key] = ValuesSerializer(self.serializer_class, key)
+        return self.subsets[key]
+
+    def get_conversion(self, field):
+        representation = type(field).to_representation
+
+        if representation in IDENTITY_REPRESENTATIONS:
+            return None
+        if representation is relations.PrimaryKeyRelatedField.to_representation and field.pk_field is None:
+            # `.values()` returns the id of the related row, which is what the field returns
+            return None
+        if representation is fields.UUIDField.to_representation and field.uuid_format == 'hex_verbose':
+            return str
+        return field.to_representation
+
+    def values(self, queryset, *columns):
+        """
+        It returns the queryset as dicts with the columns of the representation
+
+        :param queryset: The queryset to read
+        :param columns: Other columns the rows need, like the ordering fields the cursor pagination reads
+        :return: A `.values()` queryset.
+        """
+        return queryset.values(*dict.fromkeys((*self.columns, *columns)))
+
+    def to_representation(self, row):
+        return {
+            name: value if conversion is None or value is None else conversion(value)
+            for name, column, conversion in self.mappers
+            for value in (row[column],)
+        }
+
+    def serialize(self, rows):
+        """
+        It returns the representation of every row, timed as serialize time in the request metrics
+        """
+        with metrics.serializing():
+            return [self.to_representation(row) for row in rows]
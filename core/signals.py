@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core import metrics
+from core.authentication import invalidate_token
+from core.models import Todo, Workspace
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    It drops a deleted token from the authentication cache
+    """
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    It drops the tokens of a saved user from the authentication cache, so a deactivated user is
+    rejected right away and the others don't keep a stale copy of the user
+    """
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=Todo)
+def count_saved_todo(sender, instance, **kwargs):
+    """
+    It updates the TODO counters and bumps the version of the workspaces of a saved TODO, the one it was
+    loaded with and the one it is in now.
+
+    There is no post_delete receiver for TODOs on purpose: it would stop Django from deleting them in
+    bulk when a workspace or a user is deleted, and then the workspace and its counters are gone anyway.
+    The views that delete TODOs update the counters instead.
+    """
+    Workspace.objects.count_todos(instance.get_count_changes(1))
+    instance._loaded_count = instance.get_count()
+
+
+@receiver(post_save, sender=Workspace)
+def bump_workspace(sender, instance, created, **kwargs):
+    if not created:
+        Workspace.objects.filter(pk=instance.pk).bump_version()
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """
+    It adds the query metrics wrapper to every new database connection
+    """
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, metrics.record_query)
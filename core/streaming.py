@@ -0,0 +1,312 @@
+import codecs
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def dumps(data):
+    """
+    It encodes the data the same way the compact DRF JSONRenderer does
+
+    :param data: Serialized data (dicts, lists, UUIDs, dates...)
+    :return: The JSON document as a string.
+    """
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def iterate(queryset):
+    """
+    It iterates the queryset through a server side cursor, so only one chunk of rows is held in
+    memory at a time
+
+    :param queryset: The queryset to iterate
+    :return: A generator of model instances.
+    """
+    return queryset.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+
+
+def aiterate(queryset):
+    """
+    Async version of `iterate`
+    """
+    return queryset.aiterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+
+
+def is_asgi(request):
+    """
+    It tells whether the request came through the ASGI handler. A streaming response must then be given
+    an async iterator: Django collects a sync one whole in a thread before sending any of it.
+
+    :param request: The DRF or Django request
+    :return: True under ASGI.
+    """
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def chunks(rows, size=None):
+    """
+    It groups the rows in lists of `size` rows, `STREAM_CHUNK_SIZE` by default
+
+    :param rows: An iterable of rows
+    :param size: The number of rows of every list but the last one
+    :return: A generator of lists of rows.
+    """
+    size = size or settings.STREAM_CHUNK_SIZE
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+async def achunks(rows, size=None):
+    """
+    Async version of `chunks`, for async iterables of rows
+    """
+    size = size or settings.STREAM_CHUNK_SIZE
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def opening(head, key):
+    opening = dumps(head)[:-1]
+    return f'{opening},{dumps(key)}:[' if head else f'{opening}{dumps(key)}:['
+
+
+def render(chunk, serializer):
+    return ','.join(dumps(serializer.to_representation(row)) for row in chunk)
+
+
+def stream_json_list(head, key, rows, serializer):
+    """
+    It yields a JSON object made of `head` plus a `key` list built chunk by chunk, so the whole list
+    is never rendered in memory
+
+    :param head: The dict with the fields that go before the list
+    :param key: The key of the list inside the JSON object
+    :param rows: An iterable of model instances, or of `.values()` rows
+    :param serializer: The serializer instance (or ValuesSerializer) used to represent every row
+    :return: A generator of JSON chunks.
+    """
+    yield opening(head, key)
+
+    separator = ''
+    for chunk in chunks(rows):
+        yield separator + render(chunk, serializer)
+        separator = ','
+    yield ']}'
+
+
+async def astream_json_list(head, key, rows, serializer):
+    """
+    Async version of `stream_json_list`, for async iterables of rows
+    """
+    yield opening(head, key)
+
+    separator = ''
+    async for chunk in achunks(rows):
+        yield separator + render(chunk, serializer)
+        separator = ','
+    yield ']}'
+
+
+def stream_ndjson(rows, serializer):
+    """
+    It yields the rows as newline delimited JSON, one JSON object per line, a chunk of lines at a time
+
+    :param rows: An iterable of model instances, or of `.values()` rows
+    :param serializer: The serializer instance (or ValuesSerializer) used to represent every row
+    :return: A generator of NDJSON chunks.
+    """
+    for chunk in chunks(rows):
+        yield ''.join(f'{dumps(serializer.to_representation(row))}\n' for row in chunk)
+
+
+async def astream_ndjson(rows, serializer):
+    """
+    Async version of `stream_ndjson`, for async iterables of rows
+    """
+    async for chunk in achunks(rows):
+        yield ''.join(f'{dumps(serializer.to_representation(row))}\n' for row in chunk)
+
+
+def stream_csv(rows, serializer, columns):
+    """
+    It yields the rows as CSV with a header line, a chunk of lines at a time. Null values are written as
+    empty cells.
+
+    :param rows: An iterable of model instances, or of `.values()` rows
+    :param serializer: The serializer instance (or ValuesSerializer) used to represent every row
+    :param columns: The keys of the representation written as columns, in order
+    :return: A generator of CSV chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for chunk in chunks(rows):
+        for row in chunk:
+            data = serializer.to_representation(row)
+            writer.writerow([data[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def astream_csv(rows, serializer, columns):
+    """
+    Async version of `stream_csv`, for async iterables of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for chunk in achunks(rows):
+        for row in chunk:
+            data = serializer.to_representation(row)
+            writer.writerow([data[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def decode_lines(stream):
+    """
+    It decodes a UTF-8 byte stream line by line, without reading it all. A byte order mark is skipped.
+
+    :param stream: An iterable of byte lines, like the request, or None for an empty body
+    :return: A generator of text lines.
+    """
+    try:
+        yield from codecs.iterdecode(stream or (), 'utf-8-sig')
+    except UnicodeDecodeError:
+        raise ParseError(_('The body is not UTF-8 text'))
+
+
+def line_error(exception_class, line, **detail):
+    """
+    It builds an API exception about a line of an upload, with the line number kept as a number instead
+    of the string DRF makes of every error detail
+
+    :param exception_class: The APIException subclass to raise
+    :param line: The line number
+    :param detail: The error details
+    :return: The exception.
+    """
+    error = exception_class(detail)
+    error.detail = {'line': line, **error.detail}
+    return error
+
+
+def read_ndjson(stream):
+    """
+    It parses a newline delimited JSON upload one line at a time. Blank lines are skipped.
+
+    :param stream: An iterable of byte lines
+    :return: A generator of (line number, parsed value) pairs.
+    """
+    for number, line in enumerate(decode_lines(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            raise line_error(ParseError, number, detail=_('JSON parse error - %(error)s') % {'error': error})
+
+
+def read_csv(stream):
+    """
+    It parses a CSV upload with a header line one row at a time. The cells of a short row are left
+    out, like the cells without a header.
+
+    :param stream: An iterable of byte lines
+    :return: A generator of (line number, dict) pairs, the line is the one the row starts at.
+    """
+    reader = csv.reader(decode_lines(stream))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+
+        number = reader.line_num + 1
+        for cells in reader:
+            if any(cells):
+                yield number, dict(zip(header, cells))
+            number = reader.line_num + 1
+    except csv.Error as error:
+        raise line_error(ParseError, reader.line_num, detail=_('CSV parse error - %(error)s') % {'error': error})
+
+
+def export_response(request, queryset, serializer, filename):
+    """
+    It streams the rows as an attachment in the format negotiated with the export renderers
+    (core.renderers.NDJSONRenderer and CSVRenderer). The rows are read through a server side cursor,
+    with the async iterator under ASGI.
+
+    :param request: The DRF request
+    :param queryset: The `.values()` queryset of the rows
+    :param serializer: The ValuesSerializer of the rows, its fields are the CSV columns
+    :param filename: The name of the attachment, without extension
+    :return: The streaming response.
+    """
+    renderer = request.accepted_renderer
+    if is_asgi(request):
+        rows = aiterate(queryset)
+        if renderer.format == 'csv':
+            content = astream_csv(rows, serializer, serializer.names)
+        else:
+            content = astream_ndjson(rows, serializer)
+    elif renderer.format == 'csv':
+        content = stream_csv(iterate(queryset), serializer, serializer.names)
+    else:
+        content = stream_ndjson(iterate(queryset), serializer)
+
+    response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
+
+
+# Parsers of the uploads of the import endpoints, by media type
+UPLOAD_READERS = {
+    'application/x-ndjson': read_ndjson,
+    'text/csv': read_csv,
+}
+
+
+def read_upload(request):
+    """
+    It parses the body of an import request with the reader of its Content-Type, line by line from the
+    request stream instead of loading it like `request.data` does
+
+    :param request: The DRF request
+    :return: A generator of (line number, row) pairs.
+    """
+    media_type = request.content_type.split(';')[0].strip().lower()
+    if media_type not in UPLOAD_READERS:
+        raise UnsupportedMediaType(media_type)
+    return UPLOAD_READERS[media_type](request.stream)
@@ -0,0 +1,13 @@
+from core import jobs
+from core.models import Workspace
+
+
+@jobs.task
+def reconcile_todo_counters():
+    """
+    It recounts the TODOs of the workspaces whose counters drifted and fixes them
+
+    :return: The number of workspaces reconciled.
+    """
+    drifted = list(Workspace.objects.drifted().values_list('pk', flat=True))
+    return Workspace.objects.filter(pk__in=drifted).reconcile_todo_counters()
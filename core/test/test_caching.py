@@ -0,0 +1,223 @@
+from django.test import TestCase, AsyncRequestFactory, Client, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import caching, metrics, models
+from todo.views import AsyncTodoListView
+from user.views import AsyncManageUserView
+from workspace.views import AsyncWorkspaceDetailView
+
+TODO_URL_LIST = reverse('todo:todo-list')
+TODO_URL_BULK = reverse('todo:todo-bulk')
+WORKSPACE_URL_LIST = reverse('workspace:workspace-list')
+ME_URL = reverse('user:me')
+
+
+def workspace_url(workspace):
+    return reverse('workspace:workspace-detail', args=[workspace.pk])
+
+
+def todo_url(todo):
+    return reverse('todo:todo-detail', args=[todo.pk])
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.todo = models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        caching.get_cache().clear()
+        self.addCleanup(caching.get_cache().clear)
+        for counter in metrics.COUNTERS:
+            counter.clear()
+
+    def get_titles(self, url=TODO_URL_LIST):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(todo['title'] for todo in response.data['results'])
+
+    def test_hit(self):
+        """
+        The second read of the list is served from the cache with a single query, the authentication is
+        forced so it is the versions query
+        """
+        first = self.client.get(TODO_URL_LIST)
+        with self.assertNumQueries(1):
+            second = self.client.get(TODO_URL_LIST)
+
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(first['Server-Timing'].endswith('cache;desc="miss"'))
+        self.assertTrue(second['Server-Timing'].endswith('cache;desc="hit"'))
+        self.assertIn('response_cache_requests_total{scope="todo-list",result="hit"} 1', metrics.render())
+        self.assertIn('response_cache_requests_total{scope="todo-list",result="miss"} 1', metrics.render())
+
+    def test_query_string_and_format(self):
+        self.get_titles()
+
+        response = self.client.get(TODO_URL_LIST, {'completed': 'true'})
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT='text/html')
+        self.assertIn('text/html', response['Content-Type'])
+
+    def test_create_update_delete_todo(self):
+        self.get_titles()
+
+        self.client.post(TODO_URL_LIST, {'title': 'todo 2', 'workspace': self.workspace.pk})
+        self.assertEqual(self.get_titles(), ['todo 1', 'todo 2'])
+
+        self.client.patch(todo_url(self.todo), {'title': 'todo 3'})
+        self.assertEqual(self.get_titles(), ['todo 2', 'todo 3'])
+
+        self.client.delete(todo_url(self.todo))
+        self.assertEqual(self.get_titles(), ['todo 2'])
+
+    def test_bulk_todos(self):
+        self.get_titles()
+
+        response = self.client.post(TODO_URL_BULK, {
+            'create': [{'title': 'todo 2', 'workspace': self.workspace.pk}],
+            'update': [{'id': str(self.todo.pk), 'title': 'todo 3'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get_titles(), ['todo 2', 'todo 3'])
+
+    def test_move_todo(self):
+        """
+        A TODO moved to another workspace leaves the cached pages of both workspaces
+        """
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        self.get_titles(f'{TODO_URL_LIST}?workspace={self.workspace.pk}')
+        self.get_titles(f'{TODO_URL_LIST}?workspace={workspace2.pk}')
+
+        self.client.patch(todo_url(self.todo), {'workspace': workspace2.pk})
+
+        self.assertEqual(self.get_titles(f'{TODO_URL_LIST}?workspace={self.workspace.pk}'), [])
+        self.assertEqual(self.get_titles(f'{TODO_URL_LIST}?workspace={workspace2.pk}'), ['todo 1'])
+
+    def test_workspace_detail(self):
+        self.client.get(workspace_url(self.workspace))
+
+        models.Todo.objects.create(title='todo 2', user=self.user, workspace=self.workspace)
+        response = self.client.get(workspace_url(self.workspace))
+        self.assertEqual(len(response.data['TODOs']), 2)
+
+        self.client.patch(workspace_url(self.workspace), {'title': 'workspace 2'})
+        self.assertEqual(self.client.get(workspace_url(self.workspace)).data['workspace']['title'], 'workspace 2')
+
+    def test_workspace_list(self):
+        titles = [workspace['title'] for workspace in self.client.get(WORKSPACE_URL_LIST).data['results']]
+        self.assertEqual(titles, ['workspace 1'])
+
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        titles = [workspace['title'] for workspace in self.client.get(WORKSPACE_URL_LIST).data['results']]
+        self.assertEqual(sorted(titles), ['workspace 1', 'workspace 2'])
+
+        self.client.delete(workspace_url(workspace2))
+        titles = [workspace['title'] for workspace in self.client.get(WORKSPACE_URL_LIST).data['results']]
+        self.assertEqual(titles, ['workspace 1'])
+
+    def test_me(self):
+        self.client.get(ME_URL)
+
+        self.client.post(TODO_URL_LIST, {'title': 'todo 2', 'workspace': self.workspace.pk, 'completed': True})
+        # The workspaces and the counts of their TODOs
+        with self.assertNumQueries(2):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.data['workspaces'][0]['counts']['total'], 2)
+        self.assertEqual(response.data['workspaces'][0]['counts']['completed'], 1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(ME_URL).data, response.data)
+
+    def test_admin_user_change(self):
+        """
+        The user is never cached, a change from the admin is seen at once
+        """
+        token = Token.objects.create(user=self.user)
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(ME_URL)
+
+        admin = models.User.objects.create_superuser(email='admin@gmail.com', password='testpass123')
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:core_user_change', args=[self.user.pk]), {
+            'email': self.user.email, 'name': 'admin name', 'is_active': 'on', 'last_login_0': '', 'last_login_1': ''})
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+        self.assertEqual(self.client.get(ME_URL).data['user']['name'], 'admin name')
+
+    def test_per_user(self):
+        """
+        Another user reading the same URL gets their own response
+        """
+        self.get_titles()
+
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        client2 = APIClient()
+        client2.force_authenticate(user2)
+        response = client2.get(TODO_URL_LIST)
+
+        self.assertEqual(response.data['results'], [])
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.get_titles()
+        with self.assertNumQueries(1):
+            response = self.client.get(TODO_URL_LIST)
+
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotIn('cache;', response['Server-Timing'])
+
+
+class AsyncResponseCacheTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.token = Token.objects.create(user=self.user)
+        self.factory = AsyncRequestFactory()
+
+        caching.get_cache().clear()
+        self.addCleanup(caching.get_cache().clear)
+
+    async def get(self, view, url, **kwargs):
+        request = self.factory.get(url, headers={'authorization': f'Token {self.token.key}'})
+        response = await view.as_view()(request, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    async def test_todo_list(self):
+        await self.get(AsyncTodoListView, TODO_URL_LIST)
+        await models.Todo.objects.acreate(title='todo 1', user=self.user, workspace=self.workspace)
+
+        response = await self.get(AsyncTodoListView, TODO_URL_LIST)
+
+        self.assertEqual([todo['title'] for todo in response.data['results']], ['todo 1'])
+
+    async def test_workspace_detail(self):
+        await self.get(AsyncWorkspaceDetailView, workspace_url(self.workspace), pk=str(self.workspace.pk))
+        await models.Todo.objects.acreate(title='todo 1', user=self.user, workspace=self.workspace)
+
+        response = await self.get(AsyncWorkspaceDetailView, workspace_url(self.workspace), pk=str(self.workspace.pk))
+
+        self.assertEqual([todo['title'] for todo in response.data['TODOs']], ['todo 1'])
+
+    async def test_me(self):
+        await self.get(AsyncManageUserView, f'{ME_URL}?include=todos')
+        await models.Todo.objects.acreate(title='todo 1', user=self.user, workspace=self.workspace)
+
+        response = await self.get(AsyncManageUserView, f'{ME_URL}?include=todos')
+
+        self.assertEqual(response.data['workspaces'][0]['counts']['total'], 1)
+        self.assertEqual([todo['title'] for todo in response.data['workspaces'][0]['TODOs']], ['todo 1'])
@@ -0,0 +1,172 @@
+import gzip
+import json
+from unittest import skipIf
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import caching, models
+from core.compression import accepted_encodings, brotli, get_encoding
+from core.middleware import CompressionMiddleware
+from core.renderers import msgpack
+
+TODO_URL_LIST = reverse('todo:todo-list')
+TODO_URL_EXPORT = reverse('todo:todo-export')
+
+
+def workspace_url(workspace):
+    return reverse('workspace:workspace-detail', args=[workspace.pk])
+
+
+class AcceptEncodingTests(TestCase):
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('GZIP;q=0.5, br;q=0, identity; q=0.0'), {'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_first(self):
+        self.assertEqual(get_encoding('gzip, br'), 'br')
+        self.assertEqual(get_encoding('gzip, br;q=0'), 'gzip')
+        self.assertIsNone(get_encoding('deflate'))
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        models.Todo.objects.bulk_create([
+            models.Todo(title=f'todo {index}', user=self.user, workspace=self.workspace) for index in range(20)])
+        self.client.force_authenticate(self.user)
+
+        caching.get_cache().clear()
+        self.addCleanup(caching.get_cache().clear)
+
+    def test_gzip(self):
+        plain = self.client.get(TODO_URL_LIST)
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        plain = self.client.get(TODO_URL_LIST)
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_not_accepted(self):
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT_ENCODING='identity')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()['results']), 20)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100000)
+    def test_small_response(self):
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION=False)
+    def test_disabled(self):
+        response = self.client.get(TODO_URL_LIST, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag(self):
+        """
+        The ETag of a compressed response is weak, and still gets a 304 when it is sent back
+        """
+        response = self.client.get(workspace_url(self.workspace), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        response = self.client.get(
+            workspace_url(self.workspace), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_streamed_export(self):
+        response = self.client.get(TODO_URL_EXPORT, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(json.loads(lines[0])['title'], 'todo 0')
+
+    def test_event_stream(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse([b'data: 1\n\n' * 1000], content_type='text/event-stream')
+
+        response = CompressionMiddleware(lambda request: response)(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    async def test_async_stream(self):
+        async def chunks():
+            for index in range(3):
+                yield f'chunk {index}\n' * 100
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(lambda request: StreamingHttpResponse(chunks()))
+        response = middleware.process_response(request, middleware.get_response(request))
+
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(content).decode(), ''.join(f'chunk {index}\n' * 100 for index in range(3)))
+
+    def test_incompressible(self):
+        """
+        A body the compression doesn't make smaller is sent as it is
+        """
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        content = bytes(range(256)) * 8
+
+        response = CompressionMiddleware(lambda request: HttpResponse(gzip.compress(content)))(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+        self.client.force_authenticate(self.user)
+
+        caching.get_cache().clear()
+        self.addCleanup(caching.get_cache().clear)
+
+    def test_negotiation(self):
+        for url in (TODO_URL_LIST, workspace_url(self.workspace), reverse('user:me')):
+            plain = self.client.get(url)
+            response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(response.content), plain.json())
+
+    def test_format_param(self):
+        response = self.client.get(TODO_URL_LIST, {'format': 'msgpack'})
+
+        self.assertEqual(msgpack.unpackb(response.content)['results'][0]['title'], 'todo 1')
+
+    def test_errors(self):
+        response = self.client.get(TODO_URL_LIST, {'fields': 'secret'}, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', msgpack.unpackb(response.content))
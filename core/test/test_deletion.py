@@ -0,0 +1,154 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import deletion, jobs, models
+
+TODO_URL_LIST = reverse('todo:todo-list')
+WORKSPACE_URL_LIST = reverse('workspace:workspace-list')
+SYNC_URL = reverse('sync:sync')
+
+
+def workspace_url(workspace):
+    return reverse('workspace:workspace-detail', args=[workspace.pk])
+
+
+@override_settings(PURGE_THRESHOLD=3, PURGE_BATCH_SIZE=2)
+class DeletionTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_todos(self, count, workspace=None, user=None):
+        todos = [
+            models.Todo(title=f'todo {index}', user=user or self.user, workspace=workspace or self.workspace)
+            for index in range(count)
+        ]
+        models.set_changes(todos)
+        models.Todo.objects.bulk_create(todos)
+        models.Workspace.objects.reconcile_todo_counters()
+
+    def test_delete_small_workspace(self):
+        """
+        A workspace under the threshold is deleted in the request, its TODOs with a single DELETE
+        """
+        self.create_todos(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(workspace_url(self.workspace))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Job.objects.exists())
+        self.assertFalse(models.Workspace.all_objects.exists())
+        self.assertFalse(models.Todo.objects.exists())
+        self.assertEqual(
+            len([query for query in queries if query['sql'].startswith('DELETE FROM "core_todo"')]), 1)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "core_todo"')])
+
+    def test_stale_save_keeps_deleted(self):
+        """
+        A copy of the workspace loaded before it was marked as deleted doesn't bring it back when saved
+        """
+        stale = models.Workspace.objects.get(pk=self.workspace.pk)
+        models.Workspace.objects.filter(pk=self.workspace.pk).mark_deleted()
+
+        stale.title = 'workspace 2'
+        stale.save()
+
+        self.assertFalse(models.Workspace.objects.filter(pk=self.workspace.pk).exists())
+        self.assertEqual(models.Workspace.all_objects.get(pk=self.workspace.pk).title, 'workspace 2')
+
+    def test_delete_big_workspace(self):
+        """
+        A workspace at the threshold is hidden with its TODOs at once and purged in batches by a job
+        """
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        self.create_todos(3)
+        self.create_todos(1, workspace2)
+
+        response = self.client.delete(workspace_url(self.workspace))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = models.Job.objects.get()
+        self.assertEqual(
+            (job.name, job.args, job.user), ('core.deletion.purge_workspace', [str(self.workspace.pk)], self.user))
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(response['Location'], f'http://testserver{reverse("job:job-detail", args=[job.pk])}')
+        self.assertEqual(models.Todo.objects.count(), 4)
+        self.assertEqual(self.client.get(workspace_url(self.workspace)).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual([row['id'] for row in self.client.get(WORKSPACE_URL_LIST).data['results']],
+                         [str(workspace2.pk)])
+        self.assertEqual(len(self.client.get(TODO_URL_LIST).data['results']), 1)
+        sync = self.client.get(SYNC_URL).data
+        self.assertEqual(len(sync['todos']['changed']), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(jobs.work(once=True), 1)
+
+        # Batches of 2, 1 and none, and the cascade of the workspace, with nothing left to delete
+        self.assertEqual(
+            len([query for query in queries if query['sql'].startswith('DELETE FROM "core_todo"')]), 4)
+        self.assertFalse(models.Workspace.all_objects.filter(pk=self.workspace.pk).exists())
+        self.assertEqual(models.Todo.objects.count(), 1)
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'done')
+
+    def test_delete_big_user(self):
+        """
+        A user with many TODOs is deactivated at once and purged in the background
+        """
+        self.create_todos(3)
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(client.get(TODO_URL_LIST).status_code, status.HTTP_200_OK)
+
+        response = client.delete(reverse('user:me_detail', args=[self.user.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(client.get(TODO_URL_LIST).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(models.Workspace.objects.exists())
+
+        jobs.work(once=True)
+
+        self.assertFalse(models.User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(models.Workspace.all_objects.exists())
+        self.assertFalse(models.Todo.objects.exists())
+        self.assertEqual(models.Job.objects.get().status, 'done')
+
+    def test_delete_small_user(self):
+        self.create_todos(2)
+
+        response = self.client.delete(reverse('user:me_detail', args=[self.user.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Job.objects.exists())
+        self.assertFalse(models.User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(models.Todo.objects.exists())
+
+    def test_purge_deleted_command(self):
+        """
+        The command finishes the purges that were interrupted
+        """
+        self.create_todos(3)
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        self.create_todos(3, models.Workspace.objects.create(title='workspace 2', user=user2), user2)
+        deletion.delete_workspace(self.workspace)
+        deletion.delete_user(models.User.objects.get(pk=user2.pk))
+
+        self.assertEqual(models.Workspace.all_objects.count(), 1)
+        models.User.objects.filter(pk=self.user.pk).update(deleted=None)
+
+        call_command('purge_deleted', stdout=open('/dev/null', 'w'))
+
+        self.assertFalse(models.Workspace.all_objects.exists())
+        self.assertFalse(models.Todo.objects.exists())
+        self.assertEqual(list(models.User.objects.all()), [self.user])
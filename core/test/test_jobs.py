@@ -0,0 +1,142 @@
+import datetime
+from io import StringIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs, models
+
+CALLS = []
+
+
+@jobs.task
+def add(a, b):
+    CALLS.append((a, b))
+    return a + b
+
+
+@jobs.task(max_attempts=2)
+def fail():
+    CALLS.append('fail')
+    raise ValueError('boom')
+
+
+def not_a_task():
+    pass
+
+
+@override_settings(JOB_RETRY_DELAY=10, JOB_VISIBILITY_TIMEOUT=60)
+class JobTests(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_run(self):
+        job = jobs.enqueue(add, 1, 2)
+
+        self.assertEqual(jobs.work(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts, job.locked_until), ('done', 3, 1, None))
+        self.assertEqual(CALLS, [(1, 2)])
+        self.assertEqual(jobs.work(once=True), 0)
+
+    def test_order(self):
+        first = jobs.enqueue(add, 1, 1)
+        jobs.enqueue(add, 2, 2)
+        models.Job.objects.filter(pk=first.pk).update(run_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        jobs.work(once=True)
+
+        self.assertEqual(CALLS, [(1, 1), (2, 2)])
+
+    def test_retry(self):
+        """
+        A failing job is queued again with a delay that doubles, until it fails for good
+        """
+        job = jobs.enqueue(fail)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.work(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('ValueError: boom', job.error)
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=2)
+        # Not due yet
+        self.assertEqual(jobs.work(once=True), 0)
+
+        models.Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.work(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(CALLS, ['fail', 'fail'])
+
+    def test_visibility_timeout(self):
+        """
+        A job whose worker died is claimed again once its visibility timeout expires, and the late
+        worker can't finish it anymore
+        """
+        job = jobs.enqueue(add, 1, 2)
+        claimed = models.Job.objects.claim(60)
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(models.Job.objects.claim(60))
+
+        models.Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        reclaimed = models.Job.objects.claim(60)
+
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        self.assertEqual(jobs.finish(claimed, status=models.Job.DONE), 0)
+        self.assertTrue(jobs.execute(reclaimed))
+        self.assertEqual(models.Job.objects.get().status, 'done')
+
+        # A job whose worker dies on its last attempt fails instead of being claimed again
+        job = jobs.enqueue(fail)
+        for attempt in (1, 2):
+            self.assertEqual(models.Job.objects.claim(60).attempts, attempt)
+            models.Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+
+        self.assertIsNone(models.Job.objects.claim(60))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('visibility timeout', job.error)
+        self.assertEqual(CALLS, [(1, 2)])
+
+    def test_unknown_task(self):
+        job = models.Job.objects.create(name='core.test.test_jobs.missing', max_attempts=1)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.work(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Unknown task', job.error)
+
+    def test_enqueue_not_a_task(self):
+        with self.assertRaises(ImproperlyConfigured):
+            jobs.enqueue(not_a_task)
+
+    def test_run_jobs_command(self):
+        jobs.enqueue(add, 1, 2)
+        out = StringIO()
+
+        call_command('run_jobs', '--once', stdout=out)
+
+        self.assertIn('1 jobs run', out.getvalue())
+
+    def test_reconcile_in_background(self):
+        user = models.User.objects.create_user(email='test@gmail.com', password='testpass123')
+        workspace = models.Workspace.objects.create(title='workspace 1', user=user)
+        models.Todo.objects.create(title='todo 1', user=user, workspace=workspace)
+        models.Workspace.objects.filter(pk=workspace.pk).update(todos_total=5)
+
+        call_command('reconcile_todo_counters', '--background', stdout=StringIO())
+        jobs.work(once=True)
+
+        workspace.refresh_from_db()
+        self.assertEqual(workspace.todos_total, 1)
+        self.assertEqual(models.Job.objects.get().result, 1)
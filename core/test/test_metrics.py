@@ -0,0 +1,78 @@
+import os
+import re
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import caching, metrics
+from core.models import User, Workspace, Todo
+
+TODO_URL_LIST = reverse('todo:todo-list')
+METRICS_URL = reverse('metrics')
+
+
+class MetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        workspace = Workspace.objects.create(title='workspace 1', user=self.user)
+        Todo.objects.create(title='todo 1', user=self.user, workspace=workspace)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        for counter in metrics.COUNTERS:
+            counter.clear()
+        caching.get_cache().clear()
+
+    def test_server_timing(self):
+        """
+        We list the TODOs and check that the Server-Timing header has the queries the request made
+        """
+        response = self.client.get(TODO_URL_LIST)
+
+        timing = response['Server-Timing']
+        self.assertRegex(
+            timing, r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+, cache;desc="miss"$')
+        self.assertGreater(int(re.search(r'(\d+) queries', timing).group(1)), 0)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_by_route(self):
+        self.client.get(TODO_URL_LIST)
+        self.client.get(reverse('user:me'))
+
+        response = APIClient().get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_count{route="todo:todo-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_count{route="user:me",method="GET"} 1', body)
+        self.assertIn('# TYPE http_request_serialize_duration_seconds histogram', body)
+
+    def test_metrics_requires_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+
+        with override_settings(METRICS_TOKEN='secret'):
+            response = APIClient().get(METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_staff_user(self):
+        """
+        We ask for a profile as a staff user and as a regular user, and check that only the first one is
+        written
+        """
+        with tempfile.TemporaryDirectory() as profile_dir, override_settings(PROFILE_DIR=profile_dir):
+            response = self.client.get(TODO_URL_LIST, HTTP_X_PROFILE='1')
+            self.assertFalse(response.has_header('X-Profile'))
+
+            self.user.is_staff = True
+            self.user.save()
+            response = self.client.get(TODO_URL_LIST, HTTP_X_PROFILE='1')
+
+            self.assertTrue(response['X-Profile'].startswith('todo-todo-list-'))
+            self.assertEqual(os.listdir(profile_dir), [response['X-Profile']])
@@ -0,0 +1,115 @@
+import datetime
+import decimal
+import json
+from unittest import skipIf
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.renderers import JSONRenderer
+
+from core import models
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from todo.serializers import TodoSerializer, TODO_VALUES
+from workspace.serializers import WorkspaceSerializer, WORKSPACE_VALUES
+
+
+class ValuesSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123')
+        self.workspace = models.Workspace.objects.create(title='workspace é\u2028', user=self.user)
+        models.Todo.objects.create(
+            title='todo "1"\n日本', user=self.user, workspace=self.workspace, description=None)
+        models.Todo.objects.create(
+            title='todo 2', user=self.user, workspace=self.workspace, description='\x1f \u2029 \U0001f600',
+            completed=True, status='done', priority='high')
+
+    def test_todo_representation(self):
+        """
+        The rows of `.values()` get the same representation, value types and key order as the instances
+        get from TodoSerializer
+        """
+        todos = models.Todo.objects.order_by('created', 'id')
+
+        expected = TodoSerializer(todos, many=True).data
+        data = TODO_VALUES.serialize(TODO_VALUES.values(todos))
+
+        self.assertEqual(data, expected)
+        self.assertEqual([list(item.items()) for item in data], [list(item.items()) for item in expected])
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_workspace_representation(self):
+        models.Workspace.objects.reconcile_todo_counters()
+        workspaces = models.Workspace.objects.order_by('created', 'id')
+
+        expected = WorkspaceSerializer(workspaces, many=True).data
+        data = WORKSPACE_VALUES.serialize(WORKSPACE_VALUES.values(workspaces))
+
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+
+class FastJSONRendererTests(TestCase):
+
+    def assertSameBytes(self, data, accepted_media_type='application/json'):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertSameBytes({
+            'text': 'x\x00\x1f\x7f"\\/\b\f\n\r\t é \u2028 \u2029 \U0001f600',
+            'numbers': [0, -1, 2 ** 63 - 1, True, False, None],
+            'nested': {'list': [{}, [], '']},
+        })
+
+    def test_same_bytes_for_drf_types(self):
+        """
+        The types orjson writes differently or does not know go through the DRF encoder
+        """
+        self.assertSameBytes({
+            'datetime': datetime.datetime(2022, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2022, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'timedelta': datetime.timedelta(seconds=90),
+            'decimal': decimal.Decimal('1.10'),
+            'lazy': _('Not found.'),
+            'set': {1},
+        })
+
+    def test_falls_back_to_json_renderer(self):
+        self.assertSameBytes({'big': 2 ** 64, 1: 'int key'})
+        self.assertSameBytes({'indented': [1, 2]}, 'application/json; indent=4')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_non_finite_floats(self):
+        """
+        orjson writes NaN and Infinity as null, the DRF renderer refuses them
+        """
+        data = {'values': [float('nan'), float('inf'), float('-inf')]}
+
+        self.assertEqual(FastJSONRenderer().render(data), b'{"values":[null,null,null]}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackRendererTests(TestCase):
+
+    def test_same_values_as_json(self):
+        """
+        The DRF types are written as the same strings as in JSON
+        """
+        data = {
+            'text': 'x é \U0001f600',
+            'numbers': [0, -1, 2 ** 63 - 1, True, False, None],
+            'datetime': datetime.datetime(2022, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'decimal': decimal.Decimal('1.10'),
+            'lazy': _('Not found.'),
+        }
+
+        rendered = MessagePackRenderer().render(data)
+
+        self.assertEqual(msgpack.unpackb(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(MessagePackRenderer().render(None), b'')
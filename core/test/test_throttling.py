@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core.throttling import SlidingWindowRateThrottle
+
+TODO_URL_LIST = reverse('todo:todo-list')
+WORKSPACE_URL_LIST = reverse('workspace:workspace-list')
+CREATE_USER_URL = reverse('user:create')
+
+RATES = {
+    **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+    'user': '10/min', 'todo_read': '5/min', 'todo_write': '2/min', 'signup': '2/hour',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES})
+class ThrottlingTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        # Start at the beginning of a window
+        self.now = 6000.0
+        timer = patch.object(SlidingWindowRateThrottle, 'timer', lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def burst(self, count, method='get', url=TODO_URL_LIST, client=None, **data):
+        client = client or self.client
+        return [getattr(client, method)(url, data).status_code for _ in range(count)]
+
+    def test_reads_burst(self):
+        """
+        A client polling the TODO list in a loop is rejected after the rate, with the seconds until it can
+        send the next request in Retry-After
+        """
+        self.assertEqual(self.burst(5), [status.HTTP_200_OK] * 5)
+
+        response = self.client.get(TODO_URL_LIST)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 6 requests in the window, the next one fits when 4 of them are left in the last minute
+        self.assertEqual(response['Retry-After'], '80')
+
+    def test_window_slides(self):
+        """
+        The requests of the previous window count less as it moves away, so the client gets requests back
+        progressively instead of all of them at once when the window changes. The rejected requests count
+        too, a client retrying in a loop stays throttled.
+        """
+        self.burst(6)
+
+        self.now += 80
+        self.assertEqual(self.burst(2), [status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+
+        self.now += 10
+        self.assertEqual(self.client.get(TODO_URL_LIST).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.now += 120
+        self.assertEqual(self.burst(6), [status.HTTP_200_OK] * 5 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_reads_and_writes_have_their_own_rate(self):
+        self.burst(6)
+
+        statuses = self.burst(3, 'post', title='todo 1', workspace=self.workspace.pk)
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_rates_are_per_user(self):
+        self.burst(6)
+
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        client2 = APIClient()
+        client2.force_authenticate(user2)
+
+        self.assertEqual(self.burst(5, client=client2), [status.HTTP_200_OK] * 5)
+
+    def test_default_rate(self):
+        """
+        The views without a rate of their own have the per user rate
+        """
+        statuses = self.burst(11, url=WORKSPACE_URL_LIST)
+
+        self.assertEqual(statuses, [status.HTTP_200_OK] * 10 + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_signup_burst(self):
+        client = APIClient()
+        statuses = [
+            client.post(CREATE_USER_URL, {'email': f'new{index}@gmail.com', 'password': 'testpass123'}).status_code
+            for index in range(3)
+        ]
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertFalse(models.User.objects.filter(email='new2@gmail.com').exists())
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {scope: None for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}})
+    def test_disabled(self):
+        self.assertEqual(self.burst(20), [status.HTTP_200_OK] * 20)
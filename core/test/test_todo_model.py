@@ -36,3 +36,62 @@ class TodoModelTest(TestCase):
         self.assertEqual(todo.workspace, self.workspace)
         self.assertEqual(todo.title, 'todo test 1')
         self.assertTrue(exist)
+
+    def test_todo_dates(self):
+        """
+        We create a todo and save it again, then we check that `created` is kept and `updated` moves
+        """
+        todo = Todo.objects.create(
+            title='todo test 1',
+            user=self.user,
+            workspace=self.workspace,
+        )
+        created, updated = todo.created, todo.updated
+
+        todo.title = 'todo test 2'
+        todo.save()
+        todo.refresh_from_db()
+
+        self.assertEqual(todo.created, created)
+        self.assertGreater(todo.updated, updated)
+
+    def test_todo_change_bumps_workspace_version(self):
+        """
+        We move a todo to another workspace and check that the version of both workspaces is bumped
+        """
+        workspace2 = Workspace.objects.create(title='workspace test 2', user=self.user)
+        todo = Todo.objects.create(
+            title='todo test 1',
+            user=self.user,
+            workspace=self.workspace,
+        )
+        self.workspace.refresh_from_db()
+        version = self.workspace.version
+
+        todo = Todo.objects.get(pk=todo.pk)
+        todo.workspace = workspace2
+        todo.save()
+
+        self.workspace.refresh_from_db()
+        workspace2.refresh_from_db()
+
+        self.assertEqual(self.workspace.version, version + 1)
+        self.assertEqual(workspace2.version, 1)
+
+    def test_todo_change_position(self):
+        """
+        We save a todo twice and check that every save moves it to the end of the change log of its user,
+        even when a stale copy of the user is saved in between
+        """
+        stale_user = get_user_model().objects.get(pk=self.user.pk)
+        todo = Todo.objects.create(title='todo test 1', user=self.user, workspace=self.workspace)
+        first = todo.change
+
+        stale_user.name = 'test2'
+        stale_user.save()
+        todo.save()
+        self.user.refresh_from_db()
+
+        self.assertEqual(first, self.workspace.change + 1)
+        self.assertEqual(todo.change, first + 1)
+        self.assertEqual(self.user.last_change, todo.change)
@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from core.models import Workspace
+from core.models import Workspace, Todo
 
 
 class WorkspaceModelTest(TestCase):
@@ -28,3 +31,57 @@ class WorkspaceModelTest(TestCase):
             user=self.user
         )
         self.assertEqual(workspace.__str__(), 'test title')
+
+    def counters(self, workspace):
+        workspace.refresh_from_db()
+        return (workspace.todos_total, workspace.todos_completed, workspace.todos_pending,
+                workspace.todos_in_progress, workspace.todos_done)
+
+    def test_todo_counters(self):
+        """
+        We create, update and move TODOs and check that the counters of both workspaces follow them
+        """
+        workspace = Workspace.objects.create(title='workspace 1', user=self.user)
+        workspace2 = Workspace.objects.create(title='workspace 2', user=self.user)
+        todo = Todo.objects.create(title='todo 1', user=self.user, workspace=workspace)
+        Todo.objects.create(title='todo 2', user=self.user, workspace=workspace, status='in progress')
+        self.assertEqual(self.counters(workspace), (2, 0, 1, 1, 0))
+
+        todo.status = 'done'
+        todo.completed = True
+        todo.save()
+        self.assertEqual(self.counters(workspace), (2, 1, 0, 1, 1))
+
+        todo = Todo.objects.get(pk=todo.pk)
+        todo.workspace = workspace2
+        todo.save()
+        self.assertEqual(self.counters(workspace), (1, 0, 0, 1, 0))
+        self.assertEqual(self.counters(workspace2), (1, 1, 0, 0, 1))
+
+    def test_stale_workspace_save_keeps_counters(self):
+        workspace = Workspace.objects.create(title='workspace 1', user=self.user)
+        stale = Workspace.objects.get(pk=workspace.pk)
+        Todo.objects.create(title='todo 1', user=self.user, workspace=workspace)
+
+        stale.title = 'new title'
+        stale.save()
+
+        self.assertEqual(self.counters(workspace), (1, 0, 1, 0, 0))
+        self.assertEqual(workspace.title, 'new title')
+
+    def test_reconcile_todo_counters(self):
+        """
+        We break the counters of a workspace and check that the command reports and fixes them
+        """
+        workspace = Workspace.objects.create(title='workspace 1', user=self.user)
+        Todo.objects.create(title='todo 1', user=self.user, workspace=workspace, completed=True)
+        Workspace.objects.filter(pk=workspace.pk).update(todos_total=5, todos_completed=0)
+
+        out = StringIO()
+        call_command('reconcile_todo_counters', '--dry-run', stdout=out)
+        self.assertIn(f'{workspace.pk}: todos_total 5 -> 1, todos_completed 0 -> 1', out.getvalue())
+        self.assertEqual(self.counters(workspace), (5, 0, 1, 0, 0))
+
+        call_command('reconcile_todo_counters', stdout=StringIO())
+        self.assertEqual(self.counters(workspace), (1, 1, 1, 0, 0))
+        self.assertFalse(Workspace.objects.drifted().exists())
@@ -0,0 +1,157 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle that counts the requests with a sliding window counter in the `THROTTLE_CACHE`
+    cache instead of keeping the timestamp of every request.
+
+    A client has a counter per fixed window of the rate duration. The requests of the last duration are
+    estimated as the requests of the current window plus the ones of the previous window weighted by how
+    much of it is still inside the last duration. Every request costs two cache reads and one atomic
+    increment, whatever the rate, and the limit holds across processes when the cache is shared (Redis).
+
+    The rejected requests are counted too, so a client that keeps retrying in a loop stays throttled.
+    The rates are read from the settings on every request, `override_settings` changes them.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE]
+        super().__init__()
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        # Seconds of the current window that have passed
+        self.elapsed = now - window * self.duration
+
+        self.previous = self.cache.get(f'{self.key}:{window - 1}', 0)
+        self.current = self.increment(f'{self.key}:{window}')
+
+        if self.previous * (self.duration - self.elapsed) / self.duration + self.current > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def increment(self, key):
+        # The counter must outlive its window, it is the previous window of the next one
+        timeout = self.duration * 2
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # It expired between both calls
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """
+        It returns the seconds until the next request fits in the window
+        """
+        allowed = self.num_requests - 1
+        if self.current <= allowed:
+            # Once the previous window weighs little enough
+            wait = self.duration - (allowed - self.current) * self.duration / self.previous - self.elapsed
+        else:
+            # In the next window, once this one weighs little enough as its previous window
+            wait = 2 * self.duration - allowed * self.duration / self.current - self.elapsed
+
+        # Rounded to the millisecond, so the float error doesn't add a second to Retry-After
+        return round(max(wait, 0), 3)
+
+
+class UserRateThrottle(SlidingWindowRateThrottle):
+    """
+    Requests per user, or per IP for the anonymous requests. It is the default throttle of every view.
+    """
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = f'anon-{self.get_ident(request)}'
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ReadWriteRateThrottle(UserRateThrottle):
+    """
+    Requests per user to the views with a `throttle_scope`, with a rate for the reads
+    (`<throttle_scope>_read`) and another one for the writes (`<throttle_scope>_write`)
+    """
+
+    def __init__(self):
+        # The rate depends on the view and the method, it is set by `allow_request`
+        pass
+
+    def allow_request(self, request, view):
+        self.cache = caches[settings.THROTTLE_CACHE]
+        self.scope = f'{view.throttle_scope}_{"read" if request.method in SAFE_METHODS else "write"}'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
+
+
+class IPRateThrottle(SlidingWindowRateThrottle):
+    """
+    Requests per client IP, authenticated or not
+    """
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class SignupRateThrottle(IPRateThrottle):
+    """
+    Signups per client IP
+    """
+    scope = 'signup'
+
+
+class LoginRateThrottle(IPRateThrottle):
+    """
+    Login attempts per client IP, checked before the password is hashed
+    """
+    scope = 'login'
+
+
+class LoginEmailRateThrottle(SlidingWindowRateThrottle):
+    """
+    Login attempts per email, whatever IPs they come from, so the passwords of one account can't be
+    guessed from many addresses
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,188 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics as request_metrics
+from core.filters import annotation_name
+from core.serializers import get_field_selection
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines, for the read paths served by the ASGI application.
+
+    The view wraps the sync view of the same endpoint (`sync_view_class`) so the queryset, filters,
+    pagination and serializers stay the ones of the sync API; only the database reads are awaited.
+    Authenticators with an `aauthenticate` method are awaited too, the rest run in a worker thread.
+    """
+    sync_view_class = None
+    action = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request):
+        """
+        It authenticates the request before `initial` runs, so `request.user` is already set when the
+        permissions read it
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except Exception:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    def get_sync_view(self):
+        """
+        It returns an instance of `sync_view_class` set up for the current request
+        """
+        view = self.sync_view_class(
+            request=self.request,
+            args=self.args,
+            kwargs=self.kwargs,
+            format_kwarg=self.format_kwarg,
+            action=self.action,
+        )
+        view.headers = self.headers
+        return view
+
+    async def aget_object(self, view):
+        """
+        Async version of GenericAPIView.get_object
+        """
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+
+        try:
+            obj = await queryset.aget(**{view.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        view.check_object_permissions(self.request, obj)
+        return obj
+
+
+class ValuesListMixin:
+    """
+    It lists the queryset through `values_serializer`, the ValuesSerializer of the view serializer, so
+    the rows are read with `.values()` and no model instance nor serializer is built per row.
+
+    With `sparse_fields`, `?fields=` and `?omit=` select the fields of the items, only their columns are
+    read. The params always select TODO fields, so only the TODO views turn it on.
+    """
+    values_serializer = None
+    sparse_fields = False
+
+    def get_fields(self):
+        """
+        It returns the fields asked with `?fields=` and `?omit=`, None for every field
+        """
+        if not self.sparse_fields:
+            return None
+        return get_field_selection(self.request, self.values_serializer.names)
+
+    def get_values_serializer(self):
+        fields = self.get_fields()
+        return self.values_serializer if fields is None else self.values_serializer.only(*fields)
+
+    def get_values(self, queryset):
+        """
+        It returns the rows of the queryset with the columns of the representation and the ordering
+        fields the cursor pagination reads its position from
+        """
+        ordering = (
+            *(getattr(self, 'ordering_fields', None) or ()),
+            *map(annotation_name, getattr(self, 'ordering_annotations', None) or ()),
+            *self.paginator.ordering,
+        )
+        return self.get_values_serializer().values(queryset, *(field.lstrip('-') for field in ordering))
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_list_data())
+
+    def get_list_data(self):
+        """
+        It returns the data of the list response, a page when the view is paginated
+        """
+        queryset = self.get_values(self.filter_queryset(self.get_queryset()))
+        values_serializer = self.get_values_serializer()
+
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return values_serializer.serialize(queryset)
+        return self.get_paginated_response(values_serializer.serialize(page)).data
+
+
+def async_reads(async_view, sync_view):
+    """
+    It serves GET and HEAD requests with an async view and every other method with its sync view,
+    run in a worker thread, so both can share the same URL in the ASGI application
+
+    :param async_view: The view of the read requests
+    :param sync_view: The view of the write requests
+    :return: An async view.
+    """
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+def metrics(request):
+    """
+    It returns the request histograms of this process in the Prometheus text format, to the requests
+    with the `METRICS_TOKEN` bearer token
+
+    :param request: The request object
+    :return: The metrics, or a 404 when the token is missing or wrong.
+    """
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if not settings.METRICS_TOKEN or not constant_time_compare(request.headers.get('Authorization', ''), expected):
+        raise Http404
+
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
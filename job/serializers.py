@@ -0,0 +1,10 @@
+from rest_framework.serializers import ModelSerializer
+
+from core.models import Job
+
+
+class JobSerializer(ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'status', 'attempts', 'result', 'created', 'updated')
+        read_only_fields = fields
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+
+def job_url(job):
+    return reverse('job:job-detail', args=[job.pk])
+
+
+class JobApiTests(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123')
+        self.job = models.Job.objects.create(name='core.deletion.purge_user', max_attempts=1, user=self.user)
+        self.client = APIClient()
+
+    def test_login_required(self):
+        response = self.client.get(job_url(self.job))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_retrieve_job(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(job_url(self.job))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(set(response.data), {'id', 'status', 'attempts', 'result', 'created', 'updated'})
+
+    def test_job_of_other_user(self):
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        self.client.force_authenticate(user2)
+
+        response = self.client.get(job_url(self.job))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from job import views
+
+app_name = 'job'
+
+urlpatterns = [
+    path('<uuid:pk>/', views.JobView.as_view(), name='job-detail'),
+]
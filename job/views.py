@@ -0,0 +1,34 @@
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from core.authentication import CachedTokenAuthentication
+from core.models import Job
+from job.serializers import JobSerializer
+
+
+class JobView(generics.RetrieveAPIView):
+    """
+    GET /api/job/<id>/ returns the status of a background job of the user: queued, running, done or
+    failed, with the result of the task once it is done
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+def accepted(request, job):
+    """
+    It builds the response of a request whose work is left to a background job: a 202 with the job,
+    and its status endpoint as Location
+
+    :param request: The request object
+    :param job: The job
+    :return: The response.
+    """
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': reverse('job:job-detail', args=[job.pk], request=request)})
@@ -0,0 +1,109 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import User, Workspace, Todo
+
+SYNC_URL = reverse('sync:sync')
+TODO_URL_BULK = reverse('todo:todo-bulk')
+
+
+def create_user(**params):
+    return User.objects.create_user(**params)
+
+
+class PublicSyncApiTests(TestCase):
+
+    def test_login_required(self):
+        response = APIClient().get(SYNC_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSyncApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = Workspace.objects.create(title='workspace 1', user=self.user)
+        self.todo = Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor=None):
+        response = self.client.get(SYNC_URL, {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_first_sync_returns_everything(self):
+        user2 = create_user(email='test2@gmail.com', password='testpass123')
+        Workspace.objects.create(title='workspace 2', user=user2)
+
+        data = self.sync()
+
+        self.assertFalse(data['more'])
+        self.assertEqual([workspace['id'] for workspace in data['workspaces']['changed']], [str(self.workspace.pk)])
+        self.assertEqual([todo['id'] for todo in data['todos']['changed']], [str(self.todo.pk)])
+        self.assertEqual(data['todos']['deleted'], [])
+
+    def test_sync_returns_changes_since_cursor(self):
+        """
+        We sync, change a todo, create another, delete a third one and delete a workspace, then check that
+        the next sync only returns those changes
+        """
+        deleted = Todo.objects.create(title='todo 2', user=self.user, workspace=self.workspace)
+        workspace2 = Workspace.objects.create(title='workspace 2', user=self.user)
+        cursor = self.sync()['cursor']
+
+        self.client.patch(reverse('todo:todo-detail', args=[self.todo.pk]), {'completed': True})
+        created = self.client.post(reverse('todo:todo-list'), {'title': 'todo 3', 'workspace': self.workspace.pk})
+        self.client.delete(reverse('todo:todo-detail', args=[deleted.pk]))
+        self.client.delete(reverse('workspace:workspace-detail', args=[workspace2.pk]))
+
+        data = self.sync(cursor)
+
+        self.assertEqual(data['workspaces']['changed'], [])
+        self.assertEqual(data['workspaces']['deleted'], [workspace2.pk])
+        self.assertEqual(
+            [todo['id'] for todo in data['todos']['changed']], [str(self.todo.pk), created.data['id']])
+        self.assertTrue(data['todos']['changed'][0]['completed'])
+        self.assertEqual(data['todos']['deleted'], [deleted.pk])
+
+        self.assertEqual(self.sync(data['cursor'])['todos'], {'changed': [], 'deleted': []})
+
+    def test_sync_bulk_changes(self):
+        cursor = self.sync()['cursor']
+        payload = {
+            'create': [{'title': f'new todo {i}', 'workspace': str(self.workspace.pk)} for i in range(2)],
+            'delete': [str(self.todo.pk)],
+        }
+        self.client.post(TODO_URL_BULK, payload, format='json')
+
+        data = self.sync(cursor)
+
+        self.assertEqual([todo['title'] for todo in data['todos']['changed']], ['new todo 0', 'new todo 1'])
+        self.assertEqual(data['todos']['deleted'], [self.todo.pk])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_sync_pages(self):
+        """
+        We sync more changes than fit in a response and check that following the cursor returns each of
+        them once, in order
+        """
+        for index in range(3):
+            Todo.objects.create(title=f'todo {index + 2}', user=self.user, workspace=self.workspace)
+
+        pages = [self.sync()]
+        while pages[-1]['more']:
+            pages.append(self.sync(pages[-1]['cursor']))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            [todo['title'] for page in pages for todo in page['todos']['changed']],
+            ['todo 1', 'todo 2', 'todo 3', 'todo 4'])
+
+    def test_sync_invalid_cursor(self):
+        response = self.client.get(SYNC_URL, {'cursor': 'not a cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
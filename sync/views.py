@@ -0,0 +1,82 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication
+from core.models import Todo, Tombstone, User, Workspace
+from todo.serializers import TodoSerializer
+from workspace.serializers import WorkspaceSerializer
+
+
+def encode_cursor(change):
+    return base64.urlsafe_b64encode(str(change).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    It returns the change position of a cursor sent by the client, 0 when there is no cursor
+    """
+    if not cursor:
+        return 0
+
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise exceptions.ValidationError({'cursor': [_('Invalid cursor.')]})
+
+
+class SyncView(APIView):
+    """
+    GET /api/sync/?cursor=<cursor> returns the workspaces and TODOs of the user created, updated or
+    deleted after the cursor, and the cursor to send next time. Without a cursor it returns everything.
+
+    The changes come in the order they were made, at most `SYNC_PAGE_SIZE` per response; while `more`
+    is true there are changes left and the client should ask again with the new cursor.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        cursor = decode_cursor(request.query_params.get('cursor'))
+        limit = settings.SYNC_PAGE_SIZE
+
+        # Changes are committed in order (see UserManager.allocate_changes), so everything up to the last
+        # change of the user is already visible and a change above it can't be skipped by the new cursor
+        last_change = User.objects.filter(pk=request.user.pk).values_list('last_change', flat=True).get()
+
+        changes = []
+        querysets = [Workspace.objects.all(), Todo.objects.visible()]
+        if cursor:
+            querysets.append(Tombstone.objects.all())
+
+        for queryset in querysets:
+            changes.extend(queryset.filter(
+                user=request.user, change__gt=cursor, change__lte=last_change).order_by('change')[:limit + 1])
+
+        changes.sort(key=lambda row: row.change)
+        more = len(changes) > limit
+        changes = changes[:limit]
+
+        return Response({
+            'cursor': encode_cursor(changes[-1].change if more else max(cursor, last_change)),
+            'more': more,
+            'workspaces': {
+                'changed': WorkspaceSerializer(self.of_type(changes, Workspace), many=True).data,
+                'deleted': [row.object_id for row in self.of_type(changes, Tombstone) if row.model == 'workspace'],
+            },
+            'todos': {
+                'changed': TodoSerializer(self.of_type(changes, Todo), many=True).data,
+                'deleted': [row.object_id for row in self.of_type(changes, Tombstone) if row.model == 'todo'],
+            },
+        })
+
+    @staticmethod
+    def of_type(changes, model):
+        return [row for row in changes if isinstance(row, model)]
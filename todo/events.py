@@ -0,0 +1,36 @@
+from django.db import transaction
+
+from core.events import get_broker, workspace_channel
+from todo.serializers import TodoSerializer
+
+
+def publish(action, todos, previous_workspace_ids=None):
+    """
+    It publishes a `todo.<action>` event per TODO to the channel of its workspace once the current
+    transaction commits, so the subscribers never see a change that was rolled back. A broker error is
+    logged instead of failing the request, the change is already saved.
+
+    A TODO that was moved to another workspace is published as `todo.deleted` to its old workspace.
+
+    :param action: created, updated or deleted
+    :param todos: The TODOs that changed
+    :param previous_workspace_ids: The workspace of each updated TODO before the update, keyed by its id
+    """
+    previous_workspace_ids = previous_workspace_ids or {}
+    events = []
+
+    for todo in todos:
+        data = {'id': str(todo.pk)} if action == 'deleted' else TodoSerializer(todo).data
+        events.append((todo.workspace_id, {'event': f'todo.{action}', 'workspace': todo.workspace_id, 'todo': data}))
+
+        previous = previous_workspace_ids.get(todo.pk, todo.workspace_id)
+        if previous != todo.workspace_id:
+            events.append((previous, {'event': 'todo.deleted', 'workspace': previous, 'todo': {'id': str(todo.pk)}}))
+
+    def send():
+        broker = get_broker()
+        for workspace_id, event in events:
+            broker.publish(workspace_channel(workspace_id), event)
+
+    if events:
+        transaction.on_commit(send, robust=True)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.exceptions import ValidationError
+
+from core import streaming
+from core.models import Workspace
+from todo.serializers import TodoSerializer
+
+
+def import_todos(user, rows, workspace=None):
+    """
+    It creates the TODOs of an upload in batches of `IMPORT_BATCH_SIZE`, validated with TodoSerializer
+    and saved with one `bulk_create` and one counters UPDATE per batch, so only one batch is in memory
+    however long the upload is.
+
+    Everything is created in one transaction: when a row is invalid nothing is saved. The imported TODOs
+    are not published as realtime events, the clients see them through the workspace versions and
+    /api/sync/.
+
+    :param user: The user the TODOs are created for
+    :param rows: (line number, row) pairs, like `core.streaming.read_ndjson` and `read_csv` yield
+    :param workspace: The workspace every TODO is created in, None to take it from the `workspace` of
+        every row, which must be one of the user
+    :return: The number of TODOs created.
+    """
+    if workspace is None:
+        workspaces = {workspace.pk: workspace for workspace in Workspace.objects.filter(user=user)}
+    else:
+        workspaces = {workspace.pk: workspace}
+
+    created = 0
+    with transaction.atomic():
+        for batch in streaming.chunks(rows, settings.IMPORT_BATCH_SIZE):
+            data = [row for _, row in batch]
+            if workspace is not None:
+                data = [{**row, 'workspace': workspace.pk} if isinstance(row, dict) else row for row in data]
+
+            serializer = TodoSerializer(data=data, many=True, context={'workspaces': workspaces})
+            if not serializer.is_valid():
+                index, errors = next((index, errors) for index, errors in enumerate(serializer.errors) if errors)
+                raise streaming.line_error(ValidationError, batch[index][0], errors=errors)
+
+            todos = serializer.save(user=user)
+            Workspace.objects.count_todos(change for todo in todos for change in todo.get_count_changes(1))
+            created += len(todos)
+
+    return created
@@ -1,12 +1,130 @@
+import uuid
+
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
-from core.models import Todo
+from core.models import Todo, Workspace, set_changes
+from core.serializers import SparseFieldsMixin, TimedListSerializer, TimedSerializerMixin, ValuesSerializer
+
+
+class TodoListSerializer(TimedListSerializer):
+    """
+    It saves a list of TODOs with one bulk query instead of one query per TODO
+    """
+
+    def create(self, validated_data):
+        """
+        It creates every TODO with a single `bulk_create`
+
+        :param validated_data: The list of validated TODOs
+        :return: The list of created TODOs.
+        """
+        todos = [Todo(**attrs) for attrs in validated_data]
+        with transaction.atomic(savepoint=False):
+            set_changes(todos)
+            return Todo.objects.bulk_create(todos)
+
+    def update(self, instance, validated_data):
+        """
+        It applies every partial update to its TODO and saves them with a single `bulk_update` of the
+        fields that changed
+
+        :param instance: The list of TODOs, in the same order as the validated data
+        :param validated_data: The list of validated partial updates
+        :return: The list of updated TODOs.
+        """
+        fields = set()
+        for todo, attrs in zip(instance, validated_data):
+            for field, value in attrs.items():
+                setattr(todo, field, value)
+                fields.add(field)
+
+        # `bulk_update` skips `pre_save`, so the auto_now dates are set here like `save()` would do
+        for field in Todo._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for todo in instance:
+                    field.pre_save(todo, add=False)
+                fields.add(field.name)
+
+        with transaction.atomic(savepoint=False):
+            set_changes(instance)
+            Todo.objects.bulk_update(instance, {*fields, 'change'})
+        return instance
+
+
+class WorkspaceField(serializers.PrimaryKeyRelatedField):
+    """
+    The workspace of a TODO, limited to the workspaces of the user making the request.
 
+    When the context has a `workspaces` dict of workspaces by id, like the bulk endpoint sets, the
+    workspaces are looked up there instead of with one query per TODO.
+    """
 
-class TodoSerializer(ModelSerializer):
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return Workspace.objects.all()
+        return Workspace.objects.filter(user=request.user)
+
+    def to_internal_value(self, data):
+        workspaces = self.context.get('workspaces')
+        if workspaces is None:
+            return super().to_internal_value(data)
+
+        try:
+            return workspaces[uuid.UUID(str(data))]
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class TodoSerializer(SparseFieldsMixin, TimedSerializerMixin, ModelSerializer):
+    workspace = WorkspaceField()
 
     class Meta:
         model = Todo
         fields = ('id', 'title', 'workspace',
                   'completed', 'description', 'priority', 'status')
         ready_only_fields = ('id',)
+        list_serializer_class = TodoListSerializer
+
+
+# The TodoSerializer representation of `.values()` rows, for the list and retrieve endpoints
+TODO_VALUES = ValuesSerializer(TodoSerializer)
+
+
+class TodoBulkSerializer(serializers.Serializer):
+    """
+    The payload of the bulk endpoint. The items are validated by the view with TodoSerializer
+    """
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    delete = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+
+    def validate(self, attrs):
+        size = sum(len(items) for items in attrs.values())
+        max_items = self.context['max_items']
+        if size > max_items:
+            raise serializers.ValidationError(
+                _('At most %(max)s items can be sent at once') % {'max': max_items}, code='max_items')
+
+        # Both items would update the same instance, which would be counted and recorded twice
+        ids = [self.normalize_id(item.get('id')) for item in attrs['update']]
+        duplicates = {pk for pk in ids if pk is not None and ids.count(pk) > 1}
+        if duplicates:
+            raise serializers.ValidationError({'update': [
+                _('A TODO can only be updated once per request: %(ids)s') % {
+                    'ids': ', '.join(sorted(str(pk) for pk in duplicates))}]}, code='duplicate')
+
+        return attrs
+
+    def normalize_id(self, value):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            # Reported as not found by the view
+            return None
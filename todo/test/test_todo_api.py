@@ -1,13 +1,21 @@
-from django.test import TestCase
+import base64
+from urllib.parse import urlencode
+
+from django.test import TestCase, AsyncRequestFactory
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
 from core import models
+from core.pagination import CreatedCursorPagination
 from todo.serializers import TodoSerializer
+from todo.views import AsyncTodoListView, PRIORITY_RANK
 
 TODO_URL_LIST = reverse('todo:todo-list')
+TODO_URL_BULK = reverse('todo:todo-bulk')
 
 
 def create_user(**params):
@@ -60,11 +68,11 @@ class PrivateTodoApiTests(TestCase):
 
         models.Todo.objects.create(**payload)
         response = self.client.get(TODO_URL_LIST)
-        todos = models.Todo.objects.all().order_by('-title')
+        todos = models.Todo.objects.all().order_by('created', 'id')
         serializer = TodoSerializer(todos, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_retrieve_limited_user(self):
         """
@@ -107,7 +115,7 @@ class PrivateTodoApiTests(TestCase):
         todos = models.Todo.objects.all()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         self.assertEqual(len(todos), 3)
 
     def test_retrieve_todos_for_given_workspace(self):
@@ -153,8 +161,180 @@ class PrivateTodoApiTests(TestCase):
             f'{TODO_URL_LIST}?workspace={self.workspace.pk}')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]['workspace'], self.workspace.pk)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['workspace'], self.workspace.pk)
+
+    def test_todos_are_paginated(self):
+        """
+        We create 3 todos and request pages of 2, then we follow the `next` cursor and check that both
+        pages together return every todo exactly once, in creation order
+        """
+        todos = [
+            models.Todo.objects.create(
+                title=f'Test todo {i}',
+                user=self.user,
+                workspace=self.workspace,
+            ) for i in range(3)
+        ]
+
+        response = self.client.get(TODO_URL_LIST, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        next_response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(next_response.data['results']), 1)
+        self.assertIsNone(next_response.data['next'])
+
+        ids = [todo['id'] for todo in response.data['results'] + next_response.data['results']]
+        expected = models.Todo.objects.order_by('created', 'id').values_list('id', flat=True)
+        self.assertEqual(ids, [str(pk) for pk in expected])
+
+    def test_list_same_bytes_as_serializer(self):
+        """
+        The list is read with `.values()`, we check that its body is byte for byte the one TodoSerializer
+        and the DRF JSONRenderer give for the same page, also when a page is ordered by another field
+        """
+        for priority, description in (('medium', None), ('high', 'é "quoted"\n'), ('low', '\U0001f600')):
+            models.Todo.objects.create(
+                title=f'{priority} todo', user=self.user, workspace=self.workspace,
+                priority=priority, description=description)
+
+        for ordering in ('priority', '-priority'):
+            response = self.client.get(TODO_URL_LIST, {'page_size': 2, 'ordering': ordering})
+            todos = models.Todo.objects.annotate(priority_order=PRIORITY_RANK).order_by(
+                f'{ordering}_order', 'created', 'id')[:2]
+            expected = {
+                'next': response.data['next'],
+                'previous': None,
+                'results': TodoSerializer(todos, many=True).data,
+            }
+
+            self.assertEqual(response.content, JSONRenderer().render(expected))
+
+            next_response = self.client.get(response.data['next'])
+            self.assertEqual(len(next_response.data['results']), 1)
+
+    def test_filter_todos(self):
+        """
+        We create TODOs with different status, priority and completed values, then we check that every
+        query param only returns the matching TODOs
+        """
+        done = models.Todo.objects.create(
+            title='Done todo', user=self.user, workspace=self.workspace,
+            priority='high', status='done', completed=True)
+        pending = models.Todo.objects.create(
+            title='Pending todo', user=self.user, workspace=self.workspace,
+            priority='low', status='pending')
+
+        params = [
+            ({'status': 'done'}, done),
+            ({'priority': 'low'}, pending),
+            ({'completed': 'true'}, done),
+            ({'completed': 'false'}, pending),
+            ({'status': 'pending', 'priority': 'low'}, pending),
+        ]
+        for query, expected in params:
+            response = self.client.get(TODO_URL_LIST, query)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([todo['id'] for todo in response.data['results']], [str(expected.pk)])
+
+    def test_order_todos(self):
+        """
+        We create TODOs with different priorities and check that `?ordering=` sorts them by rank in both
+        directions
+        """
+        for priority in ('medium', 'high', 'low'):
+            models.Todo.objects.create(
+                title=f'{priority} todo', user=self.user, workspace=self.workspace, priority=priority)
+
+        response = self.client.get(TODO_URL_LIST, {'ordering': 'priority'})
+        self.assertEqual([todo['priority'] for todo in response.data['results']], ['low', 'medium', 'high'])
+
+        response = self.client.get(TODO_URL_LIST, {'ordering': '-priority'})
+        self.assertEqual([todo['priority'] for todo in response.data['results']], ['high', 'medium', 'low'])
+
+    def test_order_todos_pages(self):
+        """
+        More TODOs than the DRF cursor offsets reach share a priority: we follow every `next` link until
+        there is none and check that each TODO is returned exactly once, in order, then we walk back with
+        the `previous` links
+        """
+        count = CreatedCursorPagination.offset_cutoff + 150
+        models.Todo.objects.bulk_create([
+            models.Todo(title=f'todo {index}', user=self.user, workspace=self.workspace, priority='medium')
+            for index in range(count)
+        ] + [models.Todo(title='high todo', user=self.user, workspace=self.workspace, priority='high')])
+        expected = [str(pk) for pk in models.Todo.objects.annotate(priority_order=PRIORITY_RANK).order_by(
+            'priority_order', 'created', 'id').values_list('id', flat=True)]
+
+        pages = [self.client.get(TODO_URL_LIST, {'ordering': 'priority', 'page_size': 100}).data]
+        while pages[-1]['next'] is not None:
+            self.assertLessEqual(len(pages), count // 100 + 1)
+            pages.append(self.client.get(pages[-1]['next']).data)
+
+        self.assertEqual([todo['id'] for page in pages for todo in page['results']], expected)
+
+        pages = [pages[-1]]
+        while pages[-1]['previous'] is not None:
+            self.assertLessEqual(len(pages), count // 100 + 1)
+            pages.append(self.client.get(pages[-1]['previous']).data)
+
+        self.assertEqual([todo['id'] for page in reversed(pages) for todo in page['results']], expected)
+
+    def test_invalid_cursor(self):
+        for position in ('2024-01-01', '["1","2"]', '["low","2024-01-01","1"]'):
+            cursor = base64.b64encode(urlencode({'p': position}).encode()).decode()
+            response = self.client.get(TODO_URL_LIST, {'ordering': 'priority', 'cursor': cursor})
+
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_todos(self):
+        """
+        We create TODOs and search for words of the title and the description, then we check that only
+        the matching TODOs are returned
+        """
+        groceries = models.Todo.objects.create(
+            title='Buy groceries', user=self.user, workspace=self.workspace,
+            description='Milk, eggs and bread')
+        models.Todo.objects.create(
+            title='Write report', user=self.user, workspace=self.workspace,
+            description='Quarterly numbers')
+
+        for search in ('grocery', 'eggs', 'buy bread'):
+            response = self.client.get(TODO_URL_LIST, {'search': search})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([todo['id'] for todo in response.data['results']], [str(groceries.pk)])
+
+    def test_retrieve_workspace_todos_not_modified(self):
+        """
+        We list the TODOs of a workspace, then we send the ETag back and check that we get a 304
+        without reading the TODOs. After a TODO is deleted, the same ETag gets the full list again
+        """
+        todo = models.Todo.objects.create(
+            title='Test todo 1', user=self.user, workspace=self.workspace)
+        params = {'workspace': str(self.workspace.pk)}
+
+        response = self.client.get(TODO_URL_LIST, params)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(TODO_URL_LIST, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(TODO_URL_LIST, {**params, 'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.delete(reverse('todo:todo-detail', args=[todo.pk]))
+        response = self.client.get(TODO_URL_LIST, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
 
     def test_edit_todo(self):
         """
@@ -198,3 +378,145 @@ class PrivateTodoApiTests(TestCase):
         exist = models.Todo.objects.filter(id=todo_test.pk).exists()
 
         self.assertFalse(exist)
+
+    def test_bulk_todos(self):
+        """
+        We send creates, updates and deletes in one bulk request, then we check that all of them are
+        applied and returned
+        """
+        updated = models.Todo.objects.create(
+            title='test todo', user=self.user, workspace=self.workspace)
+        deleted = models.Todo.objects.create(
+            title='test todo', user=self.user, workspace=self.workspace)
+
+        payload = {
+            'create': [
+                {'title': f'new todo {i}', 'workspace': str(self.workspace.pk)} for i in range(3)
+            ],
+            'update': [{'id': str(updated.pk), 'completed': True}],
+            'delete': [str(deleted.pk)],
+        }
+
+        with self.assertNumQueries(12):
+            response = self.client.post(TODO_URL_BULK, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['create']), 3)
+        self.assertTrue(response.data['update'][0]['completed'])
+
+        updated.refresh_from_db()
+        self.assertTrue(updated.completed)
+        self.assertFalse(models.Todo.objects.filter(id=deleted.pk).exists())
+        self.assertEqual(
+            models.Todo.objects.filter(user=self.user, title__startswith='new todo').count(), 3)
+
+        self.workspace.refresh_from_db()
+        self.assertEqual((self.workspace.todos_total, self.workspace.todos_completed), (4, 1))
+
+    def test_bulk_todos_duplicate_update(self):
+        """
+        The same TODO twice in `update` is rejected, so it isn't counted twice in the workspace counters
+        """
+        todo = models.Todo.objects.create(title='test todo', user=self.user, workspace=self.workspace)
+
+        payload = {'update': [
+            {'id': str(todo.pk), 'status': 'done'},
+            {'id': str(todo.pk).upper(), 'status': 'done'},
+        ]}
+        response = self.client.post(TODO_URL_BULK, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(todo.pk), response.data['update'][0])
+
+        todo.refresh_from_db()
+        self.assertEqual(todo.status, 'pending')
+        self.workspace.refresh_from_db()
+        self.assertEqual((self.workspace.todos_pending, self.workspace.todos_done), (1, 0))
+        self.assertFalse(models.Workspace.objects.drifted().exists())
+
+    def test_delete_todo_counters(self):
+        todo = models.Todo.objects.create(title='test todo', user=self.user, workspace=self.workspace)
+
+        self.client.delete(reverse('todo:todo-detail', args=[todo.pk]))
+
+        self.workspace.refresh_from_db()
+        self.assertEqual((self.workspace.todos_total, self.workspace.todos_pending), (0, 0))
+
+    def test_bulk_todos_invalid(self):
+        """
+        We send a bulk request with invalid items, then we check that nothing is saved and that every
+        error is reported in the position of its item
+        """
+        user2 = create_user(email='test2@gmail.com', password='testpass123')
+        workspace2 = models.Workspace.objects.create(user=user2, title='workspace test 2')
+        other_todo = models.Todo.objects.create(
+            title='test todo', user=user2, workspace=workspace2)
+        todo = models.Todo.objects.create(
+            title='test todo', user=self.user, workspace=self.workspace)
+
+        payload = {
+            'create': [
+                {'title': 'new todo', 'workspace': str(self.workspace.pk)},
+                {'title': 'new todo', 'workspace': str(workspace2.pk)},
+            ],
+            'update': [
+                {'id': str(todo.pk), 'title': 'x' * 300},
+                {'id': 'not an id', 'title': 'updated'},
+            ],
+            'delete': [str(other_todo.pk)],
+        }
+
+        response = self.client.post(TODO_URL_BULK, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('workspace', response.data['create'][1])
+        self.assertIn('title', response.data['update'][0])
+        self.assertIn('id', response.data['update'][1])
+        self.assertIn('id', response.data['delete'][0])
+
+        todo.refresh_from_db()
+        self.assertEqual(todo.title, 'test todo')
+        self.assertFalse(models.Todo.objects.filter(title='new todo').exists())
+        self.assertTrue(models.Todo.objects.filter(id=other_todo.pk).exists())
+
+
+class AsyncTodoApiTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user(
+            **{'email': 'test@gmail.com',
+               'password': 'testpass123',
+               'name': 'test'})
+        self.workspace = models.Workspace.objects.create(
+            title='workspace test 1',
+            user=self.user,
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.factory = AsyncRequestFactory()
+
+    async def test_login_required(self):
+        request = self.factory.get(TODO_URL_LIST)
+        response = await AsyncTodoListView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_retrieve_user_todos(self):
+        """
+        We create two todos and list them with the async view, filtered and paginated like the sync one
+        """
+        todo = await models.Todo.objects.acreate(
+            title='Test todo 1', user=self.user, workspace=self.workspace, priority='high')
+        await models.Todo.objects.acreate(
+            title='Test todo 2', user=self.user, workspace=self.workspace, priority='low')
+
+        request = self.factory.get(
+            TODO_URL_LIST,
+            {'priority': 'high', 'page_size': 1},
+            headers={'authorization': f'Token {self.token.key}'}
+        )
+        response = await AsyncTodoListView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [str(todo.pk)])
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from core.events import check_broker, workspace_channel
+
+TODO_URL_LIST = reverse('todo:todo-list')
+TODO_URL_BULK = reverse('todo:todo-bulk')
+
+
+class RecordingBroker:
+    """
+    Broker that keeps the published events in memory, so the tests can read them
+    """
+    published = []
+
+    def __init__(self, **options):
+        pass
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+
+
+def detail_url(todo_id):
+    return reverse('todo:todo-detail', args=[todo_id])
+
+
+@override_settings(EVENT_BROKER={'BACKEND': 'todo.test.test_todo_events.RecordingBroker'})
+class TodoEventsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(
+            email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        self.client.force_authenticate(self.user)
+        RecordingBroker.published = []
+
+    def events(self):
+        return [(channel, event['event'], event['todo']['id']) for channel, event in RecordingBroker.published]
+
+    def test_create_publishes_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(TODO_URL_LIST, {'title': 'todo 1', 'workspace': self.workspace.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        channel, event = RecordingBroker.published[0]
+        self.assertEqual(channel, workspace_channel(self.workspace.pk))
+        self.assertEqual(event['event'], 'todo.created')
+        self.assertEqual(event['todo'], response.data)
+
+    def test_update_publishes_event(self):
+        todo = models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(todo.pk), {'completed': True})
+
+        self.assertEqual(self.events(), [(workspace_channel(self.workspace.pk), 'todo.updated', str(todo.pk))])
+        self.assertTrue(RecordingBroker.published[0][1]['todo']['completed'])
+
+    def test_move_publishes_delete_to_old_workspace(self):
+        """
+        A TODO moved to another workspace is an update for the new workspace and a delete for the old one
+        """
+        todo = models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(todo.pk), {'workspace': self.workspace2.pk})
+
+        self.assertEqual(self.events(), [
+            (workspace_channel(self.workspace2.pk), 'todo.updated', str(todo.pk)),
+            (workspace_channel(self.workspace.pk), 'todo.deleted', str(todo.pk)),
+        ])
+
+    def test_delete_publishes_event(self):
+        todo = models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(todo.pk))
+
+        self.assertEqual(self.events(), [(workspace_channel(self.workspace.pk), 'todo.deleted', str(todo.pk))])
+
+    def test_bulk_publishes_events(self):
+        todo1 = models.Todo.objects.create(title='todo 1', user=self.user, workspace=self.workspace)
+        todo2 = models.Todo.objects.create(title='todo 2', user=self.user, workspace=self.workspace)
+        payload = {
+            'create': [{'title': 'todo 3', 'workspace': str(self.workspace.pk)}],
+            'update': [{'id': str(todo1.pk), 'title': 'todo 1 updated'}],
+            'delete': [str(todo2.pk)],
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(TODO_URL_BULK, payload, format='json')
+
+        channel = workspace_channel(self.workspace.pk)
+        self.assertEqual(self.events(), [
+            (channel, 'todo.created', response.data['create'][0]['id']),
+            (channel, 'todo.updated', str(todo1.pk)),
+            (channel, 'todo.deleted', str(todo2.pk)),
+        ])
+
+    def test_invalid_bulk_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(TODO_URL_BULK, {'create': [{'title': ''}]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(RecordingBroker.published, [])
+
+
+class CheckBrokerTests(SimpleTestCase):
+
+    @override_settings(EVENT_BROKER={'BACKEND': 'core.events.RedisBroker', 'OPTIONS': {'url': 'redis://localhost'}})
+    def test_redis_package_missing(self):
+        with patch('importlib.util.find_spec', return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                check_broker()
+
+    def test_in_process_broker(self):
+        with patch('importlib.util.find_spec', return_value=None):
+            check_broker()
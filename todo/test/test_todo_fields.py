@@ -0,0 +1,112 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import caching, models
+
+TODO_URL_LIST = reverse('todo:todo-list')
+TODO_URL_EXPORT = reverse('todo:todo-export')
+ME_URL = reverse('user:me')
+
+
+def todo_url(todo):
+    return reverse('todo:todo-detail', args=[todo.pk])
+
+
+def workspace_url(workspace):
+    return reverse('workspace:workspace-detail', args=[workspace.pk])
+
+
+class TodoFieldsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.todo = models.Todo.objects.create(
+            title='todo 1', description='a long description', user=self.user, workspace=self.workspace)
+        self.client.force_authenticate(self.user)
+
+        caching.get_cache().clear()
+        self.addCleanup(caching.get_cache().clear)
+
+    def get(self, url, params):
+        """
+        It sends the request and returns the response with the SQL of its queries
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_list_fields(self):
+        response, sql = self.get(TODO_URL_LIST, {'fields': 'title,id'})
+
+        # The order of the representation is kept
+        self.assertEqual(response.data['results'], [{'id': str(self.todo.pk), 'title': 'todo 1'}])
+        self.assertNotIn('"description"', sql)
+
+    def test_list_omit(self):
+        response, sql = self.get(TODO_URL_LIST, {'omit': 'description'})
+
+        self.assertEqual(
+            list(response.data['results'][0]), ['id', 'title', 'workspace', 'completed', 'priority', 'status'])
+        self.assertNotIn('"description"', sql)
+
+    def test_retrieve_fields(self):
+        response, sql = self.get(todo_url(self.todo), {'fields': 'title,completed'})
+
+        self.assertEqual(response.data, {'title': 'todo 1', 'completed': False})
+        self.assertNotIn('"description"', sql)
+
+    def test_export_fields(self):
+        response = self.client.get(TODO_URL_EXPORT, {'fields': 'id,title', 'format': 'csv'})
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['id,title', f'{self.todo.pk},todo 1'])
+
+    def test_workspace_detail_fields(self):
+        response, sql = self.get(workspace_url(self.workspace), {'fields': 'id,title'})
+
+        self.assertEqual(response.data['workspace']['title'], 'workspace 1')
+        self.assertEqual(response.data['TODOs'], [{'id': str(self.todo.pk), 'title': 'todo 1'}])
+        self.assertNotIn('"description"', sql)
+
+    def test_workspace_stream_fields(self):
+        response = self.client.get(workspace_url(self.workspace), {'stream': 'true', 'omit': 'description'})
+
+        todos = json.loads(b''.join(response.streaming_content))['TODOs']
+        self.assertNotIn('description', todos[0])
+
+    def test_me_fields(self):
+        response, sql = self.get(ME_URL, {'include': 'todos', 'fields': 'title'})
+
+        self.assertEqual(response.data['workspaces'][0]['TODOs'], [{'title': 'todo 1'}])
+        self.assertNotIn('"description"', sql)
+
+    def test_unknown_field(self):
+        for url in (TODO_URL_LIST, todo_url(self.todo), workspace_url(self.workspace)):
+            response = self.client.get(url, {'fields': 'title,secret'})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('secret', response.data['fields'][0])
+
+    def test_workspace_list_ignores_fields(self):
+        """
+        The params select TODO fields, the workspace list has none and returns its workspaces whole
+        """
+        response, _ = self.get(reverse('workspace:workspace-list'), {'fields': 'title,completed'})
+
+        self.assertEqual(response.data['results'][0]['title'], 'workspace 1')
+        self.assertIn('id', response.data['results'][0])
+
+    def test_nothing_selected(self):
+        response = self.client.get(TODO_URL_LIST, {'fields': 'title', 'omit': 'title'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
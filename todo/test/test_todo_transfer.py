@@ -0,0 +1,243 @@
+import csv
+import io
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import models
+
+TODO_URL_EXPORT = reverse('todo:todo-export')
+TODO_URL_IMPORT = reverse('todo:todo-import-todos')
+
+
+def workspace_export_url(workspace):
+    return reverse('workspace:workspace-export', args=[workspace.pk])
+
+
+def workspace_url(workspace):
+    return reverse('workspace:workspace-detail', args=[workspace.pk])
+
+
+def workspace_import_url(workspace):
+    return reverse('workspace:workspace-import-todos', args=[workspace.pk])
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+
+@override_settings(STREAM_CHUNK_SIZE=2, IMPORT_BATCH_SIZE=2)
+class TodoTransferTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(email='test@gmail.com', password='testpass123', name='test')
+        self.workspace = models.Workspace.objects.create(title='workspace 1', user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def create_todos(self, count, workspace=None, **fields):
+        return [
+            models.Todo.objects.create(
+                title=f'todo {index}', user=self.user, workspace=workspace or self.workspace, **fields)
+            for index in range(count)
+        ]
+
+    def import_todos(self, content, content_type='application/x-ndjson', url=TODO_URL_IMPORT):
+        return self.client.generic('POST', url, content.encode(), content_type=content_type)
+
+    def test_export_ndjson(self):
+        """
+        We export 5 TODOs in chunks of 2 rows, one JSON object per line like the list represents them
+        """
+        todos = self.create_todos(5, priority='high')
+        todos[0].description = 'multi\nline'
+        todos[0].save()
+        models.Todo.objects.create(
+            title='other user', user=models.User.objects.create_user(email='test2@gmail.com', password='testpass123'),
+            workspace=self.workspace)
+
+        response = self.client.get(TODO_URL_EXPORT)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="todos.ndjson"')
+        rows = read_ndjson(response)
+        self.assertEqual([row['id'] for row in rows], [str(todo.pk) for todo in todos])
+        self.assertEqual(rows[0], {
+            'id': str(todos[0].pk), 'title': 'todo 0', 'workspace': str(self.workspace.pk), 'completed': False,
+            'description': 'multi\nline', 'priority': 'high', 'status': 'pending'})
+
+    def test_export_csv(self):
+        todos = self.create_todos(3)
+
+        response = self.client.get(TODO_URL_EXPORT, {'format': 'csv', 'completed': 'false'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = read_csv(response)
+        self.assertEqual([row['title'] for row in rows], ['todo 0', 'todo 1', 'todo 2'])
+        self.assertEqual(rows[0], {
+            'id': str(todos[0].pk), 'title': 'todo 0', 'workspace': str(self.workspace.pk), 'completed': 'False',
+            'description': '', 'priority': 'low', 'status': 'pending'})
+
+    def test_export_empty_csv(self):
+        response = self.client.get(TODO_URL_EXPORT, HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(
+            b''.join(response.streaming_content), b'id,title,workspace,completed,description,priority,status\r\n')
+
+    def test_export_workspace(self):
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        self.create_todos(3)
+        self.create_todos(1, workspace2)
+
+        response = self.client.get(workspace_export_url(workspace2))
+
+        self.assertEqual([row['workspace'] for row in read_ndjson(response)], [str(workspace2.pk)])
+
+    def asgi_chunks(self, url, params=None):
+        """
+        It sends the request to the view of the URL as the ASGI handler does, and returns the chunks of
+        the streamed response
+        """
+        token = Token.objects.create(user=self.user)
+        request = AsyncRequestFactory().get(url, params, headers={'authorization': f'Token {token.key}'})
+        match = resolve(url)
+        response = match.func(request, *match.args, **match.kwargs)
+
+        # An async iterator is sent chunk by chunk, a sync one would be collected whole first
+        self.assertTrue(response.is_async)
+
+        async def collect():
+            return [chunk async for chunk in response.streaming_content]
+        return async_to_sync(collect)()
+
+    def test_export_asgi(self):
+        self.create_todos(5)
+
+        chunks = self.asgi_chunks(TODO_URL_EXPORT)
+
+        # STREAM_CHUNK_SIZE rows per chunk
+        self.assertEqual([len(chunk.decode().splitlines()) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(
+            sorted(json.loads(line)['title'] for chunk in chunks for line in chunk.decode().splitlines()),
+            [f'todo {index}' for index in range(5)])
+
+    def test_export_csv_asgi(self):
+        self.create_todos(3)
+
+        chunks = self.asgi_chunks(TODO_URL_EXPORT, {'format': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+        # The header goes with the first chunk of rows
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(sorted(row['title'] for row in rows), ['todo 0', 'todo 1', 'todo 2'])
+
+    def test_workspace_stream_asgi(self):
+        self.create_todos(3)
+
+        chunks = self.asgi_chunks(workspace_url(self.workspace), {'stream': 'true'})
+
+        self.assertEqual(len(json.loads(b''.join(chunks))['TODOs']), 3)
+        self.assertGreater(len(chunks), 2)
+
+    def test_export_workspace_of_other_user(self):
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=user2)
+
+        response = self.client.get(workspace_export_url(workspace2), {'format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.content.decode().splitlines()[0], 'detail')
+
+    def test_export_import_round_trip(self):
+        """
+        We export 5 TODOs, delete them and import the export, in batches of 2, with both formats
+        """
+        self.create_todos(4)
+        self.create_todos(1, completed=True, status='done')
+
+        for format, content_type in (('ndjson', 'application/x-ndjson'), ('csv', 'text/csv')):
+            exported = b''.join(self.client.get(TODO_URL_EXPORT, {'format': format}).streaming_content).decode()
+            models.Todo.objects.all().delete()
+
+            response = self.import_todos(exported, content_type)
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data, {'created': 5})
+            self.assertEqual(
+                sorted(models.Todo.objects.values_list('title', 'completed', 'status')),
+                sorted([*((f'todo {index}', False, 'pending') for index in range(4)), ('todo 0', True, 'done')]))
+
+        self.workspace.refresh_from_db()
+        # The counters were updated by the imports, the deletes above skipped them
+        self.assertEqual(self.workspace.todos_total, 15)
+        self.assertEqual(self.workspace.todos_done, 3)
+
+    def test_import_into_workspace(self):
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=self.user)
+        content = '\n'.join(json.dumps({'title': f'todo {index}', 'workspace': str(self.workspace.pk)})
+                            for index in range(3))
+
+        response = self.import_todos(content, url=workspace_import_url(workspace2))
+
+        self.assertEqual(response.data, {'created': 3})
+        self.assertEqual(models.Todo.objects.filter(workspace=workspace2).count(), 3)
+
+    def test_import_invalid_row(self):
+        """
+        The line of the first invalid row is returned and nothing is created, not even the batches before it
+        """
+        user2 = models.User.objects.create_user(email='test2@gmail.com', password='testpass123')
+        workspace2 = models.Workspace.objects.create(title='workspace 2', user=user2)
+        lines = [json.dumps({'title': f'todo {index}', 'workspace': str(self.workspace.pk)}) for index in range(3)]
+        lines.append('')
+        lines.append(json.dumps({'title': 'todo 3', 'workspace': str(workspace2.pk)}))
+
+        response = self.import_todos('\n'.join(lines))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['line'], 5)
+        self.assertIn('workspace', response.data['errors'])
+        self.assertFalse(models.Todo.objects.exists())
+
+    def test_import_malformed(self):
+        response = self.import_todos(f'{json.dumps({"title": "todo 1", "workspace": str(self.workspace.pk)})}\n{{')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['line'], 2)
+
+        response = self.import_todos('title,workspace\n"todo 1,', 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.generic('POST', TODO_URL_IMPORT, b'\xff\xfe', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertFalse(models.Todo.objects.exists())
+
+    def test_import_csv_lines(self):
+        """
+        A quoted cell can span lines, the line of an invalid row is the one it starts at
+        """
+        content = f'title,workspace,description\n"todo 1",{self.workspace.pk},"multi\nline"\n,{self.workspace.pk},\n'
+
+        response = self.import_todos(content.replace(',\n', ',x\n', 1), 'text/csv')
+        self.assertEqual(response.data['line'], 4)
+
+        response = self.import_todos(f'\ufeff{content.splitlines(True)[0]}"todo 1",{self.workspace.pk},"a\nb"\n',
+                                     'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.Todo.objects.get().description, 'a\nb')
+
+    def test_import_unsupported_media_type(self):
+        response = self.client.post(TODO_URL_IMPORT, [{'title': 'todo 1'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
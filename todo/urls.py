@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
+from core.views import async_reads
 from todo import views
 
 router = DefaultRouter()
@@ -13,3 +15,9 @@ app_name = 'todo'
 urlpatterns = [
     path('', include(router.urls))
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns.insert(0, path('', async_reads(
+        views.AsyncTodoListView.as_view(),
+        views.TodoViewSet.as_view({'get': 'list', 'post': 'create'})
+    ), name='todo-list'))
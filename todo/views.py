@@ -1,27 +1,303 @@
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+import uuid
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+from django.utils.translation import gettext_lazy as _
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core import caching, conditional, streaming
+from core.filters import StableOrderingFilter
+from core.renderers import EXPORT_RENDERERS
+from core.throttling import ReadWriteRateThrottle
+from core.authentication import CachedTokenAuthentication
+from core.models import Todo, Tombstone, Workspace, TODO_SEARCH_CONFIG, TODO_SEARCH_VECTOR
+from core.views import AsyncAPIView, ValuesListMixin
+from todo import events, imports, serializers
 
-from core.models import Todo
-from todo import serializers
+PRIORITY_RANK = Case(
+    When(priority='low', then=0),
+    When(priority='medium', then=1),
+    When(priority='high', then=2),
+    default=3,
+    output_field=IntegerField(),
+)
 
 
-class TodoViewSet(viewsets.ModelViewSet):
-    authentication_classes = (TokenAuthentication,)
+class TodoViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Todo.objects.all()
     serializer_class = serializers.TodoSerializer
+    values_serializer = serializers.TODO_VALUES
+    sparse_fields = True
+    throttle_classes = (ReadWriteRateThrottle,)
+    throttle_scope = 'todo'
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ('created', 'updated', 'priority')
+    # `?ordering=priority` goes from low to high, the other priorities come last
+    ordering_annotations = {'priority': PRIORITY_RANK}
+    ordering = ('created', 'id')
 
     def get_queryset(self):
         """
-        It filters the queryset to only show the user's own workspaces
-        :return: A list of all the workspaces that the user is a member of.
+        It filters the queryset to only show the user's own TODOs, without the ones of the workspaces
+        being purged, narrowed down by the `workspace`, `status`, `priority` and `completed` query params
+        and by a full text `search` on the title and description
+        :return: The TODOs of the user that match the query params.
         """
-        self.queryset = self.queryset.filter(user=self.request.user)
-        if 'workspace' in self.request.GET:
+        self.queryset = self.queryset.filter(user=self.request.user).visible()
+        params = self.request.query_params
+
+        for field in ('workspace', 'status', 'priority'):
+            if field in params:
+                self.queryset = self.queryset.filter(**{field: params.get(field)})
+
+        if 'completed' in params:
             self.queryset = self.queryset.filter(
-                workspace=self.request.GET.get('workspace'))
+                completed=params.get('completed').lower() in ('1', 'true'))
+
+        if params.get('search'):
+            query = SearchQuery(params.get('search'), config=TODO_SEARCH_CONFIG, search_type='websearch')
+            self.queryset = self.queryset.annotate(
+                search=TODO_SEARCH_VECTOR).filter(search=query)
+
         return self.queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        It returns a TODO. With `?fields=` or `?omit=` only the selected fields are returned, and only
+        their columns are read.
+
+        :param request: The request object
+        :return: The TODO.
+        """
+        fields = self.get_fields()
+        if fields is not None:
+            self.queryset = self.queryset.only(*self.values_serializer.only(*fields).columns)
+
+        return Response(self.get_serializer(self.get_object(), fields=fields).data)
+
+    def get_list_workspace(self):
+        """
+        It returns the queryset of the workspace given in `?workspace=`, or None when the list is not
+        limited to one workspace
+        """
+        pk = parse_uuid(self.request.query_params.get('workspace'))
+        if pk is None:
+            return None
+
+        return Workspace.objects.filter(user=self.request.user, pk=pk).only('id', 'version', 'modified')
+
+    def get_list_versions(self, workspace):
+        """
+        It returns the versions the list is cached with: the one of its workspace, or the ones of every
+        workspace of the user when it isn't limited to one
+        """
+        if not caching.is_enabled():
+            return None
+        if workspace is not None:
+            return [(workspace.pk, workspace.version)]
+        return caching.user_versions(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """
+        When the list is limited to one workspace the response has the ETag and Last-Modified of the
+        workspace, and a request with a matching If-None-Match gets a 304 without reading any TODO.
+
+        The page is kept in the response cache until a TODO of the listed workspaces changes
+
+        :param request: The request object
+        :return: A page of TODOs.
+        """
+        queryset = self.get_list_workspace()
+        workspace = queryset.first() if queryset is not None else None
+
+        if workspace is not None:
+            response = conditional.not_modified(request, workspace)
+            if response is not None:
+                return response
+
+        response = Response(caching.cached_data(
+            request, 'todo-list', self.get_list_versions(workspace), self.get_list_data))
+
+        if workspace is not None:
+            conditional.set_validators(response, request, workspace)
+        return response
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        todo = serializer.save(user=self.request.user)
+        events.publish('created', [todo])
+
+    def perform_update(self, serializer):
+        previous_workspace_id = serializer.instance.workspace_id
+        todo = serializer.save()
+        events.publish('updated', [todo], {todo.pk: previous_workspace_id})
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            events.publish('deleted', [instance])
+            Tombstone.objects.record(instance.user_id, [instance])
+            super().perform_destroy(instance)
+            Workspace.objects.count_todos(instance.get_count_changes(-1))
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        It creates, partially updates and deletes many TODOs in a single transaction, with one query per
+        kind of operation.
+
+        The payload is `{"create": [{...}], "update": [{"id": ..., ...}], "delete": [id, ...]}`. If any
+        item is invalid nothing is saved, and the errors of every list are returned in the position of
+        their item (`{}` for the valid ones).
+
+        :param request: The request object
+        :return: The created and updated TODOs and the deleted ids.
+        """
+        payload = serializers.TodoBulkSerializer(
+            data=request.data, context={'max_items': settings.API_BULK_MAX_ITEMS})
+        payload.is_valid(raise_exception=True)
+        creates, updates, deletes = (
+            payload.validated_data[key] for key in ('create', 'update', 'delete'))
+
+        todos = Todo.objects.filter(user=request.user).visible()
+        update_ids = [parse_uuid(item.get('id')) for item in updates]
+        found = todos.in_bulk([pk for pk in update_ids + deletes if pk])
+
+        workspace_ids = [parse_uuid(item.get('workspace')) for item in creates + updates if 'workspace' in item]
+        context = {
+            **self.get_serializer_context(),
+            'workspaces': Workspace.objects.filter(user=request.user).in_bulk([pk for pk in workspace_ids if pk]),
+        }
+
+        create_serializer = serializers.TodoSerializer(data=creates, many=True, context=context)
+        update_serializer = serializers.TodoSerializer(
+            [found.get(pk) for pk in update_ids],
+            data=[{key: value for key, value in item.items() if key != 'id'} for item in updates],
+            many=True,
+            partial=True,
+            context=context
+        )
+        create_serializer.is_valid()
+        update_serializer.is_valid()
+
+        not_found = {'id': [_('Not found.')]}
+        errors = {
+            'create': create_serializer.errors or [{}] * len(creates),
+            'update': [
+                {**(not_found if pk not in found else {}), **item_errors}
+                for pk, item_errors in zip(update_ids, update_serializer.errors or [{}] * len(updates))
+            ],
+            'delete': [not_found if pk not in found else {} for pk in deletes],
+        }
+        if any(any(item_errors) for item_errors in errors.values()):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        previous_workspace_ids = {pk: todo.workspace_id for pk, todo in found.items()}
+
+        with transaction.atomic():
+            created = create_serializer.save(user=request.user) if creates else []
+            updated = update_serializer.save() if updates else []
+            todos.filter(pk__in=deletes).delete()
+            Tombstone.objects.record(request.user.pk, [found[pk] for pk in deletes])
+
+            # A TODO updated and deleted in the same request only counts as deleted
+            Workspace.objects.count_todos([
+                *(change for todo in created for change in todo.get_count_changes(1)),
+                *(change for todo in updated if todo.pk not in deletes for change in todo.get_count_changes(1)),
+                *(change for pk in set(deletes) for change in found[pk].get_count_changes(-1)),
+            ])
+
+            events.publish('created', created)
+            events.publish('updated', updated, previous_workspace_ids)
+            events.publish('deleted', [found[pk] for pk in deletes])
+
+        return Response({
+            'create': self.get_serializer(created, many=True).data,
+            'update': self.get_serializer(updated, many=True).data,
+            'delete': deletes,
+        })
+
+    @action(detail=False, renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """
+        It streams every TODO of the user, narrowed down by the same query params as the list, as NDJSON
+        or as CSV with `?format=csv`, with the fields selected by `?fields=` and `?omit=`. The rows are read
+        through a server side cursor and written a chunk at a time, so the export takes the same memory
+        however many TODOs there are.
+
+        :param request: The request object
+        :return: The TODOs as an NDJSON or CSV attachment.
+        """
+        ordering = ('created', 'id')
+        values_serializer = self.get_values_serializer()
+        todos = values_serializer.values(self.get_queryset().order_by(*ordering), *ordering)
+        return streaming.export_response(request, todos, values_serializer, 'todos')
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_todos(self, request):
+        """
+        It creates the TODOs of an NDJSON (`Content-Type: application/x-ndjson`) or CSV (`text/csv`) upload,
+        in the format of the export. The `id` of the rows is ignored and their `workspace` must be one of
+        the user. The body is parsed line by line while the TODOs are created in batches, in one
+        transaction: when a row is invalid its line and errors are returned and nothing is saved.
+
+        :param request: The request object
+        :return: The number of TODOs created.
+        """
+        created = imports.import_todos(request.user, streaming.read_upload(request))
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+
+class AsyncTodoListView(AsyncAPIView):
+    """
+    Async version of GET /api/todo/ for the ASGI application
+    """
+    sync_view_class = TodoViewSet
+    action = 'list'
+    authentication_classes = TodoViewSet.authentication_classes
+    permission_classes = TodoViewSet.permission_classes
+    throttle_classes = TodoViewSet.throttle_classes
+    throttle_scope = TodoViewSet.throttle_scope
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_sync_view()
+        workspace_queryset = viewset.get_list_workspace()
+        workspace = await workspace_queryset.afirst() if workspace_queryset is not None else None
+
+        if workspace is not None:
+            response = conditional.not_modified(request, workspace)
+            if response is not None:
+                return response
+
+        async def build():
+            queryset = viewset.get_values(viewset.filter_queryset(viewset.get_queryset()))
+            page = await viewset.paginator.apaginate_queryset(queryset, request, view=viewset)
+            return viewset.get_paginated_response(viewset.get_values_serializer().serialize(page)).data
+
+        if not caching.is_enabled():
+            versions = None
+        elif workspace is not None:
+            versions = [(workspace.pk, workspace.version)]
+        else:
+            versions = await caching.auser_versions(request.user)
+        response = Response(await caching.acached_data(request, 'todo-list', versions, build))
+
+        if workspace is not None:
+            conditional.set_validators(response, request, workspace)
+        return response
+
+
+def parse_uuid(value):
+    """
+    It parses a TODO id sent by the client
+    :return: The UUID, or None if the value is not a valid UUID.
+    """
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
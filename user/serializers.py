@@ -3,15 +3,20 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from core.serializers import TimedListSerializer, TimedSerializerMixin
+
+INVALID_CREDENTIALS = _('Unable to authenticate with provided credentials')
+
 
 # This class is a serializer for the User model. It has the fields id, email, name, and is_superuser.
 # The password field is write only and has a minimum length of 8 characters
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = get_user_model()
         fields = ('id', 'email', 'name', 'is_superuser', 'password')
         extra_kwargs = {'password': {'write_only': True, 'min_length': 8}}
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         """
@@ -54,8 +59,7 @@ class AuthTokenSerializer(serializers.Serializer):
         )
 
         if not user:
-            msg = _('Unable to authenticate with provided credentials')
-            raise serializers.ValidationError(msg, code='authorization')
+            raise serializers.ValidationError(INVALID_CREDENTIALS, code='authorization')
 
         attrs['user'] = user
 
@@ -1,11 +1,20 @@
-from django.test import TestCase
+import threading
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, AsyncRequestFactory
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Workspace
+from core.models import Todo, Workspace
+from user.views import AsyncAuthTokenView, AsyncManageUserView
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -27,6 +36,7 @@ class PublicUserApiTests(TestCase):
         It creates a new client that will be used to make requests to the API
         """
         self.client = APIClient()
+        cache.clear()
 
     def test_create_valid_user_success(self):
         """
@@ -39,16 +49,45 @@ class PublicUserApiTests(TestCase):
             'name': 'test1'
         }
 
-        response = self.client.post(CREATE_USER_URL, payload)
+        # The email uniqueness check, the user, its workspace (and its change number) and its token, plus
+        # the savepoint and release the transaction of the test adds
+        with self.assertNumQueries(7):
+            response = self.client.post(CREATE_USER_URL, payload)
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-        user = get_user_model().objects.get(**response.data)
+        data = {key: value for key, value in response.data.items() if key != 'token'}
+        user = get_user_model().objects.get(**data)
         workspace = Workspace.objects.get(user=user)
 
         self.assertTrue(user.check_password(payload['password']))
         self.assertNotIn('password', response.data)
         self.assertTrue(workspace.user, user)
+        self.assertEqual(response.data['token'], Token.objects.get(user=user).key)
+
+    def test_create_user_token_authenticates(self):
+        """
+        The token returned by the signup authenticates the new user without logging in
+        """
+        response = self.client.post(CREATE_USER_URL, {'email': 'test@gmail.com', 'password': 'testpass123'})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        me = self.client.get(ME_URL)
+
+        self.assertEqual(me.status_code, status.HTTP_200_OK)
+        self.assertEqual(me.data['user']['email'], 'test@gmail.com')
+        self.assertEqual([workspace['title'] for workspace in me.data['workspaces']], ['Home'])
+
+    def test_create_user_rolled_back(self):
+        """
+        When a step of the signup fails nothing of it is saved
+        """
+        with patch('rest_framework.authtoken.models.Token.objects.create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(CREATE_USER_URL, {'email': 'test@gmail.com', 'password': 'testpass123'})
+
+        self.assertFalse(get_user_model().objects.filter(email='test@gmail.com').exists())
+        self.assertFalse(Workspace.objects.exists())
 
     def test_user_exist(self):
         """
@@ -215,3 +254,161 @@ class PublicUserApiTests(TestCase):
 
             self.assertEqual(res_get_token.status_code,
                              status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncUserApiTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@gmail.com', password='testpass123', name='test name 1')
+        self.token = Token.objects.create(user=self.user)
+        self.factory = AsyncRequestFactory()
+
+    async def test_retrieve_user_success(self):
+        """
+        We retrieve the user with the async view and check the user and its workspaces
+        """
+        workspace = await Workspace.objects.acreate(user=self.user, title='Home')
+
+        request = self.factory.get(ME_URL, headers={'authorization': f'Token {self.token.key}'})
+        response = await AsyncManageUserView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['email'], self.user.email)
+        self.assertEqual([item['id'] for item in response.data['workspaces']], [str(workspace.pk)])
+        self.assertEqual(response.data['workspaces'][0]['counts']['total'], 0)
+
+
+class MeBootstrapApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@gmail.com', password='testpass123', name='test name 1')
+        self.workspaces = [
+            Workspace.objects.create(user=self.user, title=f'workspace {index}') for index in range(3)]
+        for workspace in self.workspaces[:2]:
+            Todo.objects.create(user=self.user, workspace=workspace, title='todo 1')
+            Todo.objects.create(user=self.user, workspace=workspace, title='todo 2', status='done', completed=True)
+            Todo.objects.create(user=self.user, workspace=workspace, title='todo 3', status='in progress')
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_counts(self):
+        """
+        We retrieve the user and check the TODO counts of every workspace, in two queries
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['email'], self.user.email)
+        self.assertEqual(
+            [workspace['id'] for workspace in response.data['workspaces']],
+            [str(workspace.pk) for workspace in self.workspaces])
+        self.assertEqual(response.data['workspaces'][0]['counts'], {
+            'total': 3, 'completed': 1, 'by_status': {'pending': 1, 'done': 1, 'in progress': 1}})
+        self.assertEqual(response.data['workspaces'][2]['counts'], {'total': 0, 'completed': 0, 'by_status': {}})
+        self.assertNotIn('TODOs', response.data['workspaces'][0])
+
+    def test_retrieve_include_todos(self):
+        """
+        We retrieve the user with `?include=todos` and check that the TODOs of every workspace come in one
+        more query, however many workspaces there are
+        """
+        with self.assertNumQueries(3):
+            response = self.client.get(ME_URL, {'include': 'todos'})
+
+        self.assertEqual(
+            [todo['title'] for todo in response.data['workspaces'][0]['TODOs']], ['todo 1', 'todo 2', 'todo 3'])
+        self.assertEqual(response.data['workspaces'][2]['TODOs'], [])
+
+        Workspace.objects.create(user=self.user, title='workspace 4')
+        with self.assertNumQueries(3):
+            self.client.get(ME_URL, {'include': 'todos'})
+
+
+class LoginApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@gmail.com', password='testpass123', name='test name 1')
+        self.factory = AsyncRequestFactory()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def use_old_hash(self):
+        self.user.password = make_password('testpass123', hasher='pbkdf2_sha1')
+        self.user.save(update_fields=['password'])
+
+    def test_token_upgrades_password_hash(self):
+        """
+        A password hashed with an older hasher still logs in, and its hash is made again with the current one
+        """
+        self.use_old_hash()
+
+        response = self.client.post(TOKEN_URL, {'email': 'test@gmail.com', 'password': 'testpass123'})
+        self.user.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.password.split('$')[0], get_hasher().algorithm)
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_passwords_hashed_in_pool(self):
+        threads = []
+
+        def make(password, *args):
+            threads.append(threading.current_thread().name)
+            return make_password(password, *args)
+
+        with patch('django.contrib.auth.hashers.make_password', make):
+            response = self.client.post(CREATE_USER_URL, {'email': 'test2@gmail.com', 'password': 'testpass123'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('password-hashing') for name in threads))
+
+    def test_token_throttled_per_email(self):
+        """
+        We send a burst of wrong passwords for one email and check that the attempts over the limit are
+        rejected with a Retry-After, even with the right password, while other emails still log in
+        """
+        payload = {'email': 'test@gmail.com', 'password': 'wrongpass'}
+        for _ in range(5):
+            self.assertEqual(self.client.post(TOKEN_URL, payload).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(TOKEN_URL, {**payload, 'password': 'testpass123'})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        response = self.client.post(TOKEN_URL, {'email': 'TEST2@gmail.com', 'password': 'wrongpass'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_token_throttled_per_ip(self):
+        for index in range(20):
+            self.client.post(TOKEN_URL, {'email': f'test{index}@gmail.com', 'password': 'wrongpass'})
+
+        response = self.client.post(TOKEN_URL, {'email': 'test@gmail.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def test_async_token(self):
+        """
+        The async view logs in, upgrades the old hashes and rejects a wrong password like the sync one
+        """
+        await sync_to_async(self.use_old_hash)()
+
+        request = self.factory.post(
+            TOKEN_URL, {'email': 'test@gmail.com', 'password': 'testpass123'}, content_type='application/json')
+        response = await AsyncAuthTokenView.as_view()(request)
+        await self.user.arefresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['token'], (await Token.objects.aget(user=self.user)).key)
+        self.assertEqual(self.user.password.split('$')[0], get_hasher().algorithm)
+
+        request = self.factory.post(
+            TOKEN_URL, {'email': 'test@gmail.com', 'password': 'wrongpass'}, content_type='application/json')
+        response = await AsyncAuthTokenView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'non_field_errors': ['Unable to authenticate with provided credentials']})
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
+
+from core.views import async_reads
 from user import views
 
 app_name = 'user'
@@ -9,3 +12,8 @@ urlpatterns = [
     path('me/', views.ManageUserView.as_view(), name='me'),
     path('<int:pk>/', views.ManageUserView.as_view(), name='me_detail'),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns.insert(0, path('me/', async_reads(
+        views.AsyncManageUserView.as_view(), views.ManageUserView.as_view()), name='me'))
+    urlpatterns.insert(0, path('token/', views.AsyncAuthTokenView.as_view(), name='token'))
@@ -1,60 +1,221 @@
-from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
 
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions, serializers
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework import status
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from user.serializers import UserSerializer, AuthTokenSerializer, INVALID_CREDENTIALS
+from job.views import accepted
 from workspace.serializers import WorkspaceSerializer
-from core import models
+from todo.serializers import TodoSerializer, TODO_VALUES
+from core import caching, deletion, models
+from core.authentication import CachedTokenAuthentication
+from core.backends import aauthenticate
+from core.serializers import get_field_selection
+from core.throttling import LoginEmailRateThrottle, LoginRateThrottle, SignupRateThrottle
+from core.views import AsyncAPIView
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = (SignupRateThrottle,)
 
     def create(self, request, *args, **kwargs):
         """
-        It creates a new user, then creates a new workspace for that user
+        It creates the user, their 'Home' workspace and their token in one transaction, and returns the
+        user with the token, so the client doesn't have to log in (and hash the password again) after
+        signing up.
+
+        The password is hashed before the first query of the transaction, so no transaction is open
+        meanwhile.
 
         :param request: The request object
-        :return: The response is being returned.
+        :return: The created user and its token.
         """
-        response = super().create(request, *args, **kwargs)
-        user = get_user_model().objects.get(id=response.data['id'])
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            user = serializer.save()
+            models.Workspace.objects.create(user=user, title='Home')
+            token = Token.objects.create(user=user)
 
-        models.Workspace.objects.create(user=user, title='Home')
-        return response
+        return Response(
+            {**serializer.data, 'token': token.key},
+            status=status.HTTP_201_CREATED,
+            headers=self.get_success_headers(serializer.data)
+        )
 
 
 class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
         return models.User.objects.filter(id=self.request.user.id)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        It deletes the user and everything they own. A user with many TODOs is deactivated at once and
+        purged by a background job, the response is then a 202 with the job.
+
+        :param request: The request object
+        :return: An empty 204, or a 202 with the purge job.
+        """
+        job = deletion.delete_user(self.get_object())
+        if job is not None:
+            return accepted(request, job)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def retrieve(self, request, *args, **kwargs):
         """
-        It retrieves the user and all of their workspaces
+        It retrieves the user, all of their workspaces and how many TODOs each workspace has. With
+        `?include=todos` the TODOs of every workspace are included too, `?fields=` and `?omit=` select
+        their fields and only the columns of these fields are read.
+
+        The user is the one already loaded by the authentication, so it takes two queries (three with the
+        TODOs) however many workspaces and TODOs the user has. The workspaces part is kept in the response
+        cache until a workspace of the user changes, then it takes one query.
 
         :param request: The request object
         :return: The user and the workspaces associated with that user.
         """
-        user = get_user_model().objects.filter(id=request.user.id)
-        user_data = UserSerializer(user, many=True)
+        workspaces = list(self.get_workspaces())
 
-        workspaces = models.Workspace.objects.filter(user=request.user)
-        workspaces_data = WorkspaceSerializer(workspaces, many=True)
+        def build():
+            if self.includes_todos():
+                prefetch_related_objects(workspaces, self.get_todos_prefetch())
+            return self.get_workspaces_data(workspaces, list(self.get_todo_counts()))
 
+        workspaces_data = caching.cached_data(request, 'me', self.get_versions(workspaces), build)
+        return self.get_me_response(request.user, workspaces_data)
+
+    def includes_todos(self):
+        return 'todos' in self.request.query_params.get('include', '').split(',')
+
+    def get_workspaces(self):
+        return models.Workspace.objects.filter(user=self.request.user).order_by('created', 'id')
+
+    def get_todo_fields(self):
+        return get_field_selection(self.request, TODO_VALUES.names)
+
+    def get_todos_prefetch(self):
+        queryset = models.Todo.objects.order_by('created', 'id')
+        fields = self.get_todo_fields()
+        if fields is not None:
+            # The workspace is what the prefetch joins the TODOs to their workspace with
+            queryset = queryset.only('workspace', *TODO_VALUES.only(*fields).columns)
+        return Prefetch('todo_set', queryset=queryset)
+
+    def get_todo_counts(self):
+        """
+        It returns the number of TODOs and of completed TODOs of the user per workspace and status
+        """
+        return models.Todo.objects.filter(user=self.request.user).values('workspace', 'status').annotate(
+            total=Count('id'), completed=Count('id', filter=Q(completed=True))).order_by()
+
+    def get_me_response(self, user, workspaces_data):
+        """
+        It builds the `me` response. The workspaces data is cached with the versions of the workspaces,
+        the user is serialized on every request so a change to the user is seen at once.
+
+        :param user: The user of the request
+        :param workspaces_data: The result of `get_workspaces_data`
+        :return: The user and their workspaces.
+        """
         return Response({
-            'user': user_data.data[0],
-            'workspaces': workspaces_data.data
+            'user': UserSerializer(user).data,
+            'workspaces': workspaces_data
         }, status=status.HTTP_200_OK)
 
+    def get_versions(self, workspaces):
+        if not caching.is_enabled():
+            return None
+        return sorted((workspace.pk, workspace.version) for workspace in workspaces)
+
+    def get_workspaces_data(self, workspaces, counts):
+        """
+        It serializes the workspaces of the `me` response
+
+        :param workspaces: The workspaces of the user, with their TODOs prefetched when they are included
+        :param counts: The rows of `get_todo_counts`
+        :return: The workspaces, each with the counts of its TODOs.
+        """
+        workspace_counts = {
+            workspace.pk: {'total': 0, 'completed': 0, 'by_status': {}} for workspace in workspaces}
+        for row in counts:
+            # A workspace created between both queries isn't in the response
+            workspace_count = workspace_counts.get(row['workspace'])
+            if workspace_count is None:
+                continue
+            workspace_count['total'] += row['total']
+            workspace_count['completed'] += row['completed']
+            workspace_count['by_status'][row['status']] = row['total']
+
+        todo_fields = self.get_todo_fields() if self.includes_todos() else None
+        workspaces_data = []
+        for workspace in workspaces:
+            data = WorkspaceSerializer(workspace).data
+            data['counts'] = workspace_counts[workspace.pk]
+            if self.includes_todos():
+                data['TODOs'] = TodoSerializer(workspace.todo_set.all(), many=True, fields=todo_fields).data
+            workspaces_data.append(data)
+        return workspaces_data
+
+
+class AsyncManageUserView(AsyncAPIView):
+    """
+    Async version of GET /api/user/me/ for the ASGI application
+    """
+    sync_view_class = ManageUserView
+    action = 'retrieve'
+    authentication_classes = ManageUserView.authentication_classes
+    permission_classes = ManageUserView.permission_classes
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_sync_view()
+        workspaces = [workspace async for workspace in view.get_workspaces()]
+
+        async def build():
+            if view.includes_todos():
+                await sync_to_async(prefetch_related_objects)(workspaces, view.get_todos_prefetch())
+            counts = [row async for row in view.get_todo_counts()]
+            return view.get_workspaces_data(workspaces, counts)
+
+        workspaces_data = await caching.acached_data(request, 'me', view.get_versions(workspaces), build)
+        return view.get_me_response(request.user, workspaces_data)
+
 
 class AuthTokenView(ObtainAuthToken):
+    """
+    It returns the token of the user with the given email and password. The attempts are throttled per IP
+    and per email before the password is hashed, so a credential stuffing burst is rejected cheaply.
+    """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (LoginRateThrottle, LoginEmailRateThrottle)
+
+
+class AsyncAuthTokenView(AsyncAPIView):
+    """
+    Async version of POST /api/user/token/ for the ASGI application. The password is checked in the
+    password hashing pool while the event loop serves other requests.
+    """
+    throttle_classes = AuthTokenView.throttle_classes
+
+    async def post(self, request, *args, **kwargs):
+        credentials = AuthTokenSerializer().to_internal_value(request.data)
+        user = await aauthenticate(request, username=credentials['email'], password=credentials['password'])
+
+        if user is None:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [INVALID_CREDENTIALS]}, code='authorization')
+
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return Response({'token': token.key})
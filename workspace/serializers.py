@@ -1,9 +1,16 @@
 from rest_framework.serializers import ModelSerializer
-from core.models import Workspace
+from core.models import Workspace, TODO_COUNTERS
+from core.serializers import TimedListSerializer, TimedSerializerMixin, ValuesSerializer
 
 
-class WorkspaceSerializer(ModelSerializer):
+class WorkspaceSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Workspace
-        fields = ('id', 'title')
+        fields = ('id', 'title', *TODO_COUNTERS)
+        read_only_fields = TODO_COUNTERS
         ready_only_fields = ('id', 'user',)
+        list_serializer_class = TimedListSerializer
+
+
+# The WorkspaceSerializer representation of `.values()` rows, for the list endpoint
+WORKSPACE_VALUES = ValuesSerializer(WorkspaceSerializer)
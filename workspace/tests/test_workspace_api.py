@@ -1,13 +1,18 @@
+import json
+
 from venv import create
-from django.test import TestCase
+from django.test import TestCase, AsyncRequestFactory, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from core.models import User, Workspace
+from core.models import User, Workspace, Todo
 from workspace.serializers import WorkspaceSerializer
+from core.events import get_broker, workspace_channel
+from workspace.views import AsyncWorkspaceDetailView, WorkspaceEventsView
 
 WORKSPACE_URL_LIST = reverse('workspace:workspace-list')
 
@@ -59,11 +64,11 @@ class PrivateWorkspaceApiTests(TestCase):
         )
 
         response = self.client.get(WORKSPACE_URL_LIST)
-        workspaces = Workspace.objects.all().order_by('-title')
+        workspaces = Workspace.objects.all().order_by('created', 'id')
         serializer = WorkspaceSerializer(workspaces, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_retrieve_limited_user(self):
         """
@@ -84,7 +89,7 @@ class PrivateWorkspaceApiTests(TestCase):
 
         response = self.client.get(WORKSPACE_URL_LIST)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_create_workspace(self):
         """
@@ -154,3 +159,207 @@ class PrivateWorkspaceApiTests(TestCase):
         ).exists()
 
         self.assertFalse(exist)
+
+    def test_retrieve_workspace_todos_paginated(self):
+        """
+        We create a workspace with 3 TODOs and retrieve it with a page size of 2, then we check that the
+        first page has 2 TODOs and a `next` link to the last one
+        """
+        workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        for i in range(3):
+            Todo.objects.create(
+                title=f'todo {i}', user=self.user, workspace=workspace)
+
+        url = reverse('workspace:workspace-detail', args=[workspace.pk])
+        response = self.client.get(url, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['workspace']['id'], str(workspace.pk))
+        self.assertEqual(len(response.data['TODOs']), 2)
+        self.assertIsNone(response.data['previous'])
+
+        next_response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(next_response.data['TODOs']), 1)
+        self.assertIsNone(next_response.data['next'])
+
+    @override_settings(STREAM_CHUNK_SIZE=2)
+    def test_retrieve_workspace_todos_streamed(self):
+        """
+        We retrieve a workspace with `?stream=true` and check that the streamed body is the workspace and
+        every one of its TODOs, even when they span several chunks
+        """
+        workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        for i in range(5):
+            Todo.objects.create(
+                title=f'todo {i}', user=self.user, workspace=workspace)
+
+        url = reverse('workspace:workspace-detail', args=[workspace.pk])
+        response = self.client.get(url, {'stream': 'true'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        body = json.loads(b''.join(response.streaming_content))
+        todos = Todo.objects.filter(workspace=workspace).order_by('created', 'id')
+
+        self.assertEqual(body['workspace']['id'], str(workspace.pk))
+        self.assertEqual([todo['id'] for todo in body['TODOs']], [str(todo.pk) for todo in todos])
+        self.assertEqual(body['TODOs'][0]['title'], todos[0].title)
+
+    def test_retrieve_workspace_not_modified(self):
+        """
+        We retrieve a workspace, then we send its ETag back and check that we get a 304 with a single
+        query on the workspace table. After a TODO changes, the same ETag gets the full response again
+        """
+        workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        todo = Todo.objects.create(
+            title='todo 1', user=self.user, workspace=workspace)
+
+        url = reverse('workspace:workspace-detail', args=[workspace.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        todo.completed = True
+        todo.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_ignored(self):
+        """
+        A write in the same second as the previous read keeps the Last-Modified, so it isn't used for a 304
+        """
+        workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        url = reverse('workspace:workspace-detail', args=[workspace.pk])
+        last_modified = self.client.get(url)['Last-Modified']
+
+        Todo.objects.create(title='todo 1', user=self.user, workspace=workspace)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['TODOs']), 1)
+
+    def test_update_workspace_changes_etag(self):
+        workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        url = reverse('workspace:workspace-detail', args=[workspace.pk])
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(url, {'title': 'updated title'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['workspace']['title'], 'updated title')
+
+
+class AsyncWorkspaceApiTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@gmail.com', password='testpass123', name='test 1')
+        self.token = Token.objects.create(user=self.user)
+        self.workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        self.factory = AsyncRequestFactory()
+
+    def get(self, workspace_pk, **params):
+        request = self.factory.get(
+            reverse('workspace:workspace-detail', args=[workspace_pk]),
+            params,
+            headers={'authorization': f'Token {self.token.key}'}
+        )
+        return AsyncWorkspaceDetailView.as_view()(request, pk=str(workspace_pk))
+
+    async def test_retrieve_workspace(self):
+        """
+        We retrieve a workspace with the async view and check the workspace and the page of TODOs
+        """
+        await Todo.objects.acreate(
+            title='todo 1', user=self.user, workspace=self.workspace)
+
+        response = await self.get(self.workspace.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['workspace']['id'], str(self.workspace.pk))
+        self.assertEqual(len(response.data['TODOs']), 1)
+
+    async def test_retrieve_workspace_streamed(self):
+        await Todo.objects.acreate(
+            title='todo 1', user=self.user, workspace=self.workspace)
+
+        response = await self.get(self.workspace.pk, stream='true')
+        body = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+
+        self.assertEqual(body['workspace']['id'], str(self.workspace.pk))
+        self.assertEqual([todo['title'] for todo in body['TODOs']], ['todo 1'])
+
+    async def test_retrieve_other_user_workspace(self):
+        user2 = await User.objects.acreate(email='test2@gmail.com')
+        workspace2 = await Workspace.objects.acreate(user=user2, title='workspace test 2')
+
+        response = await self.get(workspace2.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class WorkspaceEventsApiTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@gmail.com', password='testpass123', name='test 1')
+        self.token = Token.objects.create(user=self.user)
+        self.workspace = Workspace.objects.create(
+            user=self.user, title='workspace test 1')
+        self.factory = AsyncRequestFactory()
+
+    def get(self, workspace_pk, **params):
+        request = self.factory.get(f'/api/workspace/{workspace_pk}/events/', params)
+        return WorkspaceEventsView.as_view()(request, pk=str(workspace_pk))
+
+    async def test_stream_events(self):
+        """
+        We open the event stream of a workspace, publish an event to its channel and read it from the stream
+        """
+        response = await self.get(self.workspace.pk, token=self.token.key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 1000\n\n')
+        self.assertEqual(await anext(stream), b': ping\n\n')
+
+        get_broker().publish(workspace_channel(self.workspace.pk), {
+            'event': 'todo.deleted', 'workspace': self.workspace.pk, 'todo': {'id': '1'}})
+        message = (await anext(stream)).decode()
+        await stream.aclose()
+
+        self.assertTrue(message.startswith('event: todo.deleted\ndata: '))
+        self.assertEqual(json.loads(message.split('data: ')[1])['workspace'], str(self.workspace.pk))
+
+    async def test_stream_requires_token(self):
+        response = await self.get(self.workspace.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_other_user_workspace(self):
+        user2 = await User.objects.acreate(email='test2@gmail.com')
+        workspace2 = await Workspace.objects.acreate(user=user2, title='workspace test 2')
+
+        response = await self.get(workspace2.pk, token=self.token.key)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
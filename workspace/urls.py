@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
+from core.views import async_reads
 from workspace import views
 
 router = DefaultRouter()
@@ -13,3 +15,13 @@ app_name = 'workspace'
 urlpatterns = [
     path('', include(router.urls))
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns.insert(0, path('<str:pk>/', async_reads(
+        views.AsyncWorkspaceDetailView.as_view(),
+        views.WorkspaceViewSet.as_view({
+            'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+        })
+    ), name='workspace-detail'))
+    urlpatterns.insert(0, path(
+        '<str:pk>/events/', views.WorkspaceEventsView.as_view(), name='workspace-events'))
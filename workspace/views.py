@@ -1,20 +1,29 @@
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from django.http import StreamingHttpResponse
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status
 
+from core.authentication import CachedTokenAuthentication, QueryTokenAuthentication
 from core.models import Workspace, Todo
-from workspace.serializers import WorkspaceSerializer
-from todo.serializers import TodoSerializer
+from core import caching, conditional, deletion, events, streaming
+from core.renderers import EXPORT_RENDERERS
+from core.serializers import get_field_selection
+from core.views import AsyncAPIView, ValuesListMixin
+from workspace.serializers import WorkspaceSerializer, WORKSPACE_VALUES
+from job.views import accepted
+from todo import imports
+from todo.serializers import TODO_VALUES
 
 
-class WorkspaceViewSet(viewsets.ModelViewSet):
+class WorkspaceViewSet(ValuesListMixin, viewsets.ModelViewSet):
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Workspace.objects.all()
     serializer_class = WorkspaceSerializer
+    values_serializer = WORKSPACE_VALUES
 
     def get_queryset(self):
         """
@@ -24,25 +33,173 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
         """
         return self.queryset.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        """
+        The page is kept in the response cache until a workspace of the user changes
+        """
+        versions = caching.user_versions(request.user) if caching.is_enabled() else None
+        return Response(caching.cached_data(request, 'workspace-list', versions, self.get_list_data))
+
     def perform_create(self, serializer):
 
         serializer.save(user=self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        It deletes the workspace and its TODOs. A big workspace is hidden at once and purged by a
+        background job, the response is then a 202 with the job.
+
+        :param request: The request object
+        :return: An empty 204, or a 202 with the purge job.
+        """
+        job = deletion.delete_workspace(self.get_object())
+        if job is not None:
+            return accepted(request, job)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def retrieve(self, request, *args, **kwargs):
         """
-        We're overriding the retrieve function because we want to return the workspace and all of its TODOs
+        We're overriding the retrieve function because we want to return the workspace and its TODOs
         in one response.
-        
+
+        The TODOs are paginated with the same cursor pagination as the list endpoints, and the page is kept
+        in the response cache until the workspace changes. With `?stream=true` every TODO is returned
+        instead, written incrementally from a server side cursor. `?fields=` and `?omit=` select the fields
+        of the TODOs.
+
         :param request: The request object
-        :return: A workspace object and a list of TODO objects
+        :return: A workspace object and a page of TODO objects
         """
         instance = self.get_object()
-        workspace_serialized = self.serializer_class(instance)
+        response = conditional.not_modified(request, instance)
+        if response is not None:
+            return response
+
+        todos = self.get_todos(instance)
+
+        if self.is_streaming():
+            # Under ASGI without the async views this view runs in a thread, the stream must still be async
+            if streaming.is_asgi(request):
+                content = streaming.astream_json_list(
+                    self.get_head(instance), 'TODOs', streaming.aiterate(todos), self.get_todo_values())
+            else:
+                content = streaming.stream_json_list(
+                    self.get_head(instance), 'TODOs', streaming.iterate(todos), self.get_todo_values())
+            response = StreamingHttpResponse(content, content_type='application/json')
+        else:
+            def build():
+                return self.get_todos_data(instance, self.paginator.paginate_queryset(todos, request, view=self))
+
+            response = Response(caching.cached_data(
+                request, 'workspace-detail', self.get_versions(instance), build))
+
+        return conditional.set_validators(response, request, instance)
+
+    def get_todo_values(self):
+        """
+        It returns the ValuesSerializer of the TODO fields asked with `?fields=` and `?omit=`
+        """
+        fields = get_field_selection(self.request, TODO_VALUES.names)
+        return TODO_VALUES if fields is None else TODO_VALUES.only(*fields)
+
+    def get_todos(self, instance):
+        ordering = ('created', 'id')
+        return self.get_todo_values().values(
+            Todo.objects.filter(workspace=instance).order_by(*ordering), *ordering)
+
+    def is_streaming(self):
+        return self.request.query_params.get('stream') in ('1', 'true')
+
+    def get_head(self, instance):
+        return {'workspace': self.serializer_class(instance).data}
+
+    def get_todos_data(self, instance, page):
+        return {
+            **self.get_head(instance),
+            'TODOs': self.get_todo_values().serialize(page),
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link()
+        }
+
+    def get_versions(self, instance):
+        return [(instance.pk, instance.version)]
+
+    @action(detail=True, renderer_classes=EXPORT_RENDERERS)
+    def export(self, request, *args, **kwargs):
+        """
+        It streams the TODOs of the workspace as NDJSON, or as CSV with `?format=csv`, from a server side
+        cursor, with the fields selected by `?fields=` and `?omit=`
+
+        :param request: The request object
+        :return: The TODOs as an NDJSON or CSV attachment.
+        """
+        instance = self.get_object()
+        return streaming.export_response(
+            request, self.get_todos(instance), self.get_todo_values(), f'workspace-{instance.pk}')
+
+    @action(detail=True, methods=['post'], url_path='import')
+    def import_todos(self, request, *args, **kwargs):
+        """
+        It creates the TODOs of an NDJSON or CSV upload in the workspace, whatever the `workspace` of the
+        rows, like POST /api/todo/import/ does
+
+        :param request: The request object
+        :return: The number of TODOs created.
+        """
+        created = imports.import_todos(request.user, streaming.read_upload(request), self.get_object())
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+
+class AsyncWorkspaceDetailView(AsyncAPIView):
+    """
+    Async version of GET /api/workspace/<id>/ for the ASGI application
+    """
+    sync_view_class = WorkspaceViewSet
+    action = 'retrieve'
+    authentication_classes = WorkspaceViewSet.authentication_classes
+    permission_classes = WorkspaceViewSet.permission_classes
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_sync_view()
+        instance = await self.aget_object(viewset)
+        response = conditional.not_modified(request, instance)
+        if response is not None:
+            return response
+
+        todos = viewset.get_todos(instance)
+
+        if viewset.is_streaming():
+            response = StreamingHttpResponse(
+                streaming.astream_json_list(
+                    viewset.get_head(instance), 'TODOs', streaming.aiterate(todos), viewset.get_todo_values()),
+                content_type='application/json'
+            )
+        else:
+            async def build():
+                return viewset.get_todos_data(
+                    instance, await viewset.paginator.apaginate_queryset(todos, request, view=viewset))
+
+            response = Response(await caching.acached_data(
+                request, 'workspace-detail', viewset.get_versions(instance), build))
+
+        return conditional.set_validators(response, request, instance)
+
+
+class WorkspaceEventsView(AsyncAPIView):
+    """
+    GET /api/workspace/<id>/events/ streams the changes of the workspace TODOs as Server-Sent Events,
+    for the ASGI application
+    """
+    sync_view_class = WorkspaceViewSet
+    action = 'retrieve'
+    authentication_classes = (QueryTokenAuthentication,)
+    permission_classes = WorkspaceViewSet.permission_classes
 
-        todos = Todo.objects.filter(workspace=instance)
-        todos_serialized = TodoSerializer(todos, many=True)
+    async def get(self, request, *args, **kwargs):
+        instance = await self.aget_object(self.get_sync_view())
 
-        return Response({
-            'workspace': workspace_serialized.data,
-            'TODOs': todos_serialized.data
-        })
+        response = StreamingHttpResponse(
+            events.event_stream(events.workspace_channel(instance.pk)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response